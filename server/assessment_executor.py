@@ -0,0 +1,98 @@
+"""
+Bounded worker pool for running blocking assessments off the event loop
+"""
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Threads running assessments concurrently
+DEFAULT_MAX_WORKERS = int(os.getenv("ASSESS_MAX_WORKERS", min(32, (os.cpu_count() or 1) + 4)))
+
+# Assessments allowed to wait for a free worker before new ones are rejected
+DEFAULT_MAX_QUEUE = int(os.getenv("ASSESS_MAX_QUEUE", 64))
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when every worker is busy and the wait queue is full"""
+
+
+class AssessmentExecutor:
+    """
+    Runs synchronous assessment functions in a thread pool so async
+    handlers keep the event loop free for other requests and /health.
+
+    At most max_workers + max_queue calls are admitted at once; beyond that
+    run() raises ExecutorSaturatedError so the server can answer 503 instead
+    of queueing without bound.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self.max_queue = DEFAULT_MAX_QUEUE if max_queue is None else max_queue
+        self.capacity = self.max_workers + self.max_queue
+        self.in_flight = 0
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="assess")
+        self._released: Optional[asyncio.Condition] = None
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= self.capacity
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "capacity": self.capacity,
+            "inFlight": self.in_flight,
+        }
+
+    async def _submit(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+        finally:
+            self.in_flight -= 1
+            if self._released is not None:
+                async with self._released:
+                    self._released.notify()
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn in the pool, rejecting immediately when saturated"""
+        if self.saturated:
+            raise ExecutorSaturatedError(
+                f"Assessment queue full ({self.in_flight}/{self.capacity} in flight)"
+            )
+        self.in_flight += 1
+        return await self._submit(fn, *args, **kwargs)
+
+    async def run_when_available(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn in the pool, waiting for capacity instead of rejecting"""
+        if self._released is None:
+            self._released = asyncio.Condition()
+        async with self._released:
+            await self._released.wait_for(lambda: not self.saturated)
+            self.in_flight += 1
+        return await self._submit(fn, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Global instance
+_executor_instance = None
+
+
+def get_assessment_executor() -> AssessmentExecutor:
+    """Get singleton assessment executor instance"""
+    global _executor_instance
+    if _executor_instance is None:
+        _executor_instance = AssessmentExecutor()
+        logger.info(
+            f"Assessment executor started with {_executor_instance.max_workers} workers "
+            f"and queue depth {_executor_instance.max_queue}"
+        )
+    return _executor_instance
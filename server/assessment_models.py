@@ -0,0 +1,21 @@
+"""
+Request and response models shared by the assessment servers and the gateway
+"""
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class AssessmentRequest(BaseModel):
+    symptoms: List[str]
+    gestationalWeek: Optional[int] = None
+    previousComplications: Optional[bool] = None
+    additionalSymptoms: Optional[str] = None
+
+
+class AssessmentResponse(BaseModel):
+    riskLevel: str
+    confidence: float
+    recommendations: List[str]
+    reasoning: str
+    urgency: str
@@ -0,0 +1,190 @@
+"""
+Batch assessment routes shared by the FastAPI assessment servers
+"""
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Mapping, Optional, Type, Union
+
+from fastapi import Body, FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+
+from assessment_executor import ExecutorSaturatedError, get_assessment_executor
+
+logger = logging.getLogger(__name__)
+
+# Largest batch accepted by POST /assess/batch
+MAX_BATCH_SIZE = int(os.getenv("ASSESS_BATCH_MAX_SIZE", 1000))
+
+# Number of NDJSON lines assessed together by POST /assess/batch/stream
+NDJSON_CHUNK_SIZE = int(os.getenv("ASSESS_BATCH_CHUNK_SIZE", 256))
+
+# Most NDJSON lines accepted by POST /assess/batch/stream
+MAX_STREAM_LINES = int(os.getenv("ASSESS_BATCH_STREAM_MAX_LINES", 100000))
+
+BatchFunction = Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class BatchAssessmentResponse(BaseModel):
+    results: List[BatchItemResult]
+
+
+def request_to_kwargs(request: BaseModel) -> Dict[str, Any]:
+    """Map an AssessmentRequest onto assess_pregnancy_risk_api keyword arguments"""
+    return {
+        "symptoms": request.symptoms,
+        "gestational_week": request.gestationalWeek,
+        "previous_complications": request.previousComplications,
+        "additional_info": request.additionalSymptoms,
+    }
+
+
+def run_batch(
+    items: List[Any],
+    request_model: Type[BaseModel],
+    response_model: Type[BaseModel],
+    batch_fn: BatchFunction,
+    offset: int = 0
+) -> List[BatchItemResult]:
+    """
+    Validate each item on its own and assess all valid items in one call.
+    Invalid items get a per-item error instead of failing the whole batch.
+    """
+    results: List[Optional[BatchItemResult]] = [None] * len(items)
+    valid_positions = []
+    valid_kwargs = []
+
+    for position, item in enumerate(items):
+        if isinstance(item, BatchItemResult):
+            results[position] = item
+            continue
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("Batch item must be a JSON object")
+            valid_kwargs.append(request_to_kwargs(request_model(**item)))
+            valid_positions.append(position)
+        except (ValidationError, ValueError) as e:
+            results[position] = BatchItemResult(index=offset + position, error=f"Invalid request: {e}")
+
+    if valid_kwargs:
+        try:
+            outputs = batch_fn(valid_kwargs)
+        except Exception as e:
+            logger.error(f"Batch assessment failed: {e}")
+            outputs = [e] * len(valid_kwargs)
+
+        for position, output in zip(valid_positions, outputs):
+            if isinstance(output, Exception):
+                results[position] = BatchItemResult(
+                    index=offset + position,
+                    error=f"Risk assessment failed: {output}"
+                )
+            else:
+                results[position] = BatchItemResult(
+                    index=offset + position,
+                    result=response_model(**output).model_dump()
+                )
+
+    return results
+
+
+def register_batch_routes(
+    app: FastAPI,
+    request_model: Type[BaseModel],
+    response_model: Type[BaseModel],
+    batch_fn: Union[BatchFunction, Mapping[str, BatchFunction]],
+    default_engine: Optional[str] = None
+) -> None:
+    """
+    Add POST /assess/batch and POST /assess/batch/stream to an assessment
+    app. batch_fn may map engine names to batch functions, in which case
+    the routes pick one with ?engine= (default_engine when omitted).
+    """
+
+    def select_batch_fn(request: Request) -> BatchFunction:
+        if not isinstance(batch_fn, Mapping):
+            return batch_fn
+        engine = request.query_params.get("engine", default_engine)
+        if engine not in batch_fn:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown engine {engine!r} (expected one of: {', '.join(batch_fn)})"
+            )
+        return batch_fn[engine]
+
+    @app.post("/assess/batch", response_model=BatchAssessmentResponse)
+    async def assess_batch(request: Request, items: List[Any] = Body(...)):
+        """
+        Assess a list of requests; results are returned in request order
+        """
+        engine_batch_fn = select_batch_fn(request)
+        if len(items) > MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch too large: {len(items)} items (maximum {MAX_BATCH_SIZE})"
+            )
+        try:
+            results = await get_assessment_executor().run(
+                run_batch, items, request_model, response_model, engine_batch_fn
+            )
+        except ExecutorSaturatedError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+        return BatchAssessmentResponse(results=results)
+
+    @app.post("/assess/batch/stream")
+    async def assess_batch_stream(request: Request):
+        """
+        Assess newline-delimited JSON requests, streaming one JSON result per line
+        """
+        engine_batch_fn = select_batch_fn(request)
+        # The body is read up front: the streaming response listens on the
+        # same ASGI channel for client disconnects once it starts
+        lines = [line for line in (await request.body()).splitlines() if line.strip()]
+        if len(lines) > MAX_STREAM_LINES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch too large: {len(lines)} lines (maximum {MAX_STREAM_LINES})"
+            )
+
+        executor = get_assessment_executor()
+        if executor.saturated:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Assessment queue full ({executor.in_flight}/{executor.capacity} in flight)",
+                headers={"Retry-After": "1"}
+            )
+
+        async def generate():
+            offset = 0
+            chunk: List[Any] = []
+
+            def assess_chunk(items: List[Any], start: int) -> str:
+                return "".join(
+                    item.model_dump_json() + "\n"
+                    for item in run_batch(items, request_model, response_model, engine_batch_fn, start)
+                )
+
+            # Once streaming has started, chunks wait for a worker rather than fail
+            async def flush():
+                return await executor.run_when_available(assess_chunk, chunk, offset)
+
+            for line in lines:
+                try:
+                    chunk.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    chunk.append(BatchItemResult(index=offset + len(chunk), error=f"Invalid JSON: {e}"))
+                if len(chunk) >= NDJSON_CHUNK_SIZE:
+                    yield await flush()
+                    offset += len(chunk)
+                    chunk = []
+            if chunk:
+                yield await flush()
+
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
@@ -0,0 +1,710 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the three assessment engines
+
+Engines:
+    rules  huggingface_service.PregnancyAssessmentService (hf_server)
+    kb     hf_rag_service.PregnancyHFRAGService (hf_rag_server)
+    rag    rag_service.PregnancyRAGService (rag_server), with a local fake LLM
+
+Each engine runs in its own subprocess so peak RSS is measured per engine.
+Requests are generated from the knowledge-base vocabulary, timed both
+in-process against the service and through the FastAPI app over an ASGI
+client, and written to JSON. Passing --compare flags regressions against
+a previous run and exits non-zero.
+
+Usage:
+    python benchmark.py --requests 2000 --output bench.json
+    python benchmark.py --engines rules,kb --compare bench.json
+    python benchmark.py --vectorized 1000000
+    python benchmark.py --startup
+    python benchmark.py --vector-store 100000
+    python benchmark.py --profiles --engines rules,kb --concurrency 64
+    python benchmark.py --context-modes --fake-llm-latency 0.5 --requests 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import resource
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from rule_engine import RISK_RULES_FILE
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+KNOWLEDGE_BASE_DIR = os.path.join(SERVER_DIR, "knowledge_base")
+
+ENGINES = ("rules", "kb", "rag")
+
+# Canned reply for the fake LLM used by the rag engine
+FAKE_LLM_RESPONSE = json.dumps({
+    "riskLevel": "moderate",
+    "confidence": 0.7,
+    "recommendations": ["Contact your healthcare provider within 24 hours"],
+    "reasoning": "Benchmark fake LLM response.",
+    "urgency": "within_24_hours"
+})
+
+_BULLET = re.compile(r"^\s*-\s*([^:(]+)")
+
+
+def build_vocabulary(knowledge_base_dir: str = KNOWLEDGE_BASE_DIR) -> List[str]:
+    """Symptom phrases taken from the bullet points of every knowledge-base file"""
+    phrases = set()
+    for name in sorted(os.listdir(knowledge_base_dir)):
+        path = os.path.join(knowledge_base_dir, name)
+        if not os.path.isfile(path) or name == RISK_RULES_FILE:
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                match = _BULLET.match(line)
+                if not match:
+                    continue
+                for phrase in re.split(r"\s*\+\s*|\s+with\s+", match.group(1)):
+                    phrase = phrase.strip().strip('"').lower()
+                    if 2 < len(phrase) < 60:
+                        phrases.add(phrase)
+    return sorted(phrases)
+
+
+def generate_requests(
+    count: int,
+    vocabulary: List[str],
+    min_symptoms: int = 1,
+    max_symptoms: int = 5,
+    seed: int = 42
+) -> List[Dict[str, Any]]:
+    """Synthetic AssessmentRequest payloads with a reproducible symptom mix"""
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        requests.append({
+            "symptoms": rng.sample(vocabulary, rng.randint(min_symptoms, min(max_symptoms, len(vocabulary)))),
+            "gestationalWeek": rng.choice([None] + list(range(4, 42))),
+            "previousComplications": rng.random() < 0.2,
+            "additionalSymptoms": None
+        })
+    return requests
+
+
+def summarize(latencies: List[float], wall_seconds: float) -> Dict[str, float]:
+    ordered = sorted(latencies)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000
+
+    return {
+        "count": len(ordered),
+        "p50Ms": pct(50),
+        "p95Ms": pct(95),
+        "p99Ms": pct(99),
+        "meanMs": statistics.fmean(ordered) * 1000,
+        "requestsPerSecond": len(ordered) / wall_seconds if wall_seconds else 0.0
+    }
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class FakeLLMClient:
+    """Offline stand-in for llm_client.InferenceClient"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def complete(self, prompt: str, deadline: Optional[float] = None, **parameters) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return FAKE_LLM_RESPONSE
+
+    async def acomplete(self, prompt: str, deadline: Optional[float] = None, **parameters) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return FAKE_LLM_RESPONSE
+
+    def complete_until(self, prompt: str, is_complete: Callable[[str], bool], deadline: Optional[float] = None, **parameters) -> str:
+        response = self.complete(prompt, deadline, **parameters)
+        is_complete(response)
+        return response
+
+    async def astream(self, prompt: str, deadline: Optional[float] = None, **parameters):
+        yield await self.acomplete(prompt, deadline, **parameters)
+
+
+def load_engine(engine: str, fake_llm_latency: float):
+    """Return (assess function taking API kwargs, FastAPI app) for an engine"""
+    if engine == "rules":
+        import huggingface_service
+        import hf_server
+        return huggingface_service.get_assessment_service().assess_pregnancy_risk, hf_server.app
+    if engine == "kb":
+        import hf_rag_service
+        import hf_rag_server
+        return hf_rag_service.get_hf_rag_service().assess_pregnancy_risk, hf_rag_server.app
+    if engine == "rag":
+        os.environ.setdefault("RAG_WATCH_KNOWLEDGE_BASE", "false")
+        from llama_index.core import Settings
+        from llama_index.core.llms import MockLLM
+        import rag_service
+        import rag_server
+
+        class SlowMockLLM(MockLLM):
+            latency: float = 0.0
+
+            def complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+                if self.latency:
+                    time.sleep(self.latency)
+                return super().complete(prompt, formatted=formatted, **kwargs)
+
+        # Keep both LLM calls offline and equally slow: query-engine synthesis
+        # (RAG_CONTEXT_MODE=synthesis) and the assessment prompt
+        Settings.llm = SlowMockLLM(latency=fake_llm_latency)
+        service = rag_service.get_rag_service()
+        service.llm_client = FakeLLMClient(fake_llm_latency)
+        return service.assess_pregnancy_risk, rag_server.app
+    raise ValueError(f"Unknown engine: {engine}")
+
+
+def _api_kwargs(request: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "symptoms": request["symptoms"],
+        "gestational_week": request["gestationalWeek"],
+        "previous_complications": request["previousComplications"],
+        "additional_info": request["additionalSymptoms"]
+    }
+
+
+def bench_in_process(assess: Callable[..., Any], requests: List[Dict[str, Any]]) -> Dict[str, float]:
+    latencies = []
+    started = time.perf_counter()
+    for request in requests:
+        t0 = time.perf_counter()
+        assess(**_api_kwargs(request))
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def bench_client(client, requests: List[Dict[str, Any]], concurrency: int) -> Dict[str, float]:
+    """POST requests to /assess from concurrent workers sharing an httpx.AsyncClient"""
+    latencies: List[float] = []
+    queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+
+    async def worker():
+        while not queue.empty():
+            request = queue.get_nowait()
+            t0 = time.perf_counter()
+            response = await client.post("/assess", json=request)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def bench_asgi(app, requests: List[Dict[str, Any]], concurrency: int) -> Dict[str, float]:
+    import httpx
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120) as client:
+        return await bench_client(client, requests, concurrency)
+
+
+def run_engine(engine: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Benchmark one engine in the current process"""
+    # Measure the engines, not the result cache
+    if not args.with_cache:
+        os.environ["ASSESS_CACHE_ENABLED"] = "false"
+    sys.path.insert(0, SERVER_DIR)
+    os.chdir(SERVER_DIR)
+
+    load_started = time.perf_counter()
+    assess, app = load_engine(engine, args.fake_llm_latency)
+    load_seconds = time.perf_counter() - load_started
+
+    requests = generate_requests(args.requests + args.warmup, build_vocabulary(), args.min_symptoms, args.max_symptoms, args.seed)
+    warmup, measured = requests[:args.warmup], requests[args.warmup:]
+    for request in warmup:
+        assess(**_api_kwargs(request))
+
+    return {
+        "loadSeconds": load_seconds,
+        "inProcess": bench_in_process(assess, measured),
+        "asgi": asyncio.run(bench_asgi(app, measured, args.concurrency)),
+        "peakRssMb": peak_rss_mb()
+    }
+
+
+def run_vectorized(args: argparse.Namespace) -> Dict[str, Any]:
+    """Score args.vectorized records with the vectorized rules engine and check parity with the scalar path"""
+    os.environ["ASSESS_CACHE_ENABLED"] = "false"
+    sys.path.insert(0, SERVER_DIR)
+    os.chdir(SERVER_DIR)
+    import huggingface_service
+
+    scorer = huggingface_service.get_vectorized_scorer()
+    if scorer is None:
+        raise RuntimeError("numpy is required for --vectorized")
+    requests = [
+        {
+            "symptoms": request["symptoms"],
+            "gestational_week": request["gestationalWeek"],
+            "previous_complications": request["previousComplications"]
+        }
+        for request in generate_requests(args.vectorized, build_vocabulary(), args.min_symptoms, args.max_symptoms, args.seed)
+    ]
+
+    started = time.perf_counter()
+    batch = scorer.encode(requests)
+    encoded = time.perf_counter()
+    scorer.score(batch)
+    scored = time.perf_counter()
+    results = scorer.assess(requests)
+    assessed = time.perf_counter()
+
+    sample = requests[:args.parity_sample] if args.parity_sample else requests
+    scalar_started = time.perf_counter()
+    mismatches = sum(
+        1 for request, result in zip(sample, results)
+        if huggingface_service.assess_pregnancy_risk_api(**request) != result
+    )
+    scalar_seconds = time.perf_counter() - scalar_started
+
+    return {
+        "records": len(requests),
+        "encodeSeconds": encoded - started,
+        "scoreSeconds": scored - encoded,
+        "assessSeconds": assessed - scored,
+        "assessRecordsPerSecond": len(requests) / (assessed - scored),
+        "scoreOnlyRecordsPerSecond": len(requests) / (scored - encoded),
+        "scalarRecordsPerSecond": len(sample) / scalar_seconds,
+        "paritySample": len(sample),
+        "parityMismatches": mismatches,
+        "peakRssMb": peak_rss_mb()
+    }
+
+
+def run_vector_store(args: argparse.Namespace) -> Dict[str, Any]:
+    """Exact top-k latency and recall of the numpy vector store over args.vector_store random chunks"""
+    import numpy as np
+    sys.path.insert(0, SERVER_DIR)
+    from vector_store import DTYPES, NumpyVectorStore
+
+    rng = np.random.default_rng(args.seed)
+    embeddings = rng.standard_normal((args.vector_store, args.vector_dim), dtype=np.float32)
+    ids = [str(i) for i in range(args.vector_store)]
+    # Queries near stored chunks, like a real retrieval query
+    queries = embeddings[rng.integers(0, args.vector_store, 256)] + 0.5 * rng.standard_normal((256, args.vector_dim), dtype=np.float32)
+
+    report: Dict[str, Any] = {"chunks": args.vector_store, "dim": args.vector_dim, "topK": 5, "dtypes": {}}
+    exact = None
+    for dtype in DTYPES:
+        store = NumpyVectorStore.from_embeddings(ids, embeddings, dtype)
+        for query in queries[:10]:
+            store.query(query)
+        latencies = []
+        for query in queries:
+            t0 = time.perf_counter()
+            store.query(query)
+            latencies.append(time.perf_counter() - t0)
+        started = time.perf_counter()
+        results = store.query_batch(queries)
+        batch_seconds = time.perf_counter() - started
+
+        top = [{hit_id for hit_id, _ in hits} for hits in results]
+        if exact is None:
+            exact = top
+        stats = summarize(latencies, sum(latencies))
+        report["dtypes"][dtype] = {
+            "memoryMb": store.nbytes / (1024 * 1024),
+            "p50Ms": stats["p50Ms"],
+            "p99Ms": stats["p99Ms"],
+            "batchQueriesPerSecond": len(queries) / batch_seconds,
+            "recallAt5": sum(len(a & b) for a, b in zip(top, exact)) / (5 * len(queries))
+        }
+        entry = report["dtypes"][dtype]
+        print(
+            f"{dtype:<8}{entry['memoryMb']:>9.1f} MB  p50 {entry['p50Ms']:.3f} ms  p99 {entry['p99Ms']:.3f} ms  "
+            f"batch {entry['batchQueriesPerSecond']:.0f} q/s  recall@5 {entry['recallAt5']:.3f}"
+        )
+    return report
+
+
+CONTEXT_MODES = ("synthesis", "retrieval")
+
+
+def _worker_args(args: argparse.Namespace) -> List[str]:
+    """Options passed on to the per-engine --worker subprocesses"""
+    return [
+        "--requests", str(args.requests), "--warmup", str(args.warmup),
+        "--min-symptoms", str(args.min_symptoms), "--max-symptoms", str(args.max_symptoms),
+        "--concurrency", str(args.concurrency), "--seed", str(args.seed),
+        "--fake-llm-latency", str(args.fake_llm_latency)
+    ] + (["--with-cache"] if args.with_cache else [])
+
+
+def run_context_modes(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    The rag engine with the query engine's synthesized answer as prompt
+    context (two LLM calls per request) and with the retrieved chunks
+    (one call). Both fake LLM calls sleep --fake-llm-latency seconds.
+    """
+    report: Dict[str, Any] = {"fakeLlmLatency": args.fake_llm_latency, "requests": args.requests, "modes": {}}
+    for mode in CONTEXT_MODES:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), *_worker_args(args), "--worker", "rag"],
+            capture_output=True, text=True, env={**os.environ, "RAG_CONTEXT_MODE": mode}
+        )
+        if completed.returncode != 0:
+            last_line = (completed.stderr.strip().splitlines() or ["failed"])[-1]
+            report["modes"][mode] = {"error": last_line}
+            print(f"{mode:<10} failed: {last_line}")
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        report["modes"][mode] = result
+        stats = result["inProcess"]
+        print(f"{mode:<10} p50 {stats['p50Ms']:9.1f} ms  p99 {stats['p99Ms']:9.1f} ms  {stats['requestsPerSecond']:8.1f} req/s")
+
+    modes = report["modes"]
+    if all("inProcess" in modes.get(mode, {}) for mode in CONTEXT_MODES):
+        report["p50Speedup"] = modes["synthesis"]["inProcess"]["p50Ms"] / modes["retrieval"]["inProcess"]["p50Ms"]
+        print(f"retrieval mode p50 speedup: {report['p50Speedup']:.2f}x")
+    return report
+
+
+SERVER_APPS = {"rules": "hf_server", "kb": "hf_rag_server", "rag": "rag_server"}
+
+# Environment variable each server reads its port from
+SERVER_PORT_ENV = {"rules": "HF_PORT", "kb": "HF_RAG_PORT", "rag": "RAG_PORT"}
+
+SERVER_PROFILES = ("dev", "prod")
+
+
+def import_profile(module: str, top: int = 8) -> List[Dict[str, Any]]:
+    """Slowest direct imports of a module, from python -X importtime"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SERVER_DIR, capture_output=True, text=True
+    )
+    children: List[Dict[str, Any]] = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        # A module's imports are listed before it, one level deeper
+        if depth == 1:
+            children.append({"module": name.strip(), "cumulativeMs": int(cumulative) / 1000})
+        elif depth == 0:
+            if name.strip() == module:
+                return sorted(children, key=lambda item: -item["cumulativeMs"])[:top]
+            children = []
+    return []
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def measure_startup(engine: str, timeout: float) -> Dict[str, Any]:
+    """Start a server and time its import, first /health answer and readiness"""
+    import httpx
+
+    module = SERVER_APPS[engine]
+    port = _free_port()
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {module}; print('IMPORTED', time.perf_counter() - started, flush=True); "
+        f"import uvicorn; uvicorn.run({module}.app, host='127.0.0.1', port={port}, log_level='warning')"
+    )
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", code], cwd=SERVER_DIR, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    result: Dict[str, Any] = {"importSeconds": None, "firstHealthSeconds": None, "readySeconds": None, "status": None}
+    try:
+        line = process.stdout.readline()
+        if line.startswith("IMPORTED"):
+            result["importSeconds"] = float(line.split()[1])
+        while time.perf_counter() - started < timeout and process.poll() is None:
+            try:
+                health = httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0).json()
+            except httpx.HTTPError:
+                time.sleep(0.05)
+                continue
+            elapsed = time.perf_counter() - started
+            if result["firstHealthSeconds"] is None:
+                result["firstHealthSeconds"] = elapsed
+            result["status"] = health.get("status")
+            if health.get("status") != "warming":
+                result["readySeconds"] = elapsed
+                result["warmup"] = health.get("warmup")
+                break
+            time.sleep(0.1)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    result["slowestImports"] = import_profile(module)
+    return result
+
+
+def run_startup(args: argparse.Namespace) -> Dict[str, Any]:
+    report = {}
+    for engine in [e.strip() for e in args.engines.split(",") if e.strip()]:
+        report[engine] = measure_startup(engine, args.startup_timeout)
+        stats = report[engine]
+        fmt = lambda value: f"{value:.2f}s" if value is not None else "-"
+        print(
+            f"{engine:<8}import {fmt(stats['importSeconds'])}  first /health {fmt(stats['firstHealthSeconds'])}  "
+            f"ready {fmt(stats['readySeconds'])}  status {stats['status']}"
+        )
+        for entry in stats["slowestImports"][:5]:
+            print(f"{'':<8}  {entry['cumulativeMs']:>9.1f} ms  {entry['module']}")
+    return report
+
+
+def measure_profile(engine: str, profile: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run `python <server>.py` under a launcher profile and load it over real HTTP"""
+    import httpx
+
+    port = _free_port()
+    env = dict(os.environ, ASSESS_SERVER_PROFILE=profile, **{SERVER_PORT_ENV[engine]: str(port)})
+    if not args.with_cache:
+        env["ASSESS_CACHE_ENABLED"] = "false"
+    if args.workers:
+        env["ASSESS_WORKERS"] = str(args.workers)
+    process = subprocess.Popen(
+        [sys.executable, f"{SERVER_APPS[engine]}.py"], cwd=SERVER_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        started = time.perf_counter()
+        while True:
+            if process.poll() is not None:
+                return {"error": f"server exited with status {process.returncode}"}
+            if time.perf_counter() - started > args.startup_timeout:
+                return {"error": "server did not become ready"}
+            try:
+                if httpx.get(f"{base_url}/health", timeout=1.0).json().get("status") != "warming":
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+
+        requests = generate_requests(args.requests + args.warmup, build_vocabulary(), args.min_symptoms, args.max_symptoms, args.seed)
+
+        async def drive():
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+                await bench_client(client, requests[:args.warmup], args.concurrency)
+                return await bench_client(client, requests[args.warmup:], args.concurrency)
+
+        return asyncio.run(drive())
+    finally:
+        # The dev reloader and the prefork parent both stop their children on SIGTERM
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+
+def run_profiles(args: argparse.Namespace) -> Dict[str, Any]:
+    report: Dict[str, Any] = {}
+    print(f"{'engine':<8}{'profile':<9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>12}")
+    for engine in [e.strip() for e in args.engines.split(",") if e.strip()]:
+        report[engine] = {}
+        for profile in SERVER_PROFILES:
+            stats = measure_profile(engine, profile, args)
+            report[engine][profile] = stats
+            if "error" in stats:
+                print(f"{engine:<8}{profile:<9}{stats['error']}")
+                continue
+            print(
+                f"{engine:<8}{profile:<9}{stats['p50Ms']:>10.3f}{stats['p95Ms']:>10.3f}{stats['p99Ms']:>10.3f}"
+                f"{stats['requestsPerSecond']:>12.0f}"
+            )
+    return report
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Describe every p95 latency or throughput regression beyond tolerance"""
+    regressions = []
+    for engine, result in current["engines"].items():
+        previous = baseline.get("engines", {}).get(engine)
+        if not previous or "error" in result or "error" in previous:
+            continue
+        for mode in ("inProcess", "asgi"):
+            now, before = result[mode], previous[mode]
+            if before["p95Ms"] and now["p95Ms"] > before["p95Ms"] * (1 + tolerance):
+                regressions.append(f"{engine}/{mode} p95 {before['p95Ms']:.3f}ms -> {now['p95Ms']:.3f}ms")
+            if before["requestsPerSecond"] and now["requestsPerSecond"] < before["requestsPerSecond"] * (1 - tolerance):
+                regressions.append(
+                    f"{engine}/{mode} throughput {before['requestsPerSecond']:.0f} -> {now['requestsPerSecond']:.0f} req/s"
+                )
+    return regressions
+
+
+def _print_table(report: Dict[str, Any]) -> None:
+    print(f"{'engine':<8}{'mode':<11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>12}{'RSS MB':>9}")
+    for engine, result in report["engines"].items():
+        if "error" in result:
+            print(f"{engine:<8}skipped: {result['error']}")
+            continue
+        for mode in ("inProcess", "asgi"):
+            stats = result[mode]
+            print(
+                f"{engine:<8}{mode:<11}{stats['p50Ms']:>10.3f}{stats['p95Ms']:>10.3f}{stats['p99Ms']:>10.3f}"
+                f"{stats['requestsPerSecond']:>12.0f}{result['peakRssMb']:>9.0f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the pregnancy risk assessment engines")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="Comma-separated engines to run")
+    parser.add_argument("--requests", type=int, default=2000, help="Measured requests per engine")
+    parser.add_argument("--warmup", type=int, default=100, help="Unmeasured warm-up requests")
+    parser.add_argument("--min-symptoms", type=int, default=1)
+    parser.add_argument("--max-symptoms", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent ASGI clients")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fake-llm-latency", type=float, default=0.0, help="Seconds the fake LLM sleeps per call")
+    parser.add_argument("--with-cache", action="store_true", help="Leave the result cache enabled")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Baseline JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative slowdown before flagging")
+    parser.add_argument("--vectorized", type=int, metavar="RECORDS",
+                        help="Benchmark vectorized batch scoring of the rules engine over RECORDS records instead")
+    parser.add_argument("--parity-sample", type=int, default=20000,
+                        help="Records checked against the scalar path with --vectorized (0 = all)")
+    parser.add_argument("--startup", action="store_true",
+                        help="Report import time, time to first /health and time to ready for each server instead")
+    parser.add_argument("--startup-timeout", type=float, default=300.0, help="Seconds to wait for a server to become ready")
+    parser.add_argument("--profiles", action="store_true",
+                        help="Compare requests/s of each server under the dev and prod launcher profiles instead")
+    parser.add_argument("--workers", type=int, help="ASSESS_WORKERS for --profiles (default: the profile's own)")
+    parser.add_argument("--vector-store", type=int, metavar="CHUNKS",
+                        help="Benchmark exact top-k search of the numpy vector store over CHUNKS random embeddings instead")
+    parser.add_argument("--vector-dim", type=int, default=384, help="Embedding size for --vector-store (MiniLM: 384)")
+    parser.add_argument("--context-modes", action="store_true",
+                        help="Compare the rag engine's synthesis and retrieval context modes instead")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.startup:
+        report = run_startup(args)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        return
+
+    if args.profiles:
+        report = run_profiles(args)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        return
+
+    if args.context_modes:
+        report = run_context_modes(args)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        return
+
+    if args.vector_store:
+        report = run_vector_store(args)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        return
+
+    if args.vectorized:
+        result = run_vectorized(args)
+        print(json.dumps(result, indent=2))
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+        if result["parityMismatches"]:
+            sys.exit(1)
+        return
+
+    if args.worker:
+        print(json.dumps(run_engine(args.worker, args)))
+        return
+
+    report: Dict[str, Any] = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "minSymptoms": args.min_symptoms,
+            "maxSymptoms": args.max_symptoms,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "fakeLlmLatency": args.fake_llm_latency,
+            "withCache": args.with_cache
+        },
+        "engines": {}
+    }
+
+    # One subprocess per engine keeps imports, caches and peak RSS separate
+    passthrough = _worker_args(args)
+    for engine in [e.strip() for e in args.engines.split(",") if e.strip()]:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), *passthrough, "--worker", engine],
+            capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            last_line = (completed.stderr.strip().splitlines() or ["failed"])[-1]
+            report["engines"][engine] = {"error": last_line}
+            continue
+        report["engines"][engine] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    _print_table(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
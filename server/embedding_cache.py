@@ -0,0 +1,177 @@
+"""
+Embedding cache for retrieval queries and symptom phrases
+
+Entries are keyed by embedding model and normalized text (lowercased,
+whitespace collapsed), so "Severe  Headache" and "severe headache" share
+one embedding. The in-memory LRU is optionally backed by an SQLite file
+that survives restarts and is shared by pre-forked workers.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Embeddings kept in memory per model before least recently used ones are evicted
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("RAG_EMBEDDING_CACHE_SIZE", 50000))
+
+# SQLite file backing the in-memory cache; unset keeps embeddings in memory only
+EMBEDDING_CACHE_PATH = os.getenv("RAG_EMBEDDING_CACHE_PATH") or None
+
+EmbedBatch = Callable[[List[str]], Sequence[Sequence[float]]]
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class EmbeddingCache:
+    """Thread-safe LRU of float32 embeddings for one model, with an optional disk store"""
+
+    def __init__(self, model_name: str, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES, path: Optional[str] = None):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pid: Optional[int] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _store(self) -> Optional[sqlite3.Connection]:
+        """The disk store connection, reopened in a forked worker (SQLite connections can't cross a fork)"""
+        if not self.path:
+            return None
+        if self._db_pid == os.getpid():
+            return self._db
+        self._db_pid = os.getpid()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding store {self.path} unavailable, caching in memory only: {e}")
+            self._db = None
+        return self._db
+
+    def _key(self, normalized: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = self._key(normalize_text(text))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+            db = self._store()
+            if db is not None:
+                try:
+                    row = db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                except sqlite3.Error:
+                    row = None
+                if row is not None:
+                    vector = np.frombuffer(row[0], dtype=np.float32)
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                    return vector
+            self.misses += 1
+            return None
+
+    def put(self, text: str, embedding: Sequence[float]) -> np.ndarray:
+        key = self._key(normalize_text(text))
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector.setflags(write=False)
+        with self._lock:
+            self._remember(key, vector)
+            db = self._store()
+            if db is not None:
+                try:
+                    db.execute(
+                        "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", (key, vector.tobytes())
+                    )
+                except sqlite3.Error as e:
+                    logger.warning(f"Could not store embedding: {e}")
+        return vector
+
+    def get_or_embed_many(self, texts: Sequence[str], embed_batch: EmbedBatch) -> List[np.ndarray]:
+        """
+        Embeddings for texts in order. Cached texts are not embedded again and
+        the rest go to the model in a single embed_batch call.
+        """
+        vectors: List[Optional[np.ndarray]] = [self.get(text) for text in texts]
+        # Normalized text -> positions still missing, so duplicates are embedded once
+        missing: Dict[str, List[int]] = {}
+        for position, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(normalize_text(texts[position]), []).append(position)
+        if missing:
+            for text, embedding in zip(missing, embed_batch(list(missing))):
+                vector = self.put(text, embedding)
+                for position in missing[text]:
+                    vectors[position] = vector
+        return vectors
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "model": self.model_name,
+                "size": len(self._entries),
+                "maxEntries": self.max_entries,
+                "persistent": self._store() is not None,
+                "hits": self.hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses,
+                "hitRate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+def compose_embedding(vectors: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Unit-length mean of unit-normalized vectors: a query embedding for a set
+    of phrases built from their individual embeddings
+    """
+    matrix = np.vstack(vectors).astype(np.float32, copy=False)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    mean = (matrix / np.where(norms == 0, 1, norms)).mean(axis=0)
+    norm = np.linalg.norm(mean)
+    return mean / norm if norm else mean
+
+
+# One cache per embedding model
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name: str) -> EmbeddingCache:
+    """Get the singleton embedding cache for a model"""
+    with _caches_lock:
+        if model_name not in _caches:
+            _caches[model_name] = EmbeddingCache(model_name, path=EMBEDDING_CACHE_PATH)
+        return _caches[model_name]
+
+
+def all_embedding_cache_stats() -> Dict[str, Dict[str, Any]]:
+    with _caches_lock:
+        caches = dict(_caches)
+    return {model: cache.stats() for model, cache in caches.items()}
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Single-process gateway hosting every assessment engine
+
+    POST /assess?engine=rules|kb|rag|hedged
+    POST /assess/batch?engine=rules|kb|rag
+    POST /assess/batch/stream?engine=rules|kb|rag
+
+One process serves what hf_server, hf_rag_server and rag_server serve on
+separate ports, sharing one copy of the compiled rules, the request
+models, the result caches and the assessment thread pool.
+
+engine=hedged starts the rule engine and the RAG engine together and
+returns the RAG answer if it arrives within the latency budget
+(?budgetMs=, default GATEWAY_HEDGE_BUDGET_MS), otherwise the rule-engine
+answer. A RAG assessment that misses the budget keeps running and fills
+the RAG result cache, so a repeat of the request gets the RAG answer.
+Hedged RAG calls run on their own GATEWAY_HEDGE_WORKERS threads, so slow
+LLM calls can't fill the pool every other request shares; when those are
+all busy the rule engine answers straight away. The
+X-Assessment-Engine response header names the engine that answered: a
+RAG request the rule engine answered (while RAG warms up or when the LLM
+is unavailable) reports "rules", and the safe default reports "fallback".
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.middleware.cors import CORSMiddleware
+
+import hf_rag_service
+import huggingface_service
+import rag_service
+from assessment_executor import AssessmentExecutor, ExecutorSaturatedError, get_assessment_executor
+from assessment_models import AssessmentRequest, AssessmentResponse
+from batch_api import register_batch_routes, request_to_kwargs
+from embedding_cache import all_embedding_cache_stats
+from launcher import run_server
+from metrics import register_metrics_route
+from profiler import profiled, register_profiling_routes
+from result_cache import all_cache_stats
+
+ASSESS_FUNCTIONS = {
+    "rules": huggingface_service.assess_pregnancy_risk_api,
+    "kb": hf_rag_service.assess_pregnancy_risk_api,
+    "rag": rag_service.assess_pregnancy_risk_api,
+}
+
+BATCH_FUNCTIONS = {
+    "rules": huggingface_service.assess_pregnancy_risk_batch_api,
+    "kb": hf_rag_service.assess_pregnancy_risk_batch_api,
+    "rag": rag_service.assess_pregnancy_risk_batch_api,
+}
+
+# Engines this gateway serves; leaving out rag skips loading the embedding model
+ENABLED_ENGINES = tuple(
+    engine for engine in (e.strip() for e in os.getenv("GATEWAY_ENGINES", "rules,kb,rag").split(","))
+    if engine in ASSESS_FUNCTIONS
+)
+
+# Engine used when a request doesn't name one
+DEFAULT_ENGINE = os.getenv("GATEWAY_DEFAULT_ENGINE", "kb")
+
+# Milliseconds a hedged request waits for the RAG answer before using the rule engine's
+HEDGE_BUDGET_MS = float(os.getenv("GATEWAY_HEDGE_BUDGET_MS", 1500))
+
+# Threads for the RAG side of hedged requests; none of them queue
+HEDGE_WORKERS = int(os.getenv("GATEWAY_HEDGE_WORKERS", 4))
+
+HEDGED = "hedged"
+
+
+def _engine_choices() -> Tuple[str, ...]:
+    return ENABLED_ENGINES + ((HEDGED,) if {"rules", "rag"} <= set(ENABLED_ENGINES) else ())
+
+
+if DEFAULT_ENGINE not in _engine_choices():
+    raise ValueError(
+        f"GATEWAY_DEFAULT_ENGINE {DEFAULT_ENGINE!r} is not enabled (expected one of: {', '.join(_engine_choices())})"
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if "rag" in ENABLED_ENGINES:
+        # Load the model and index in the background; the rag engine uses the rule engine until then
+        rag_service.start_warmup()
+    yield
+
+
+app = FastAPI(
+    title="GraviLog Assessment Gateway",
+    description="Rule-based, knowledge-base and RAG pregnancy risk assessment in one service",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:5000", "http://127.0.0.1:5000"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+def _resolve_engine(engine: Optional[str]) -> str:
+    engine = engine or DEFAULT_ENGINE
+    if engine not in _engine_choices():
+        raise HTTPException(
+            status_code=400, detail=f"Unknown engine {engine!r} (expected one of: {', '.join(_engine_choices())})"
+        )
+    return engine
+
+
+_hedge_executor: Optional[AssessmentExecutor] = None
+
+
+def _get_hedge_executor() -> AssessmentExecutor:
+    global _hedge_executor
+    if _hedge_executor is None:
+        _hedge_executor = AssessmentExecutor(max_workers=HEDGE_WORKERS, max_queue=0)
+    return _hedge_executor
+
+
+def _discard_outcome(task: "asyncio.Future") -> None:
+    # The losing side of a hedge is never awaited; retrieve its exception so it isn't logged as unhandled
+    if not task.cancelled():
+        task.exception()
+
+
+async def _assess_hedged(kwargs: Dict[str, Any], budget_seconds: float) -> Tuple[Dict[str, Any], str]:
+    executor = get_assessment_executor()
+    if not rag_service.rag_service_ready():
+        rag_service.start_warmup()
+        return await executor.run(profiled(ASSESS_FUNCTIONS["rules"]), **kwargs), "rules"
+
+    rules = asyncio.ensure_future(executor.run(profiled(ASSESS_FUNCTIONS["rules"]), **kwargs))
+    rag = asyncio.ensure_future(_get_hedge_executor().run(profiled(ASSESS_FUNCTIONS["rag"]), **kwargs))
+    try:
+        result = await asyncio.wait_for(asyncio.shield(rag), budget_seconds)
+    except Exception:
+        # Late or failed (e.g. every hedge worker busy): the rule engine answers
+        rag.add_done_callback(_discard_outcome)
+        return await rules, "rules"
+    rules.add_done_callback(_discard_outcome)
+    return result, result["engine"]
+
+
+@app.get("/health")
+async def health_check():
+    """
+    Health check endpoint. With the rag engine enabled, reports "warming"
+    while its model and index load and "degraded" if loading failed.
+    """
+    health: Dict[str, Any] = {
+        "status": "healthy",
+        "service": "GraviLog Assessment Gateway",
+        "engines": list(ENABLED_ENGINES),
+        "defaultEngine": DEFAULT_ENGINE,
+    }
+    if "rag" in ENABLED_ENGINES:
+        warmup = rag_service.warmup_status()
+        health["status"] = {"ready": "healthy", "failed": "degraded"}.get(warmup["state"], "warming")
+        health["warmup"] = warmup
+    return health
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Result cache hit/miss statistics for every engine, plus the RAG embedding cache"""
+    return {**all_cache_stats(), "embeddings": all_embedding_cache_stats()}
+
+
+@app.post("/assess", response_model=AssessmentResponse)
+async def assess_risk(
+    request: AssessmentRequest,
+    response: Response,
+    engine: Optional[str] = Query(None, description="rules, kb, rag or hedged"),
+    budgetMs: Optional[float] = Query(None, gt=0, description="Latency budget for engine=hedged")
+):
+    """
+    Assess pregnancy risk with the selected engine
+    """
+    engine = _resolve_engine(engine)
+    kwargs = request_to_kwargs(request)
+    try:
+        if engine == HEDGED:
+            result, engine = await _assess_hedged(kwargs, (budgetMs or HEDGE_BUDGET_MS) / 1000)
+        else:
+            result = await get_assessment_executor().run(profiled(ASSESS_FUNCTIONS[engine]), **kwargs)
+            if engine == "rag":
+                # The rag engine names what answered: itself, the rule engine or the safe default
+                engine = result["engine"]
+
+        response.headers["X-Assessment-Engine"] = engine
+        return AssessmentResponse(**result)
+
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Risk assessment failed: {str(e)}"
+        )
+
+
+register_batch_routes(
+    app, AssessmentRequest, AssessmentResponse,
+    {engine: BATCH_FUNCTIONS[engine] for engine in ENABLED_ENGINES},
+    # Batches aren't hedged; a hedged default batches with the rule engine, its fast path
+    default_engine="rules" if DEFAULT_ENGINE == HEDGED else DEFAULT_ENGINE
+)
+
+register_metrics_route(app)
+register_profiling_routes(app)
+
+
+def preload():
+    """Load every enabled engine before workers are forked"""
+    if "rules" in ENABLED_ENGINES:
+        huggingface_service.get_assessment_service()
+        huggingface_service.get_vectorized_scorer()
+    if "kb" in ENABLED_ENGINES:
+        hf_rag_service.get_hf_rag_service()
+    if "rag" in ENABLED_ENGINES:
+        rag_service.get_rag_service()
+
+
+if __name__ == "__main__":
+    run_server("gateway:app", port=int(os.getenv("GATEWAY_PORT", 8002)), preload=preload)
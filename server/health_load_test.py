@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Load test: /health latency while /assess requests are in flight
+
+Measures /health latency on an idle server, then again while a steady
+number of concurrent /assess requests run. With assessments offloaded to
+the worker pool the two distributions should be close; a blocked event
+loop shows up as /health latency tracking assessment latency.
+
+Usage:
+    python health_load_test.py --url http://localhost:8001 --concurrency 16
+    python health_load_test.py --app hf_rag_server:app --duration 5
+"""
+import argparse
+import asyncio
+import importlib
+import statistics
+import time
+from typing import List
+
+import httpx
+
+SAMPLE_REQUEST = {
+    "symptoms": ["severe headaches", "vision changes", "swelling"],
+    "gestationalWeek": 32,
+    "previousComplications": False
+}
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _summary(label: str, samples: List[float]) -> str:
+    if not samples:
+        return f"{label}: no samples"
+    return (
+        f"{label}: n={len(samples)} "
+        f"p50={statistics.median(samples) * 1000:.2f}ms "
+        f"p95={_percentile(samples, 95) * 1000:.2f}ms "
+        f"p99={_percentile(samples, 99) * 1000:.2f}ms "
+        f"max={max(samples) * 1000:.2f}ms"
+    )
+
+
+async def _probe_health(client: httpx.AsyncClient, duration: float, interval: float) -> List[float]:
+    samples = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def _assess_worker(client: httpx.AsyncClient, stop: asyncio.Event, counts: dict) -> None:
+    while not stop.is_set():
+        response = await client.post("/assess", json=SAMPLE_REQUEST)
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+        if response.status_code == 503:
+            # Saturated: back off as the server asks instead of spinning
+            await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+
+
+async def run_load_test(client: httpx.AsyncClient, concurrency: int, duration: float, interval: float) -> None:
+    idle = await _probe_health(client, duration, interval)
+    print(_summary("/health idle      ", idle))
+
+    stop = asyncio.Event()
+    counts: dict = {}
+    workers = [asyncio.create_task(_assess_worker(client, stop, counts)) for _ in range(concurrency)]
+    await asyncio.sleep(interval)
+    loaded = await _probe_health(client, duration, interval)
+    stop.set()
+    await asyncio.gather(*workers)
+
+    print(_summary("/health under load", loaded))
+    print(f"/assess responses by status: {dict(sorted(counts.items()))}")
+    if idle and loaded:
+        ratio = statistics.median(loaded) / statistics.median(idle)
+        print(f"p50 ratio loaded/idle: {ratio:.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://localhost:8001", help="Base URL of a running server")
+    target.add_argument("--app", help="Run in-process against module:attribute, e.g. hf_server:app")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent /assess requests")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per measurement phase")
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between /health probes")
+    args = parser.parse_args()
+
+    if args.app:
+        module_name, attr = args.app.split(":")
+        transport = httpx.ASGITransport(app=getattr(importlib.import_module(module_name), attr))
+        client = httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60)
+    else:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+
+    async def _run():
+        async with client:
+            await run_load_test(client, args.concurrency, args.duration, args.interval)
+
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
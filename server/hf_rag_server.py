@@ -4,11 +4,15 @@ Hugging Face-based RAG server for pregnancy risk assessment
 Uses knowledge base retrieval without requiring expensive API keys
 """
 import os
-from typing import List, Optional
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import uvicorn
-from hf_rag_service import assess_pregnancy_risk_api
+from hf_rag_service import assess_pregnancy_risk_api, assess_pregnancy_risk_batch_api, get_hf_rag_service
+from assessment_models import AssessmentRequest, AssessmentResponse
+from batch_api import register_batch_routes
+from assessment_executor import ExecutorSaturatedError, get_assessment_executor
+from result_cache import all_cache_stats
+from launcher import run_server
+from metrics import register_metrics_route
+from profiler import profiled, register_profiling_routes
 
 # Create FastAPI app
 app = FastAPI(
@@ -17,31 +21,24 @@ app = FastAPI(
     version="1.0.0"
 )
 
-class AssessmentRequest(BaseModel):
-    symptoms: List[str]
-    gestationalWeek: Optional[int] = None
-    previousComplications: Optional[bool] = None
-    additionalSymptoms: Optional[str] = None
-
-class AssessmentResponse(BaseModel):
-    riskLevel: str
-    confidence: float
-    recommendations: List[str]
-    reasoning: str
-    urgency: str
-
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "GraviLog HF RAG Service"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Result cache hit/miss statistics"""
+    return all_cache_stats()
+
 @app.post("/assess", response_model=AssessmentResponse)
 async def assess_risk(request: AssessmentRequest):
     """
     Assess pregnancy risk using HF RAG-enhanced analysis
     """
     try:
-        result = assess_pregnancy_risk_api(
+        result = await get_assessment_executor().run(
+            profiled(assess_pregnancy_risk_api),
             symptoms=request.symptoms,
             gestational_week=request.gestationalWeek,
             previous_complications=request.previousComplications,
@@ -50,6 +47,8 @@ async def assess_risk(request: AssessmentRequest):
         
         return AssessmentResponse(**result)
         
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(
             status_code=500, 
@@ -67,12 +66,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+register_batch_routes(app, AssessmentRequest, AssessmentResponse, assess_pregnancy_risk_batch_api)
+register_metrics_route(app)
+register_profiling_routes(app)
+
+def preload():
+    """Load and index the knowledge base before workers are forked"""
+    get_hf_rag_service()
+
 if __name__ == "__main__":
-    port = int(os.getenv("HF_RAG_PORT", 8001))
-    uvicorn.run(
-        "hf_rag_server:app",
-        host="0.0.0.0",
-        port=port,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    run_server("hf_rag_server:app", port=int(os.getenv("HF_RAG_PORT", 8001)), preload=preload)
@@ -2,8 +2,12 @@ import os
 import logging
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
+from result_cache import assessment_cache_key, get_result_cache
+from metrics import count_assessment, count_fallback, stage
 import json
 import re
+from section_index import BM25SectionIndex
+from rule_engine import get_rule_set
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,6 +23,8 @@ class RiskAssessmentResult(BaseModel):
 class PregnancyHFRAGService:
     def __init__(self):
         self.knowledge_base = self._load_knowledge_base()
+        self.section_index = self._build_section_index(self.knowledge_base)
+        self.rules = get_rule_set()
         
     def _load_knowledge_base(self) -> str:
         """Load the pregnancy knowledge base"""
@@ -62,29 +68,20 @@ class PregnancyHFRAGService:
         - Breast tenderness
         """
     
+    def _build_section_index(self, knowledge_base: str) -> BM25SectionIndex:
+        """Split the knowledge base into sections and index them once at load time"""
+        sections = [section for section in knowledge_base.split('\n\n') if section.strip()]
+        index = BM25SectionIndex(sections)
+        logger.info(f"Indexed {len(index)} knowledge base sections")
+        return index
+    
     def _retrieve_relevant_info(self, symptoms: List[str], query_context: str) -> str:
-        """Retrieve relevant information from knowledge base based on symptoms"""
-        relevant_sections = []
-        
-        # Convert symptoms to lowercase for matching
-        symptoms_lower = [s.lower() for s in symptoms]
-        
-        # Split knowledge base into sections
-        sections = self.knowledge_base.split('\n\n')
-        
-        for section in sections:
-            section_lower = section.lower()
-            # Check if any symptom appears in this section
-            for symptom in symptoms_lower:
-                if any(word in section_lower for word in symptom.split()):
-                    if section not in relevant_sections:
-                        relevant_sections.append(section)
-                    break
-        
-        return '\n\n'.join(relevant_sections[:5])  # Return top 5 relevant sections
+        """Retrieve the knowledge base sections most relevant to the symptoms"""
+        return '\n\n'.join(self.section_index.top_sections(' '.join(symptoms), top_k=5))
     
     def _assess_with_knowledge(self, symptoms: List[str], gestational_week: Optional[int], 
-                              previous_complications: Optional[bool], additional_info: Optional[str]) -> Dict[str, Any]:
+                              previous_complications: Optional[bool], additional_info: Optional[str],
+                              retrieval_cache: Optional[Dict[tuple, str]] = None) -> Dict[str, Any]:
         """Assess risk using knowledge base retrieval"""
         
         # Retrieve relevant knowledge
@@ -94,44 +91,29 @@ class PregnancyHFRAGService:
         if additional_info:
             query_context += f", Additional: {additional_info}"
         
-        relevant_knowledge = self._retrieve_relevant_info(symptoms, query_context)
+        # Retrieval depends only on the symptoms, so a batch can share it
+        retrieval_key = tuple(symptoms)
+        if retrieval_cache is not None and retrieval_key in retrieval_cache:
+            relevant_knowledge = retrieval_cache[retrieval_key]
+        else:
+            with stage("kb", "retrieval"):
+                relevant_knowledge = self._retrieve_relevant_info(symptoms, query_context)
+            if retrieval_cache is not None:
+                retrieval_cache[retrieval_key] = relevant_knowledge
         
         # Rule-based risk assessment enhanced with retrieved knowledge
         risk_score = 0
         high_risk_indicators = []
         medium_risk_indicators = []
         
-        # High risk symptom patterns
-        high_risk_patterns = [
-            ['bleeding', 'heavy'], ['bleeding', 'cramping'],
-            ['abdominal pain', 'severe'], ['pain', 'severe'],
-            ['headache', 'vision'], ['headache', 'severe', 'blurry'],
-            ['fever', 'chills'], ['fever', 'high'],
-            ['no movement', 'fetal'], ['reduced movement'],
-            ['vision changes', 'headache'], ['swelling', 'severe']
-        ]
-        
-        # Medium risk patterns
-        medium_risk_patterns = [
-            ['vomiting', 'persistent'], ['nausea', 'severe'],
-            ['bleeding', 'spotting'], ['bleeding', 'light'],
-            ['headache', 'persistent'], ['pressure', 'high'],
-            ['movement', 'decreased'], ['contractions']
-        ]
-        
         symptoms_text = ' '.join(symptoms).lower()
         
-        # Check for high risk patterns
-        for pattern in high_risk_patterns:
-            if all(word in symptoms_text for word in pattern):
-                risk_score += 3
-                high_risk_indicators.append(' + '.join(pattern))
-        
-        # Check for medium risk patterns
-        for pattern in medium_risk_patterns:
-            if all(word in symptoms_text for word in pattern):
-                risk_score += 2
-                medium_risk_indicators.append(' + '.join(pattern))
+        # High and medium risk patterns come from the compiled knowledge-base rules
+        with stage("kb", "rules"):
+            evaluation = self.rules.evaluate(symptoms_text, ("high_risk_patterns", "medium_risk_patterns"))
+        risk_score += evaluation.score
+        high_risk_indicators.extend(evaluation.hits["high_risk_patterns"])
+        medium_risk_indicators.extend(evaluation.hits["medium_risk_patterns"])
         
         # Adjust for gestational week
         if gestational_week:
@@ -146,18 +128,15 @@ class PregnancyHFRAGService:
         if previous_complications:
             risk_score += 1
         
-        # Determine risk level
-        if risk_score >= 6:
-            risk_level = "high"
-            urgency = "immediate"
-            confidence = min(0.9, 0.7 + (risk_score - 6) * 0.05)
-        elif risk_score >= 3:
-            risk_level = "moderate"
-            urgency = "within_24_hours"
-            confidence = min(0.8, 0.6 + (risk_score - 3) * 0.05)
+        # Determine risk level from the knowledge-base score bands
+        band = self.rules.band(risk_score)
+        risk_level = band.level
+        urgency = band.urgency
+        if risk_level == "high":
+            confidence = min(0.9, 0.7 + (risk_score - band.min_score) * 0.05)
+        elif risk_level == "moderate":
+            confidence = min(0.8, 0.6 + (risk_score - band.min_score) * 0.05)
         else:
-            risk_level = "low"
-            urgency = "routine"
             confidence = min(0.7, 0.5 + risk_score * 0.1)
         
         return {
@@ -241,17 +220,21 @@ class PregnancyHFRAGService:
     
     def assess_pregnancy_risk(self, symptoms: List[str], gestational_week: Optional[int] = None,
                             previous_complications: Optional[bool] = None,
-                            additional_info: Optional[str] = None) -> RiskAssessmentResult:
+                            additional_info: Optional[str] = None,
+                            retrieval_cache: Optional[Dict[tuple, str]] = None) -> RiskAssessmentResult:
         """Main assessment function using knowledge base retrieval"""
         
         try:
             # Perform knowledge-enhanced assessment
             assessment = self._assess_with_knowledge(symptoms, gestational_week, 
-                                                   previous_complications, additional_info)
+                                                   previous_complications, additional_info,
+                                                   retrieval_cache)
             
             # Generate recommendations and reasoning
-            recommendations = self._generate_recommendations(assessment, gestational_week)
-            reasoning = self._generate_reasoning(assessment, symptoms, gestational_week)
+            with stage("kb", "recommendations"):
+                recommendations = self._generate_recommendations(assessment, gestational_week)
+            with stage("kb", "reasoning"):
+                reasoning = self._generate_reasoning(assessment, symptoms, gestational_week)
             
             return RiskAssessmentResult(
                 riskLevel=assessment['risk_level'],
@@ -263,6 +246,7 @@ class PregnancyHFRAGService:
             
         except Exception as e:
             logger.error(f"Assessment failed: {e}")
+            count_fallback("kb", "safe_default")
             # Fallback to safe assessment
             return RiskAssessmentResult(
                 riskLevel="moderate",
@@ -276,6 +260,40 @@ class PregnancyHFRAGService:
                 urgency="within_24_hours"
             )
 
+    def assess_pregnancy_risk_batch(self, requests: List[Dict[str, Any]]) -> List[RiskAssessmentResult]:
+        """Assess a batch of requests, sharing retrieval and identical assessments"""
+        retrieval_cache: Dict[tuple, str] = {}
+        assessed: Dict[tuple, RiskAssessmentResult] = {}
+        results = []
+        for request in requests:
+            key = (
+                tuple(request.get("symptoms", [])),
+                request.get("gestational_week"),
+                request.get("previous_complications"),
+                request.get("additional_info")
+            )
+            if key not in assessed:
+                assessed[key] = self.assess_pregnancy_risk(**request, retrieval_cache=retrieval_cache)
+            results.append(assessed[key])
+        return results
+
+def _cache_week_bucket(gestational_week: Optional[int]) -> Optional[str]:
+    """
+    Result cache bucket for a gestational week. The rules only compare the
+    week against 12, 20, 28 and 37, so weeks between those thresholds get
+    identical assessments.
+    """
+    if not gestational_week:
+        return None
+    if gestational_week < 12:
+        return "<12"
+    for threshold in (20, 28, 37):
+        if gestational_week < threshold:
+            return f"<{threshold}"
+        if gestational_week == threshold:
+            return f"={threshold}"
+    return ">37"
+
 # Global instance
 _hf_rag_service_instance = None
 
@@ -291,16 +309,51 @@ def assess_pregnancy_risk_api(symptoms: List[str], gestational_week: Optional[in
                             additional_info: Optional[str] = None) -> Dict[str, Any]:
     """API function for pregnancy risk assessment using HF RAG"""
     service = get_hf_rag_service()
-    result = service.assess_pregnancy_risk(symptoms, gestational_week, 
-                                         previous_complications, additional_info)
     
-    return {
-        "riskLevel": result.riskLevel,
-        "confidence": result.confidence,
-        "recommendations": result.recommendations,
-        "reasoning": result.reasoning,
-        "urgency": result.urgency
-    }
+    def assess() -> Dict[str, Any]:
+        count_assessment("kb")
+        with stage("kb", "total"):
+            result = service.assess_pregnancy_risk(symptoms, gestational_week, 
+                                                 previous_complications, additional_info)
+        
+        return {
+            "riskLevel": result.riskLevel,
+            "confidence": result.confidence,
+            "recommendations": result.recommendations,
+            "reasoning": result.reasoning,
+            "urgency": result.urgency
+        }
+    
+    # Patterns are matched on the joined symptoms and can span two of them, so order matters
+    cache_key = assessment_cache_key(symptoms, gestational_week, previous_complications,
+                                     additional_info, _cache_week_bucket, ordered=True)
+    return get_result_cache("kb").get_or_compute(cache_key, assess)
+
+def assess_pregnancy_risk_batch_api(requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """API function for batch pregnancy risk assessment using HF RAG"""
+    service = get_hf_rag_service()
+    
+    def assess_missing(positions: List[int]) -> List[Dict[str, Any]]:
+        count_assessment("kb", len(positions))
+        results = service.assess_pregnancy_risk_batch([requests[p] for p in positions])
+        return [
+            {
+                "riskLevel": result.riskLevel,
+                "confidence": result.confidence,
+                "recommendations": result.recommendations,
+                "reasoning": result.reasoning,
+                "urgency": result.urgency
+            }
+            for result in results
+        ]
+    
+    cache_keys = [
+        assessment_cache_key(request.get("symptoms", []), request.get("gestational_week"),
+                             request.get("previous_complications"), request.get("additional_info"),
+                             _cache_week_bucket, ordered=True)
+        for request in requests
+    ]
+    return get_result_cache("kb").get_or_compute_many(cache_keys, assess_missing)
 
 if __name__ == "__main__":
     # Test the HF RAG service
@@ -1,10 +1,14 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
-import uvicorn
 import os
-from huggingface_service import assess_pregnancy_risk_api
+from huggingface_service import assess_pregnancy_risk_api, assess_pregnancy_risk_batch_api, get_assessment_service, get_vectorized_scorer
+from assessment_models import AssessmentRequest, AssessmentResponse
+from batch_api import register_batch_routes
+from assessment_executor import ExecutorSaturatedError, get_assessment_executor
+from result_cache import all_cache_stats
+from launcher import run_server
+from metrics import register_metrics_route
+from profiler import profiled, register_profiling_routes
 
 app = FastAPI(
     title="GraviLog Hugging Face Assessment Service",
@@ -21,31 +25,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-class AssessmentRequest(BaseModel):
-    symptoms: List[str]
-    gestationalWeek: Optional[int] = None
-    previousComplications: Optional[bool] = None
-    additionalSymptoms: Optional[str] = None
-
-class AssessmentResponse(BaseModel):
-    riskLevel: str
-    confidence: float
-    recommendations: List[str]
-    reasoning: str
-    urgency: str
-
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "GraviLog HF Assessment Service"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Result cache hit/miss statistics"""
+    return all_cache_stats()
+
 @app.post("/assess", response_model=AssessmentResponse)
 async def assess_risk(request: AssessmentRequest):
     """
     Assess pregnancy risk using rule-based analysis
     """
     try:
-        result = assess_pregnancy_risk_api(
+        result = await get_assessment_executor().run(
+            profiled(assess_pregnancy_risk_api),
             symptoms=request.symptoms,
             gestational_week=request.gestationalWeek,
             previous_complications=request.previousComplications,
@@ -54,18 +51,22 @@ async def assess_risk(request: AssessmentRequest):
         
         return AssessmentResponse(**result)
         
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(
             status_code=500, 
             detail=f"Risk assessment failed: {str(e)}"
         )
 
+register_batch_routes(app, AssessmentRequest, AssessmentResponse, assess_pregnancy_risk_batch_api)
+register_metrics_route(app)
+register_profiling_routes(app)
+
+def preload():
+    """Load the knowledge base and compiled rules before workers are forked"""
+    get_assessment_service()
+    get_vectorized_scorer()
+
 if __name__ == "__main__":
-    port = int(os.getenv("HF_PORT", 8000))
-    uvicorn.run(
-        "hf_server:app",
-        host="0.0.0.0",
-        port=port,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    run_server("hf_server:app", port=int(os.getenv("HF_PORT", 8000)), preload=preload)
@@ -3,7 +3,16 @@ import json
 import re
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
+from result_cache import assessment_cache_key, get_result_cache
 import logging
+from symptom_index import SymptomIndex
+from rule_engine import get_rule_set
+from metrics import count_assessment, count_fallback, stage
+
+try:
+    from vectorized_scoring import VectorizedAssessmentScorer
+except ImportError:  # numpy not installed
+    VectorizedAssessmentScorer = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,6 +28,8 @@ class RiskAssessmentResult(BaseModel):
 class PregnancyAssessmentService:
     def __init__(self):
         self.knowledge_base = self._load_knowledge_base()
+        self.symptom_index = self._compile_symptom_index(self.knowledge_base)
+        self.rules = get_rule_set()
         logger.info("Pregnancy assessment service initialized with knowledge base")
     
     def _load_knowledge_base(self) -> Dict[str, Any]:
@@ -112,6 +123,15 @@ class PregnancyAssessmentService:
             }
         }
     
+    def _compile_symptom_index(self, knowledge_base: Dict[str, Any]) -> Dict[str, SymptomIndex]:
+        """Compile each risk category into an inverted index once at load time"""
+        index = {
+            category: SymptomIndex(knowledge_base.get(category, []))
+            for category in ("high_risk_symptoms", "moderate_risk_symptoms", "low_risk_symptoms")
+        }
+        logger.info(f"Compiled symptom index over {sum(len(i) for i in index.values())} knowledge entries")
+        return index
+    
     def _calculate_symptom_risk_score(self, symptoms: List[str]) -> Dict[str, Any]:
         """Calculate risk score based on symptoms"""
         risk_score = 0
@@ -122,33 +142,30 @@ class PregnancyAssessmentService:
         # Normalize symptoms for matching
         normalized_symptoms = [s.lower().strip() for s in symptoms]
         
-        # Check for high risk symptoms
-        for symptom in normalized_symptoms:
-            for high_risk in self.knowledge_base["high_risk_symptoms"]:
-                if self._symptom_matches(symptom, high_risk.lower()):
+        # Look up each symptom in the compiled index for every risk category
+        with stage("rules", "matching"):
+            for symptom in normalized_symptoms:
+                high_risk = self.symptom_index["high_risk_symptoms"].first_match(symptom)
+                if high_risk is not None:
                     risk_score += 3
                     matched_high_risk.append(high_risk)
-                    break
-        
-        # Check for moderate risk symptoms
-        for symptom in normalized_symptoms:
-            for moderate_risk in self.knowledge_base["moderate_risk_symptoms"]:
-                if self._symptom_matches(symptom, moderate_risk.lower()):
+                
+                moderate_risk = self.symptom_index["moderate_risk_symptoms"].first_match(symptom)
+                if moderate_risk is not None:
                     risk_score += 2
                     matched_moderate_risk.append(moderate_risk)
-                    break
-        
-        # Check for low risk symptoms - don't increase risk score for normal symptoms
-        for symptom in normalized_symptoms:
-            for low_risk in self.knowledge_base["low_risk_symptoms"]:
-                if self._symptom_matches(symptom, low_risk.lower()):
+                
+                # Low risk symptoms don't increase the risk score
+                low_risk = self.symptom_index["low_risk_symptoms"].first_match(symptom)
+                if low_risk is not None:
                     matched_low_risk.append(low_risk)
-                    break
         
         # Check for dangerous combinations
-        dangerous_combinations = self._check_symptom_combinations(normalized_symptoms)
-        if dangerous_combinations:
-            risk_score += 5
+        # Newlines keep a term from matching across two symptoms
+        with stage("rules", "combinations"):
+            combinations = self.rules.evaluate('\n'.join(normalized_symptoms), ("dangerous_combinations",))
+        dangerous_combinations = combinations.hits["dangerous_combinations"]
+        risk_score += combinations.score
         
         return {
             "risk_score": risk_score,
@@ -158,53 +175,6 @@ class PregnancyAssessmentService:
             "dangerous_combinations": dangerous_combinations
         }
     
-    def _symptom_matches(self, user_symptom: str, knowledge_symptom: str) -> bool:
-        """Check if user symptom matches knowledge base symptom with severity awareness"""
-        user_lower = user_symptom.lower().strip()
-        knowledge_lower = knowledge_symptom.lower().strip()
-        
-        # Handle severity qualifiers - severe symptoms shouldn't match mild categories
-        if "severe" in knowledge_lower and "severe" not in user_lower and "heavy" not in user_lower:
-            return False
-        if "mild" in knowledge_lower and ("severe" in user_lower or "heavy" in user_lower):
-            return False
-            
-        # Extract core symptom terms without severity modifiers
-        user_clean = user_lower.replace("severe", "").replace("mild", "").replace("heavy", "").strip()
-        knowledge_clean = knowledge_lower.replace("severe", "").replace("mild", "").replace("heavy", "").strip()
-        
-        user_words = set(user_clean.split())
-        knowledge_words = set(knowledge_clean.split())
-        
-        # Check for meaningful overlap (at least 1 significant word match)
-        overlap = user_words.intersection(knowledge_words)
-        return (len(overlap) > 0 and 
-                not all(word in ["and", "or", "the", "a", "an", "in", "on", "at", "with"] for word in overlap)) or \
-               user_clean in knowledge_clean or knowledge_clean in user_clean
-    
-    def _check_symptom_combinations(self, symptoms: List[str]) -> List[str]:
-        """Check for dangerous symptom combinations"""
-        dangerous_combinations = []
-        
-        # Preeclampsia triad
-        preeclampsia_symptoms = ["headache", "vision", "swelling"]
-        if all(any(s in symptom for symptom in symptoms) for s in preeclampsia_symptoms):
-            dangerous_combinations.append("preeclampsia")
-        
-        # Miscarriage indicators
-        miscarriage_symptoms = ["bleeding", "cramping", "pain"]
-        matching_miscarriage = sum(1 for s in miscarriage_symptoms if any(s in symptom for symptom in symptoms))
-        if matching_miscarriage >= 2:
-            dangerous_combinations.append("possible_miscarriage")
-        
-        # Infection indicators
-        infection_symptoms = ["fever", "discharge", "pain"]
-        matching_infection = sum(1 for s in infection_symptoms if any(s in symptom for symptom in symptoms))
-        if matching_infection >= 2:
-            dangerous_combinations.append("possible_infection")
-        
-        return dangerous_combinations
-    
     def _adjust_risk_for_gestational_week(self, base_risk: str, gestational_week: Optional[int]) -> str:
         """Adjust risk based on gestational week"""
         if not gestational_week:
@@ -268,20 +238,22 @@ class PregnancyAssessmentService:
                 urgency = "within_week"
             
             # Generate recommendations
-            recommendations = self._generate_recommendations(
-                final_risk, 
-                risk_analysis, 
-                gestational_week, 
-                previous_complications
-            )
+            with stage("rules", "recommendations"):
+                recommendations = self._generate_recommendations(
+                    final_risk, 
+                    risk_analysis, 
+                    gestational_week, 
+                    previous_complications
+                )
             
             # Generate reasoning
-            reasoning = self._generate_reasoning(
-                risk_analysis, 
-                final_risk, 
-                gestational_week, 
-                symptoms
-            )
+            with stage("rules", "reasoning"):
+                reasoning = self._generate_reasoning(
+                    risk_analysis, 
+                    final_risk, 
+                    gestational_week, 
+                    symptoms
+                )
             
             return RiskAssessmentResult(
                 riskLevel=final_risk,
@@ -293,6 +265,7 @@ class PregnancyAssessmentService:
             
         except Exception as e:
             logger.error(f"Risk assessment failed: {str(e)}")
+            count_fallback("rules", "safe_default")
             # Safe fallback
             return RiskAssessmentResult(
                 riskLevel="moderate",
@@ -306,6 +279,24 @@ class PregnancyAssessmentService:
                 urgency="within_24_hours"
             )
     
+    def assess_pregnancy_risk_batch(self, requests: List[Dict[str, Any]]) -> List[RiskAssessmentResult]:
+        """
+        Assess a batch of requests, evaluating identical requests only once
+        """
+        assessed: Dict[tuple, RiskAssessmentResult] = {}
+        results = []
+        for request in requests:
+            key = (
+                tuple(s.lower().strip() for s in request.get("symptoms", [])),
+                request.get("gestational_week"),
+                request.get("previous_complications"),
+                request.get("additional_info")
+            )
+            if key not in assessed:
+                assessed[key] = self.assess_pregnancy_risk(**request)
+            results.append(assessed[key])
+        return results
+    
     def _generate_recommendations(
         self, 
         risk_level: str, 
@@ -398,6 +389,17 @@ class PregnancyAssessmentService:
         
         return " ".join(reasoning_parts)
 
+def _cache_week_bucket(gestational_week: Optional[int]) -> Optional[Any]:
+    """
+    Result cache bucket for a gestational week. Weeks 13-27 get identical
+    assessments; other weeks are adjusted for and quoted in the reasoning.
+    """
+    if not gestational_week:
+        return None
+    if 12 < gestational_week < 28:
+        return "second_trimester"
+    return gestational_week
+
 # Global instance
 _assessment_service_instance = None
 
@@ -408,6 +410,17 @@ def get_assessment_service() -> PregnancyAssessmentService:
         _assessment_service_instance = PregnancyAssessmentService()
     return _assessment_service_instance
 
+_vectorized_scorer_instance = None
+
+def get_vectorized_scorer() -> Optional["VectorizedAssessmentScorer"]:
+    """Get the singleton batch scorer, or None when numpy is unavailable"""
+    global _vectorized_scorer_instance
+    if VectorizedAssessmentScorer is None:
+        return None
+    if _vectorized_scorer_instance is None:
+        _vectorized_scorer_instance = VectorizedAssessmentScorer(get_assessment_service())
+    return _vectorized_scorer_instance
+
 def assess_pregnancy_risk_api(
     symptoms: List[str],
     gestational_week: Optional[int] = None,
@@ -420,23 +433,33 @@ def assess_pregnancy_risk_api(
     """
     try:
         service = get_assessment_service()
-        result = service.assess_pregnancy_risk(
-            symptoms=symptoms,
-            gestational_week=gestational_week,
-            previous_complications=previous_complications,
-            additional_info=additional_info
-        )
         
-        return {
-            "riskLevel": result.riskLevel,
-            "confidence": result.confidence,
-            "recommendations": result.recommendations,
-            "reasoning": result.reasoning,
-            "urgency": result.urgency
-        }
+        def assess() -> Dict[str, Any]:
+            count_assessment("rules")
+            with stage("rules", "total"):
+                result = service.assess_pregnancy_risk(
+                    symptoms=symptoms,
+                    gestational_week=gestational_week,
+                    previous_complications=previous_complications,
+                    additional_info=additional_info
+                )
+            
+            return {
+                "riskLevel": result.riskLevel,
+                "confidence": result.confidence,
+                "recommendations": result.recommendations,
+                "reasoning": result.reasoning,
+                "urgency": result.urgency
+            }
+        
+        cache_key = assessment_cache_key(
+            symptoms, gestational_week, previous_complications, additional_info, _cache_week_bucket
+        )
+        return get_result_cache("rules").get_or_compute(cache_key, assess)
         
     except Exception as e:
         logger.error(f"API assessment failed: {str(e)}")
+        count_fallback("rules", "api_error")
         # Return safe fallback
         return {
             "riskLevel": "moderate",
@@ -450,6 +473,43 @@ def assess_pregnancy_risk_api(
             "urgency": "within_24_hours"
         }
 
+def assess_pregnancy_risk_batch_api(requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    API function for batch pregnancy risk assessment
+    Each request holds assess_pregnancy_risk_api keyword arguments; results keep request order
+    """
+    service = get_assessment_service()
+    scorer = get_vectorized_scorer()
+    
+    def assess_missing(positions: List[int]) -> List[Dict[str, Any]]:
+        count_assessment("rules", len(positions))
+        if scorer is not None:
+            with stage("rules", "vectorized_batch"):
+                return scorer.assess([requests[p] for p in positions])
+        results = service.assess_pregnancy_risk_batch([requests[p] for p in positions])
+        return [
+            {
+                "riskLevel": result.riskLevel,
+                "confidence": result.confidence,
+                "recommendations": result.recommendations,
+                "reasoning": result.reasoning,
+                "urgency": result.urgency
+            }
+            for result in results
+        ]
+    
+    cache_keys = [
+        assessment_cache_key(
+            request.get("symptoms", []),
+            request.get("gestational_week"),
+            request.get("previous_complications"),
+            request.get("additional_info"),
+            _cache_week_bucket
+        )
+        for request in requests
+    ]
+    return get_result_cache("rules").get_or_compute_many(cache_keys, assess_missing)
+
 if __name__ == "__main__":
     # Test the service
     try:
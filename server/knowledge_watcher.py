@@ -0,0 +1,80 @@
+"""
+Polling file watcher for the knowledge base directory
+"""
+import logging
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds between directory scans
+DEFAULT_POLL_INTERVAL = float(os.getenv("RAG_WATCH_INTERVAL", 2.0))
+
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+def snapshot_directory(path: str) -> Snapshot:
+    """Map each visible file in the directory to its (mtime_ns, size)"""
+    snapshot = {}
+    try:
+        for entry in os.scandir(path):
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            stat = entry.stat()
+            snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        pass
+    return snapshot
+
+
+class KnowledgeBaseWatcher:
+    """
+    Watches a directory from a daemon thread and calls on_change once the
+    directory has stopped changing for one poll interval, so an editor
+    writing a file in several steps triggers a single reload. The thread
+    does not survive fork, so only the process that started it watches.
+    """
+
+    def __init__(self, path: str, on_change: Callable[[], None], interval: Optional[float] = None):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval or DEFAULT_POLL_INTERVAL
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="knowledge-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Watching {self.path} for knowledge base changes every {self.interval}s")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
+
+    def _run(self) -> None:
+        applied = snapshot_directory(self.path)
+        pending: Optional[Snapshot] = None
+
+        while not self._stop.wait(self.interval):
+            current = snapshot_directory(self.path)
+            if current == applied:
+                pending = None
+                continue
+            if current != pending:
+                # Still changing; wait for it to settle
+                pending = current
+                continue
+
+            try:
+                self.on_change()
+            except Exception as e:
+                # Keep serving the previous index; the next edit retries
+                logger.error(f"Knowledge base reload failed: {e}")
+            applied = current
+            pending = None
+
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Shared launcher for the assessment servers
+
+ASSESS_SERVER_PROFILE selects how `python <server>.py` runs:
+
+- dev (default): one process with auto-reload, as before
+- prod: no file watcher; ASSESS_WORKERS pre-forked workers (default: one
+  per CPU); uvloop and httptools when installed; access log off; tuned
+  keep-alive and listen backlog; graceful shutdown; request bodies capped
+  at ASSESS_MAX_REQUEST_BYTES
+
+Usage:
+    ASSESS_SERVER_PROFILE=prod python hf_rag_server.py
+"""
+import importlib.util
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+import uvicorn
+from uvicorn.importer import import_from_string
+
+from prefork import SHUTDOWN_TIMEOUT, serve_prefork
+
+logger = logging.getLogger(__name__)
+
+SERVER_PROFILE = os.getenv("ASSESS_SERVER_PROFILE", "dev")
+
+# Largest request body accepted in the prod profile; a full batch is well under this
+MAX_REQUEST_BYTES = int(os.getenv("ASSESS_MAX_REQUEST_BYTES", 4 * 1024 * 1024))
+
+
+@dataclass(frozen=True)
+class ServerProfile:
+    name: str
+    workers: int
+    reload: bool
+    loop: str  # uvicorn event loop implementation
+    http: str  # uvicorn HTTP protocol implementation
+    access_log: bool
+    timeout_keep_alive: int
+    backlog: int
+    timeout_graceful_shutdown: Optional[float]
+    max_request_bytes: Optional[int]  # None leaves request bodies unbounded
+    limit_concurrency: Optional[int] = None  # connections beyond this get 503
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def get_profile(name: Optional[str] = None) -> ServerProfile:
+    """Server settings for the named profile (ASSESS_SERVER_PROFILE by default)"""
+    name = (name or SERVER_PROFILE).lower()
+    if name == "dev":
+        workers = int(os.getenv("ASSESS_WORKERS", 1))
+        return ServerProfile(
+            name="dev",
+            workers=workers,
+            reload=workers == 1,  # the reloader cannot supervise pre-forked workers
+            loop="asyncio",
+            http="h11",
+            access_log=True,
+            timeout_keep_alive=5,
+            backlog=2048,
+            timeout_graceful_shutdown=None,
+            max_request_bytes=None
+        )
+    if name == "prod":
+        limit_concurrency = os.getenv("ASSESS_LIMIT_CONCURRENCY")
+        return ServerProfile(
+            name="prod",
+            workers=int(os.getenv("ASSESS_WORKERS", os.cpu_count() or 1)),
+            reload=False,
+            loop="uvloop" if _installed("uvloop") else "asyncio",
+            http="httptools" if _installed("httptools") else "h11",
+            access_log=False,
+            # Longer than the Node proxy's idle sockets so uvicorn doesn't close them mid-request
+            timeout_keep_alive=int(os.getenv("ASSESS_KEEP_ALIVE", 75)),
+            backlog=int(os.getenv("ASSESS_BACKLOG", 4096)),
+            timeout_graceful_shutdown=SHUTDOWN_TIMEOUT,
+            max_request_bytes=MAX_REQUEST_BYTES,
+            limit_concurrency=int(limit_concurrency) if limit_concurrency else None
+        )
+    raise ValueError(f"Unknown server profile {name!r} (expected 'dev' or 'prod')")
+
+
+class RequestSizeLimit:
+    """
+    ASGI middleware that answers 413 to request bodies over max_bytes.
+    Bodies without a Content-Length are read up to the limit before the
+    app sees them, so an oversized chunked upload is never buffered whole.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def _reject(self, send) -> None:
+        body = b'{"detail":"Request body too large (maximum %d bytes)"}' % self.max_bytes
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        for header, value in scope["headers"]:
+            if header == b"content-length":
+                try:
+                    length = int(value)
+                except ValueError:
+                    break
+                if length > self.max_bytes:
+                    return await self._reject(send)
+                return await self.app(scope, receive, send)
+
+        # No declared length: collect the body ourselves, then replay it
+        messages = []
+        size = 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            size += len(message.get("body", b""))
+            if size > self.max_bytes:
+                return await self._reject(send)
+            if not message.get("more_body", False):
+                break
+
+        async def replay():
+            return messages.pop(0) if messages else await receive()
+
+        return await self.app(scope, replay, send)
+
+
+def server_options(profile: ServerProfile) -> Dict[str, Any]:
+    """uvicorn.Config arguments for a profile (besides app, host, port and workers)"""
+    options: Dict[str, Any] = {
+        "loop": profile.loop,
+        "http": profile.http,
+        "access_log": profile.access_log,
+        "timeout_keep_alive": profile.timeout_keep_alive,
+        "backlog": profile.backlog,
+    }
+    if profile.timeout_graceful_shutdown is not None:
+        options["timeout_graceful_shutdown"] = profile.timeout_graceful_shutdown
+    if profile.limit_concurrency is not None:
+        options["limit_concurrency"] = profile.limit_concurrency
+    return options
+
+
+def run_server(
+    app: str,
+    port: int,
+    preload: Optional[Callable[[], None]] = None,
+    host: str = "0.0.0.0",
+    profile: Optional[ServerProfile] = None,
+    log_level: str = "info"
+) -> None:
+    """Serve an app given as an import string ("hf_server:app") with a server profile"""
+    profile = profile or get_profile()
+    options = server_options(profile)
+    logger.info(
+        f"Serving {app} with the {profile.name} profile: {profile.workers} worker(s), "
+        f"loop={profile.loop}, http={profile.http}, reload={profile.reload}"
+    )
+
+    if profile.reload:
+        uvicorn.run(app, host=host, port=port, reload=True, log_level=log_level, **options)
+        return
+
+    application = import_from_string(app)
+    if profile.max_request_bytes is not None:
+        application = RequestSizeLimit(application, profile.max_request_bytes)
+
+    if profile.workers > 1:
+        options.pop("backlog")
+        serve_prefork(
+            application, host=host, port=port, workers=profile.workers, preload=preload,
+            log_level=log_level, backlog=profile.backlog, server_options=options
+        )
+    else:
+        if preload is not None:
+            preload()
+        uvicorn.run(application, host=host, port=port, log_level=log_level, **options)
@@ -0,0 +1,324 @@
+"""
+Pooled async client for the Hugging Face text-generation inference endpoint
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+from typing import Any, AsyncIterator, Callable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Seconds a completion may take end to end, including queueing and retries
+DEFAULT_DEADLINE = float(os.getenv("RAG_LLM_DEADLINE", 20.0))
+
+# Completions in flight at once; further calls wait for a slot within their deadline
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("RAG_LLM_MAX_CONCURRENCY", 8))
+
+# Retries after the first attempt for timeouts, connection errors, 429 and 5xx
+DEFAULT_MAX_RETRIES = int(os.getenv("RAG_LLM_MAX_RETRIES", 2))
+
+# Keep-alive connections held open to the endpoint
+DEFAULT_POOL_SIZE = int(os.getenv("RAG_LLM_POOL_SIZE", 16))
+
+DEFAULT_MAX_NEW_TOKENS = int(os.getenv("RAG_LLM_MAX_NEW_TOKENS", 512))
+
+_RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """The inference endpoint could not produce a completion"""
+
+
+class LLMDeadlineExceeded(LLMError):
+    """The completion did not finish within its deadline"""
+
+
+class _LoopThread:
+    """Event loop on a daemon thread that owns the client's connections"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="llm-client", daemon=True)
+        self._thread.start()
+
+    def submit(self, coro) -> "asyncio.Future[Any]":
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+class InferenceClient:
+    """
+    Calls a text-generation endpoint over a shared keep-alive connection
+    pool, with a per-request deadline, bounded concurrency and retries with
+    jittered exponential backoff.
+
+    All network I/O runs on one background event loop, so the client can be
+    used from worker threads (complete) and from any event loop (acomplete)
+    while sharing the same pool.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        token: Optional[str] = None,
+        deadline: float = DEFAULT_DEADLINE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0
+    ):
+        self.api_url = api_url
+        self.token = token
+        self.deadline = deadline
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.max_new_tokens = max_new_tokens
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._runner = _LoopThread()
+        self._runner_pid = os.getpid()
+        self._runner_lock = threading.Lock()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _submit(self, coro) -> "asyncio.Future[Any]":
+        # A forked worker inherits the loop object but not its thread or connections
+        if self._runner_pid != os.getpid():
+            with self._runner_lock:
+                if self._runner_pid != os.getpid():
+                    self._runner = _LoopThread()
+                    self._client = None
+                    self._slots = None
+                    self._runner_pid = os.getpid()
+        return self._runner.submit(coro)
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        # Created lazily so they bind to the background loop
+        if self._client is None:
+            headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+            self._client = httpx.AsyncClient(
+                headers=headers,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                    keepalive_expiry=60.0
+                ),
+                timeout=httpx.Timeout(self.deadline, connect=min(5.0, self.deadline))
+            )
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def _payload(self, prompt: str, **parameters) -> dict:
+        return {
+            "inputs": prompt,
+            "parameters": {
+                "max_new_tokens": self.max_new_tokens,
+                "return_full_text": False,
+                **parameters
+            }
+        }
+
+    @staticmethod
+    def _parse_generation(data: Any) -> str:
+        if isinstance(data, list) and data:
+            data = data[0]
+        if isinstance(data, dict) and "generated_text" in data:
+            return data["generated_text"]
+        raise LLMError(f"Unexpected inference response: {str(data)[:200]}")
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter: spreads retries from concurrent callers
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _complete(self, prompt: str, deadline: float, **parameters) -> str:
+        client = self._ensure_client()
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + deadline
+
+        def remaining() -> float:
+            left = expires_at - loop.time()
+            if left <= 0:
+                raise LLMDeadlineExceeded(f"LLM deadline of {deadline:.1f}s exceeded")
+            return left
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), remaining())
+        except asyncio.TimeoutError:
+            raise LLMDeadlineExceeded(f"No LLM slot free within {deadline:.1f}s")
+
+        try:
+            last_error: Optional[str] = None
+            for attempt in range(self.max_retries + 1):
+                response = None
+                try:
+                    response = await asyncio.wait_for(
+                        client.post(self.api_url, json=self._payload(prompt, **parameters)),
+                        remaining()
+                    )
+                except asyncio.TimeoutError:
+                    raise LLMDeadlineExceeded(f"LLM deadline of {deadline:.1f}s exceeded")
+                except httpx.TransportError as e:
+                    last_error = f"{type(e).__name__}: {e}"
+                else:
+                    if response.status_code == 200:
+                        return self._parse_generation(response.json())
+                    last_error = f"HTTP {response.status_code}: {response.text[:200]}"
+                    if response.status_code not in _RETRYABLE_STATUS:
+                        raise LLMError(last_error)
+
+                if attempt == self.max_retries:
+                    break
+                delay = self._backoff(attempt, response)
+                if delay >= remaining():
+                    raise LLMDeadlineExceeded(f"LLM deadline would pass before retry ({last_error})")
+                logger.warning(f"LLM attempt {attempt + 1} failed ({last_error}); retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+            raise LLMError(f"LLM failed after {self.max_retries + 1} attempts: {last_error}")
+        finally:
+            self._slots.release()
+
+    async def _stream(self, prompt: str, deadline: float, emit, **parameters) -> None:
+        """
+        Stream tokens to emit(text). Failures before the first token are
+        retried like _complete; once tokens have been emitted they are not.
+        If emit returns True the stream is closed, which ends generation.
+        """
+        client = self._ensure_client()
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + deadline
+
+        def remaining() -> float:
+            left = expires_at - loop.time()
+            if left <= 0:
+                raise LLMDeadlineExceeded(f"LLM deadline of {deadline:.1f}s exceeded")
+            return left
+
+        async def read_tokens(response: httpx.Response) -> None:
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if not data or data == "[DONE]":
+                    continue
+                event = json.loads(data)
+                token = event.get("token") or {}
+                if token.get("text") and not token.get("special") and emit(token["text"]):
+                    return
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), remaining())
+        except asyncio.TimeoutError:
+            raise LLMDeadlineExceeded(f"No LLM slot free within {deadline:.1f}s")
+
+        try:
+            last_error: Optional[str] = None
+            for attempt in range(self.max_retries + 1):
+                request = client.build_request("POST", self.api_url, json={**self._payload(prompt, **parameters), "stream": True})
+                response = None
+                try:
+                    response = await asyncio.wait_for(client.send(request, stream=True), remaining())
+                except asyncio.TimeoutError:
+                    raise LLMDeadlineExceeded(f"LLM deadline of {deadline:.1f}s exceeded")
+                except httpx.TransportError as e:
+                    last_error = f"{type(e).__name__}: {e}"
+                else:
+                    try:
+                        if response.status_code == 200:
+                            try:
+                                await asyncio.wait_for(read_tokens(response), remaining())
+                            except asyncio.TimeoutError:
+                                raise LLMDeadlineExceeded(f"LLM deadline of {deadline:.1f}s exceeded")
+                            except (httpx.TransportError, json.JSONDecodeError) as e:
+                                raise LLMError(f"LLM stream interrupted: {e}")
+                            return
+                        await response.aread()
+                        last_error = f"HTTP {response.status_code}: {response.text[:200]}"
+                    finally:
+                        await response.aclose()
+                    if response.status_code not in _RETRYABLE_STATUS:
+                        raise LLMError(last_error)
+
+                if attempt == self.max_retries:
+                    break
+                delay = self._backoff(attempt, response)
+                if delay >= remaining():
+                    raise LLMDeadlineExceeded(f"LLM deadline would pass before retry ({last_error})")
+                logger.warning(f"LLM stream attempt {attempt + 1} failed ({last_error}); retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+            raise LLMError(f"LLM failed after {self.max_retries + 1} attempts: {last_error}")
+        finally:
+            self._slots.release()
+
+    async def astream(self, prompt: str, deadline: Optional[float] = None, **parameters) -> AsyncIterator[str]:
+        """Yield generated text chunks as they arrive, usable from any event loop"""
+        consumer_loop = asyncio.get_running_loop()
+        queue: "asyncio.Queue[Any]" = asyncio.Queue()
+        done = object()
+
+        def emit(text: str) -> None:
+            consumer_loop.call_soon_threadsafe(queue.put_nowait, text)
+
+        future = self._submit(self._stream(prompt, deadline or self.deadline, emit, **parameters))
+        future.add_done_callback(lambda _: consumer_loop.call_soon_threadsafe(queue.put_nowait, done))
+
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                yield item
+            # Surface any error raised by the producer
+            future.result()
+        finally:
+            if not future.done():
+                future.cancel()
+
+    def complete(self, prompt: str, deadline: Optional[float] = None, **parameters) -> str:
+        """Blocking completion, safe to call from any thread"""
+        future = self._submit(self._complete(prompt, deadline or self.deadline, **parameters))
+        return future.result()
+
+    def complete_until(
+        self,
+        prompt: str,
+        is_complete: Callable[[str], bool],
+        deadline: Optional[float] = None,
+        **parameters
+    ) -> str:
+        """
+        Blocking completion that streams and stops generating as soon as
+        is_complete(chunk) returns True, e.g. JsonObjectScanner.feed
+        """
+        chunks = []
+
+        def emit(text: str) -> bool:
+            chunks.append(text)
+            return is_complete(text)
+
+        self._submit(self._stream(prompt, deadline or self.deadline, emit, **parameters)).result()
+        return "".join(chunks)
+
+    async def acomplete(self, prompt: str, deadline: Optional[float] = None, **parameters) -> str:
+        """Awaitable completion, usable from any event loop"""
+        future = self._submit(self._complete(prompt, deadline or self.deadline, **parameters))
+        return await asyncio.wrap_future(future)
+
+    def close(self) -> None:
+        if self._client is not None and self._runner_pid == os.getpid():
+            self._submit(self._client.aclose()).result(timeout=5)
+            self._client = None
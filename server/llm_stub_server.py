@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Hugging Face inference endpoint
+
+Answers text-generation requests with a canned assessment after a
+configurable delay and fails a configurable fraction of them, so the RAG
+service's LLM client can be exercised offline against slow and flaky
+inference.
+
+Usage:
+    STUB_LATENCY=2 STUB_FAILURE_RATE=0.3 python llm_stub_server.py
+    HF_API_URL=http://localhost:8090/models/zephyr python rag_server.py
+"""
+import asyncio
+import json
+import os
+import random
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Mean seconds before answering, and the +/- spread around it
+STUB_LATENCY = float(os.getenv("STUB_LATENCY", 0.5))
+STUB_LATENCY_JITTER = float(os.getenv("STUB_LATENCY_JITTER", 0.2))
+
+# Fraction of requests answered with STUB_FAILURE_STATUS instead of text
+STUB_FAILURE_RATE = float(os.getenv("STUB_FAILURE_RATE", 0.0))
+STUB_FAILURE_STATUS = int(os.getenv("STUB_FAILURE_STATUS", 503))
+
+# Requests failed outright before STUB_FAILURE_RATE applies, e.g. to exercise retries
+STUB_FAIL_FIRST = int(os.getenv("STUB_FAIL_FIRST", 0))
+
+# Seconds between tokens when the caller asks for a stream
+STUB_TOKEN_DELAY = float(os.getenv("STUB_TOKEN_DELAY", 0.02))
+
+CANNED_ASSESSMENT = {
+    "riskLevel": "moderate",
+    "confidence": 0.7,
+    "recommendations": [
+        "Contact your healthcare provider within 24 hours",
+        "Monitor symptoms closely and keep a symptom diary"
+    ],
+    "reasoning": "Stub inference response for local testing.",
+    "urgency": "within_24_hours"
+}
+
+app = FastAPI(title="GraviLog LLM Stub", description="Simulated text-generation endpoint")
+
+# Generation requests received, and how many were being answered at once
+stats = {"requests": 0, "inFlight": 0, "peakInFlight": 0}
+
+
+def reset_stats() -> None:
+    stats.update(requests=0, inFlight=0, peakInFlight=0)
+
+
+@app.get("/health")
+async def health_check():
+    """Health check endpoint"""
+    return {"status": "healthy", "service": "GraviLog LLM Stub"}
+
+
+@app.get("/stats")
+async def get_stats():
+    """Request counts, for checking a client's retries and concurrency limit"""
+    return stats
+
+
+@app.post("/models/{model:path}")
+async def generate(model: str, request: Request):
+    """Simulated Hugging Face text-generation call"""
+    payload = await request.json()
+    stats["requests"] += 1
+    number = stats["requests"]
+    stats["inFlight"] += 1
+    stats["peakInFlight"] = max(stats["peakInFlight"], stats["inFlight"])
+    try:
+        await asyncio.sleep(max(0.0, random.uniform(STUB_LATENCY - STUB_LATENCY_JITTER, STUB_LATENCY + STUB_LATENCY_JITTER)))
+    finally:
+        stats["inFlight"] -= 1
+    if number <= STUB_FAIL_FIRST or random.random() < STUB_FAILURE_RATE:
+        return JSONResponse(
+            status_code=STUB_FAILURE_STATUS,
+            content={"error": f"Model {model} is currently loading", "estimated_time": 1.0}
+        )
+    text = json.dumps(CANNED_ASSESSMENT)
+    if payload.get("stream"):
+        return StreamingResponse(_stream_tokens(text), media_type="text/event-stream")
+    return [{"generated_text": text}]
+
+
+async def _stream_tokens(text: str):
+    """Emit text in text-generation-inference server-sent event format"""
+    tokens = [text[i:i + 8] for i in range(0, len(text), 8)]
+    for position, token in enumerate(tokens):
+        await asyncio.sleep(STUB_TOKEN_DELAY)
+        last = position == len(tokens) - 1
+        event = {
+            "token": {"id": position, "text": token, "special": False},
+            "generated_text": text if last else None
+        }
+        yield f"data: {json.dumps(event)}\n\n"
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="127.0.0.1", port=int(os.getenv("STUB_PORT", 8090)), log_level="info")
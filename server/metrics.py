@@ -0,0 +1,188 @@
+"""
+Assessment metrics in the Prometheus text exposition format
+
+Set ASSESS_METRICS_ENABLED=true to record per-stage latency histograms and
+engine/fallback counters and to serve them on GET /metrics together with
+the result and embedding cache counters. While disabled, stage() returns
+a shared no-op context manager and the count_* functions return
+immediately, so instrumented code pays one function call per stage.
+
+Metrics are per process: with pre-forked workers each scrape reads the
+worker that accepted it.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+
+METRICS_ENABLED = os.getenv("ASSESS_METRICS_ENABLED", "false").lower() == "true"
+
+# Histogram bucket upper bounds in seconds, from rule-engine microseconds to LLM seconds
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = labels + ((extra,) if extra else ())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return "+Inf" if value == float("inf") else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_format_labels(labels)} {_format_value(value)}" for labels, value in values)
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (+Inf last), sum]
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][position] += 1
+            series[1][0] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((labels, (list(counts), total[0])) for labels, (counts, total) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "assessment_stage_seconds", "Time spent in each stage of an assessment, by engine and stage"
+)
+ASSESSMENTS = Counter(
+    "assessments_total", "Assessments computed (not served from the result cache), by engine"
+)
+FALLBACKS = Counter(
+    "assessment_fallbacks_total", "Assessments that used a fallback path, by engine and kind"
+)
+
+
+class _Stage:
+    __slots__ = ("engine", "name", "started")
+
+    def __init__(self, engine: str, name: str):
+        self.engine = engine
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        STAGE_SECONDS.observe(time.perf_counter() - self.started, engine=self.engine, stage=self.name)
+        return False
+
+
+_NO_STAGE = nullcontext()
+
+
+def stage(engine: str, name: str):
+    """Context manager timing one stage of an assessment into assessment_stage_seconds"""
+    if not METRICS_ENABLED:
+        return _NO_STAGE
+    return _Stage(engine, name)
+
+
+def count_assessment(engine: str, count: int = 1) -> None:
+    if METRICS_ENABLED:
+        ASSESSMENTS.inc(count, engine=engine)
+
+
+def count_fallback(engine: str, kind: str) -> None:
+    """Record a fallback, e.g. kind="rule_engine" when the LLM was unavailable"""
+    if METRICS_ENABLED:
+        FALLBACKS.inc(engine=engine, kind=kind)
+
+
+def _cache_lines() -> List[str]:
+    from embedding_cache import all_embedding_cache_stats
+    from result_cache import all_cache_stats
+
+    caches = [(("cache", "result"), ("engine", engine), stats) for engine, stats in all_cache_stats().items()]
+    caches += [(("cache", "embedding"), ("engine", model), stats) for model, stats in all_embedding_cache_stats().items()]
+    lines = []
+    for metric, fields, help_text in (
+        ("assessment_cache_hits_total", ("hits", "diskHits"), "Cache lookups that found an entry"),
+        ("assessment_cache_misses_total", ("misses",), "Cache lookups that missed"),
+        ("assessment_cache_evictions_total", ("evictions",), "Entries evicted to stay within the size limit"),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        lines += [
+            f"{metric}{_format_labels((kind, engine))} {sum(stats.get(field, 0) for field in fields)}"
+            for kind, engine, stats in caches
+        ]
+    lines += ["# HELP assessment_cache_entries Entries currently cached", "# TYPE assessment_cache_entries gauge"]
+    lines += [f"assessment_cache_entries{_format_labels((kind, engine))} {stats['size']}" for kind, engine, stats in caches]
+    return lines
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in (STAGE_SECONDS, ASSESSMENTS, FALLBACKS):
+        lines.extend(metric.render())
+    lines.extend(_cache_lines())
+    return "\n".join(lines) + "\n"
+
+
+def register_metrics_route(app: FastAPI) -> None:
+    """Add GET /metrics to an assessment app"""
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        """Prometheus text exposition of the assessment metrics"""
+        if not METRICS_ENABLED:
+            raise HTTPException(status_code=404, detail="Metrics are disabled (set ASSESS_METRICS_ENABLED=true)")
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
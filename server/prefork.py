@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Pre-fork multi-worker mode for the assessment servers
+
+The parent process imports the app and runs its preload hook, which
+loads the knowledge base, compiled rules and (for the RAG service) the
+embedding model and vector index. It then freezes the garbage collector
+and forks the workers. Workers share those pages copy-on-write and only
+read them, so adding workers adds per-request memory rather than another
+copy of the model and index. All workers accept on one listening socket
+opened by the parent, and the parent restarts any worker that dies.
+
+State the parent changes after forking (the RAG service reloads its
+index in the parent when the knowledge base changes) reaches the workers
+through recycle_workers(): each worker is replaced by a fresh fork, one
+at a time, and the old one finishes its in-flight requests and exits.
+
+Usage:
+    ASSESS_WORKERS=4 python rag_server.py
+    python prefork.py hf_rag_server:app --workers 4 --port 8001
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Union
+
+import uvicorn
+from uvicorn.importer import import_from_string
+
+logger = logging.getLogger(__name__)
+
+# Worker processes; 1 keeps the single-process server
+DEFAULT_WORKERS = int(os.getenv("ASSESS_WORKERS", 1))
+
+# Seconds to wait before restarting a worker that exited on its own
+RESTART_DELAY = float(os.getenv("ASSESS_WORKER_RESTART_DELAY", 1.0))
+
+# Seconds workers get to finish in-flight requests on shutdown
+SHUTDOWN_TIMEOUT = float(os.getenv("ASSESS_SHUTDOWN_TIMEOUT", 30.0))
+
+# Set from any thread of the pre-fork parent to replace its workers
+_recycle_requested = threading.Event()
+_supervising = False
+
+
+def recycle_workers() -> bool:
+    """
+    Ask the pre-fork parent to replace its workers with fresh forks, so they
+    pick up state it changed since they started. Returns False (and does
+    nothing) outside a pre-fork parent.
+    """
+    if not _supervising:
+        return False
+    _recycle_requested.set()
+    return True
+
+
+def worker_memory(pid: int) -> Dict[str, float]:
+    """Resident, proportional and private memory of a process in MB (Linux only)"""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024
+    except OSError:
+        return {}
+    return {
+        "rssMb": fields.get("Rss", 0.0),
+        "pssMb": fields.get("Pss", 0.0),
+        "sharedMb": fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0),
+        "privateMb": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, log_level: str, server_options: Dict[str, Any]) -> int:
+    """Serve until shut down; returns the worker's exit code"""
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    options = {"timeout_graceful_shutdown": SHUTDOWN_TIMEOUT, **server_options}
+    config = uvicorn.Config(app, log_level=log_level, **options)
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+    # uvicorn returns without starting when lifespan startup fails
+    return 0 if server.started else 3
+
+
+def serve_prefork(
+    app: Union[str, Callable],
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    workers: int = DEFAULT_WORKERS,
+    preload: Optional[Callable[[], None]] = None,
+    log_level: str = "info",
+    backlog: int = 2048,
+    server_options: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Preload app state once, then serve it from forked worker processes.
+    app is an import string or an ASGI app; server_options are extra
+    uvicorn.Config arguments for the workers.
+    """
+    # Tokenizers warn and disable their own threads if they were used before a fork
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+    started = time.perf_counter()
+    application = import_from_string(app) if isinstance(app, str) else app
+    if preload is not None:
+        preload()
+    # Objects that exist now are never collected in workers, so GC passes don't dirty their pages
+    gc.collect()
+    gc.freeze()
+    label = app if isinstance(app, str) else type(app).__name__
+    logger.info(f"Preloaded {label} in {time.perf_counter() - started:.1f}s; starting {workers} workers")
+
+    global _supervising
+    sock = _bind(host, port, backlog)
+    children: Dict[int, int] = {}  # pid -> worker number
+    retiring = set()  # replaced workers, not restarted when they exit
+    stopping = False
+    _supervising = True
+
+    def spawn(number: int) -> None:
+        global _supervising
+        pid = os.fork()
+        if pid == 0:
+            _supervising = False
+            exit_code = 1
+            try:
+                exit_code = _run_worker(application, sock, log_level, server_options or {})
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else int(e.code is not None)
+            except BaseException:
+                logger.exception(f"Worker {number} crashed")
+            finally:
+                os._exit(exit_code)
+        children[pid] = number
+        logger.info(f"Worker {number} started (pid {pid})")
+
+    def recycle() -> None:
+        # Objects the parent created since the last freeze are shared as well
+        gc.collect()
+        gc.freeze()
+        logger.info(f"Replacing {len(children) - len(retiring)} workers with fresh forks")
+        for pid, number in sorted(children.items(), key=lambda item: item[1]):
+            if pid in retiring:
+                continue
+            spawn(number)
+            retiring.add(pid)
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for number in range(workers):
+        spawn(number)
+
+    reported = False
+    while children:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            if _recycle_requested.is_set() and not stopping:
+                _recycle_requested.clear()
+                recycle()
+            if not reported and time.perf_counter() - started > 5:
+                for worker_pid, number in sorted(children.items(), key=lambda item: item[1]):
+                    memory = worker_memory(worker_pid)
+                    if memory:
+                        logger.info(
+                            f"Worker {number} memory: rss {memory['rssMb']:.0f}MB, shared {memory['sharedMb']:.0f}MB, "
+                            f"private {memory['privateMb']:.0f}MB"
+                        )
+                reported = True
+            time.sleep(0.2)
+            continue
+
+        number = children.pop(pid)
+        if stopping or pid in retiring:
+            retiring.discard(pid)
+            continue
+        logger.warning(f"Worker {number} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}; restarting")
+        time.sleep(RESTART_DELAY)
+        if not stopping:
+            spawn(number)
+
+    _supervising = False
+    sock.close()
+    logger.info("All workers stopped")
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Serve an assessment app from pre-forked workers")
+    parser.add_argument("app", help="App import string, e.g. rag_server:app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=max(DEFAULT_WORKERS, os.cpu_count() or 1))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    preload = import_from_string(args.app.split(":")[0] + ":preload")
+    serve_prefork(args.app, args.host, args.port, args.workers, preload=preload, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Opt-in profiler for sampled /assess requests
+
+With profiling on, each /assess request is profiled with probability
+ASSESS_PROFILE_SAMPLE_RATE. A sampled request's worker thread records
+every Python and C call under sys.setprofile, so sub-millisecond rule
+engine requests show up as well as LLM-bound ones; requests that aren't
+sampled run unwrapped. The last ASSESS_PROFILE_WINDOW profiled requests
+are aggregated into collapsed stacks (one "frame;frame;frame weight" line
+per stack, weights in microseconds of wall-clock self time) that
+flamegraph.pl, speedscope and inferno read directly:
+
+    GET    /admin/profile            status
+    POST   /admin/profile?enabled=true&sampleRate=0.05
+    GET    /admin/profile/collapsed  download the collapsed stacks
+    DELETE /admin/profile            clear collected profiles
+
+These routes exist only when ASSESS_ADMIN_TOKEN is set, and require it
+in the X-Admin-Token header. Profiles are per process: with pre-forked
+workers each download reads the worker that accepted it.
+"""
+import functools
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENABLED = os.getenv("ASSESS_PROFILE_ENABLED", "false").lower() == "true"
+
+# Fraction of /assess requests profiled while profiling is on
+PROFILE_SAMPLE_RATE = float(os.getenv("ASSESS_PROFILE_SAMPLE_RATE", 0.01))
+
+# Profiled requests kept in the rolling aggregate
+PROFILE_WINDOW = int(os.getenv("ASSESS_PROFILE_WINDOW", 500))
+
+# Shared secret for the /admin routes; unset leaves them unregistered
+ADMIN_TOKEN = os.getenv("ASSESS_ADMIN_TOKEN") or None
+
+_CALL_EVENTS = ("call", "c_call")
+_RETURN_EVENTS = ("return", "c_return", "c_exception")
+
+
+def _code_label(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _builtin_label(function) -> str:
+    module = getattr(function, "__module__", None)
+    name = getattr(function, "__qualname__", None) or getattr(function, "__name__", repr(function))
+    return f"{module}.{name}" if module else name
+
+
+class _StackRecorder:
+    """sys.setprofile callback that accumulates self time per call stack"""
+
+    def __init__(self, root: str):
+        # [stack path, start time, time spent in callees]
+        self._stack: List[list] = [[root, time.perf_counter(), 0.0]]
+        self._labels: Dict[Any, str] = {}
+        self.stacks: "Counter[str]" = Counter()
+
+    def __call__(self, frame, event: str, arg) -> None:
+        now = time.perf_counter()
+        if event in _CALL_EVENTS:
+            key = frame.f_code if event == "call" else arg
+            label = self._labels.get(key)
+            if label is None:
+                label = self._labels[key] = _code_label(key) if event == "call" else _builtin_label(key)
+            self._stack.append([f"{self._stack[-1][0]};{label}", now, 0.0])
+        elif event in _RETURN_EVENTS and len(self._stack) > 1:
+            path, started, callees = self._stack.pop()
+            elapsed = now - started
+            self.stacks[path] += elapsed - callees
+            self._stack[-1][2] += elapsed
+
+    def finish(self) -> "Counter[str]":
+        path, started, callees = self._stack[0]
+        self.stacks[path] += time.perf_counter() - started - callees
+        return self.stacks
+
+
+class RequestProfiler:
+    """Samples requests and keeps a rolling aggregate of their call stacks"""
+
+    def __init__(self, enabled: bool = PROFILE_ENABLED, sample_rate: float = PROFILE_SAMPLE_RATE, window: int = PROFILE_WINDOW):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self._profiles: Deque["Counter[str]"] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.profiled_requests = 0
+
+    def configure(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None) -> None:
+        if sample_rate is not None:
+            if not 0.0 <= sample_rate <= 1.0:
+                raise ValueError("sampleRate must be between 0 and 1")
+            self.sample_rate = sample_rate
+        if enabled is not None:
+            self.enabled = enabled
+
+    def profiled(self, fn: Callable[..., Any], name: Optional[str] = None) -> Callable[..., Any]:
+        """fn itself, or for a sampled request a wrapper that profiles the call"""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return fn
+        root = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def profile_call(*args, **kwargs):
+            recorder = _StackRecorder(root)
+            sys.setprofile(recorder)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                sys.setprofile(None)
+                self._record(recorder.finish())
+
+        return profile_call
+
+    def _record(self, stacks: "Counter[str]") -> None:
+        with self._lock:
+            self._profiles.append(stacks)
+            self.profiled_requests += 1
+
+    def collapsed(self) -> str:
+        """Collapsed stacks for the profiles in the window, weights in microseconds"""
+        with self._lock:
+            profiles = list(self._profiles)
+        totals: "Counter[str]" = Counter()
+        for stacks in profiles:
+            totals.update(stacks)
+        lines = []
+        for path, seconds in sorted(totals.items()):
+            weight = round(seconds * 1_000_000)
+            if weight > 0:
+                lines.append(f"{path} {weight}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sampleRate": self.sample_rate,
+                "window": self._profiles.maxlen,
+                "profilesInWindow": len(self._profiles),
+                "profiledRequests": self.profiled_requests,
+            }
+
+
+_profiler: Optional[RequestProfiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_request_profiler() -> RequestProfiler:
+    """Get the singleton request profiler"""
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = RequestProfiler()
+    return _profiler
+
+
+def profiled(fn: Callable[..., Any], name: Optional[str] = None) -> Callable[..., Any]:
+    """Wrap an assessment function so a sampled fraction of calls is profiled"""
+    return get_request_profiler().profiled(fn, name)
+
+
+def _check_admin_token(token: Optional[str]) -> None:
+    if ADMIN_TOKEN is None or not hmac.compare_digest((token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Admin-Token")
+
+
+def register_profiling_routes(app: FastAPI) -> None:
+    """Add the /admin/profile routes to an assessment app, if ASSESS_ADMIN_TOKEN is set"""
+    if ADMIN_TOKEN is None:
+        logger.info("ASSESS_ADMIN_TOKEN not set; /admin/profile routes disabled")
+        return
+    profiler = get_request_profiler()
+
+    @app.get("/admin/profile")
+    async def profile_status(x_admin_token: Optional[str] = Header(None)):
+        """Profiling state and how many requests have been profiled"""
+        _check_admin_token(x_admin_token)
+        return profiler.status()
+
+    @app.post("/admin/profile")
+    async def configure_profiling(
+        enabled: Optional[bool] = Query(None),
+        sampleRate: Optional[float] = Query(None, ge=0, le=1, description="Fraction of /assess requests to profile"),
+        x_admin_token: Optional[str] = Header(None)
+    ):
+        """Turn profiling on or off and change the sample rate without a restart"""
+        _check_admin_token(x_admin_token)
+        profiler.configure(enabled=enabled, sample_rate=sampleRate)
+        return profiler.status()
+
+    @app.get("/admin/profile/collapsed", response_class=PlainTextResponse)
+    async def download_profile(x_admin_token: Optional[str] = Header(None)):
+        """Collapsed stacks of the recently profiled requests, for flamegraph.pl or speedscope"""
+        _check_admin_token(x_admin_token)
+        return PlainTextResponse(
+            profiler.collapsed(),
+            headers={"Content-Disposition": 'attachment; filename="assess-profile.folded"'}
+        )
+
+    @app.delete("/admin/profile")
+    async def clear_profile(x_admin_token: Optional[str] = Header(None)):
+        """Discard the collected profiles"""
+        _check_admin_token(x_admin_token)
+        profiler.clear()
+        return profiler.status()
@@ -0,0 +1,167 @@
+"""
+Token-budgeted prompt construction for the RAG assessment prompt
+
+Retrieved passages are split into sentences, duplicate sentences (chunk
+overlap repeats them) are dropped, and the rest are ranked by BM25-style
+term overlap with the patient's symptoms. The best sentences are packed
+into RAG_CONTEXT_TOKEN_BUDGET tokens and emitted in their original order.
+
+Tokens are estimated at four characters per token unless RAG_TOKENIZER
+names the LLM's tokenizer (e.g. HuggingFaceH4/zephyr-7b-beta), which the
+RAG service loads while it starts rather than on a request. A PromptTemplate counts its static text once, so rendering a
+prompt only tokenizes the per-request fields.
+"""
+import logging
+import math
+import os
+import re
+import threading
+from string import Formatter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from section_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Tokens of retrieved context allowed in the assessment prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", 600))
+
+# Tokenizer used for counting; unset estimates from character counts
+TOKENIZER_NAME = os.getenv("RAG_TOKENIZER", "")
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+_LIST_MARKER = re.compile(r"^(?:[-*•]|\d+[.)])\s+")
+
+
+class TokenCounter:
+    """Counts tokens with a Hugging Face tokenizer, loaded by load() or on first use"""
+
+    def __init__(self, tokenizer_name: str = TOKENIZER_NAME):
+        self.tokenizer_name = tokenizer_name
+        self._tokenizer = None
+        self._loaded = not tokenizer_name
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the tokenizer now; None when counting falls back to the estimate"""
+        with self._lock:
+            if not self._loaded:
+                try:
+                    from transformers import AutoTokenizer
+                    self._tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+                except Exception as e:
+                    logger.warning(f"Tokenizer {self.tokenizer_name} unavailable, estimating prompt tokens: {e}")
+                self._loaded = True
+        return self._tokenizer
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        tokenizer = self._tokenizer if self._loaded else self.load()
+        if tokenizer is None:
+            return (len(text) + 3) // 4
+        return len(tokenizer.encode(text, add_special_tokens=False))
+
+
+_counter: Optional[TokenCounter] = None
+_counter_lock = threading.Lock()
+
+
+def get_token_counter() -> TokenCounter:
+    """Get the singleton token counter"""
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                _counter = TokenCounter()
+    return _counter
+
+
+def split_sentences(text: str) -> List[str]:
+    sentences = []
+    for piece in _SENTENCE_BOUNDARY.split(text):
+        piece = _LIST_MARKER.sub("", piece.strip())
+        if piece:
+            sentences.append(piece)
+    return sentences
+
+
+def pack_context(
+    passages: Sequence[str],
+    query: str,
+    budget: int = CONTEXT_TOKEN_BUDGET,
+    counter: Optional[TokenCounter] = None
+) -> Tuple[str, int]:
+    """
+    The most query-relevant sentences of passages (best passages first)
+    that fit in budget tokens, in their original order, and their token count
+    """
+    counter = counter or get_token_counter()
+    sentences: List[str] = []
+    terms: List[set] = []
+    seen = set()
+    for passage in passages:
+        for sentence in split_sentences(passage):
+            key = " ".join(sentence.lower().split())
+            if key in seen:
+                continue
+            seen.add(key)
+            sentences.append(sentence)
+            terms.append(set(tokenize(sentence)))
+    if not sentences:
+        return "", 0
+
+    # Rarer query terms count for more; ties keep retrieval order
+    document_frequency: Dict[str, int] = {}
+    for sentence_terms in terms:
+        for term in sentence_terms:
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    count = len(sentences)
+    weights = {
+        term: math.log(1 + (count - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+        for term in set(tokenize(query)) if term in document_frequency
+    }
+    scores = [sum(weights.get(term, 0.0) for term in sentence_terms) for sentence_terms in terms]
+    ranked = sorted(range(count), key=lambda idx: (-scores[idx], idx))
+
+    selected = []
+    used = 0
+    for idx in ranked:
+        tokens = counter.count(sentences[idx]) + 1  # joining space or newline
+        if used + tokens > budget:
+            continue
+        selected.append(idx)
+        used += tokens
+    return " ".join(sentences[idx] for idx in sorted(selected)), used
+
+
+class PromptTemplate:
+    """str.format-style template whose static text is tokenized once"""
+
+    def __init__(self, template: str, counter: Optional[TokenCounter] = None):
+        self.counter = counter or get_token_counter()
+        self._parts = [
+            (literal, field) for literal, field, _, _ in Formatter().parse(template)
+        ]
+        self._static_tokens: Optional[int] = None
+
+    @property
+    def static_tokens(self) -> int:
+        if self._static_tokens is None:
+            self._static_tokens = sum(self.counter.count(literal) for literal, _ in self._parts)
+        return self._static_tokens
+
+    def render(self, **fields: str) -> Tuple[str, int]:
+        """
+        The prompt and its token count, counted per piece (so it can differ
+        from tokenizing the whole prompt by a token at each field boundary)
+        """
+        pieces = []
+        tokens = self.static_tokens
+        for literal, field in self._parts:
+            pieces.append(literal)
+            if field is not None:
+                value = fields[field]
+                pieces.append(value)
+                tokens += self.counter.count(value)
+        return "".join(pieces), tokens
@@ -1,15 +1,34 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
 from typing import List, Optional
-import uvicorn
 import os
-from rag_service import assess_pregnancy_risk_api
+import json
+from rag_service import (
+    assess_pregnancy_risk_api, assess_pregnancy_risk_batch_api, assess_pregnancy_risk_stream_api,
+    get_rag_service, start_warmup, warmup_status
+)
+from assessment_models import AssessmentRequest, AssessmentResponse
+from batch_api import register_batch_routes
+from assessment_executor import ExecutorSaturatedError, get_assessment_executor
+from result_cache import all_cache_stats
+from embedding_cache import all_embedding_cache_stats
+from launcher import run_server
+from metrics import register_metrics_route
+from profiler import profiled, register_profiling_routes
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model and index in the background; /assess uses the rule engine until then
+    start_warmup()
+    yield
 
 app = FastAPI(
     title="GraviLog RAG Service",
     description="RAG-powered pregnancy risk assessment service",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -21,23 +40,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-class AssessmentRequest(BaseModel):
-    symptoms: List[str]
-    gestationalWeek: Optional[int] = None
-    previousComplications: Optional[bool] = None
-    additionalSymptoms: Optional[str] = None
-
-class AssessmentResponse(BaseModel):
-    riskLevel: str
-    confidence: float
-    recommendations: List[str]
-    reasoning: str
-    urgency: str
-
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "GraviLog RAG Service"}
+    """
+    Health check endpoint. Reports "warming" while the embedding model and
+    index load in the background, and "degraded" if loading failed; the
+    service answers from the rule engine in both cases.
+    """
+    warmup = warmup_status()
+    status = {"ready": "healthy", "failed": "degraded"}.get(warmup["state"], "warming")
+    return {"status": status, "service": "GraviLog RAG Service", "warmup": warmup}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Result and embedding cache hit/miss statistics"""
+    return {**all_cache_stats(), "embeddings": all_embedding_cache_stats()}
 
 @app.post("/assess", response_model=AssessmentResponse)
 async def assess_risk(request: AssessmentRequest):
@@ -45,7 +62,8 @@ async def assess_risk(request: AssessmentRequest):
     Assess pregnancy risk using RAG-enhanced analysis
     """
     try:
-        result = assess_pregnancy_risk_api(
+        result = await get_assessment_executor().run(
+            profiled(assess_pregnancy_risk_api),
             symptoms=request.symptoms,
             gestational_week=request.gestationalWeek,
             previous_complications=request.previousComplications,
@@ -54,18 +72,73 @@ async def assess_risk(request: AssessmentRequest):
         
         return AssessmentResponse(**result)
         
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(
             status_code=500, 
             detail=f"Risk assessment failed: {str(e)}"
         )
 
+def _stream_assessment(request: AssessmentRequest) -> StreamingResponse:
+    """Server-Sent Events response for a streamed assessment"""
+    executor = get_assessment_executor()
+    if executor.saturated:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Assessment queue full ({executor.in_flight}/{executor.capacity} in flight)",
+            headers={"Retry-After": "1"}
+        )
+    
+    async def events():
+        async for event, data in assess_pregnancy_risk_stream_api(
+            symptoms=request.symptoms,
+            gestational_week=request.gestationalWeek,
+            previous_complications=request.previousComplications,
+            additional_info=request.additionalSymptoms,
+            run_blocking=executor.run_when_available
+        ):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/assess/stream")
+async def assess_risk_stream(request: AssessmentRequest):
+    """
+    Stream a RAG assessment as Server-Sent Events: a rule-based
+    "preliminary" risk level first, then LLM "token" events, then the
+    validated "result"
+    """
+    return _stream_assessment(request)
+
+@app.get("/assess/stream")
+async def assess_risk_stream_get(
+    symptoms: List[str] = Query(...),
+    gestationalWeek: Optional[int] = None,
+    previousComplications: Optional[bool] = None,
+    additionalSymptoms: Optional[str] = None
+):
+    """
+    Streamed assessment for EventSource clients, which can only send GET
+    """
+    return _stream_assessment(AssessmentRequest(
+        symptoms=symptoms,
+        gestationalWeek=gestationalWeek,
+        previousComplications=previousComplications,
+        additionalSymptoms=additionalSymptoms
+    ))
+
+register_batch_routes(app, AssessmentRequest, AssessmentResponse, assess_pregnancy_risk_batch_api)
+register_metrics_route(app)
+register_profiling_routes(app)
+
+def preload():
+    """Load the embedding model and vector index before workers are forked"""
+    get_rag_service()
+
 if __name__ == "__main__":
-    port = int(os.getenv("RAG_PORT", 8000))
-    uvicorn.run(
-        "rag_server:app",
-        host="0.0.0.0",
-        port=port,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    run_server("rag_server:app", port=int(os.getenv("RAG_PORT", 8000)), preload=preload)
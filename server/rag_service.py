@@ -1,18 +1,32 @@
 import os
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import shutil
+import threading
+import time
+from contextlib import aclosing
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, AsyncIterator, Awaitable, Callable, Tuple
 from dotenv import load_dotenv
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, Settings
-from llama_index.core.node_parser import SimpleNodeParser
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-from llama_index.core.retrievers import VectorIndexRetriever
-from llama_index.core.query_engine import RetrieverQueryEngine
-from llama_index.core.postprocessor import SimilarityPostprocessor
 from pydantic import BaseModel
-import json
-import requests
+from knowledge_watcher import KnowledgeBaseWatcher
+from prefork import recycle_workers
+from rule_engine import RISK_RULES_FILE
+from llm_client import InferenceClient, LLMError
+from result_cache import assessment_cache_key, get_result_cache
+from embedding_cache import compose_embedding, get_embedding_cache
+from vector_store import NumpyVectorStore, numpy_retriever
+from metrics import count_assessment, count_fallback, stage
+from structured_output import JsonObjectScanner, parse_json_object
+from prompt_builder import PromptTemplate, get_token_counter, pack_context
 import re
 
+if TYPE_CHECKING:
+    from llama_index.core import VectorStoreIndex
+
+# Module import time, the reference point of the time-to-ready report
+_IMPORTED_AT = time.perf_counter()
+
 # Load environment variables
 load_dotenv()
 
@@ -20,27 +34,137 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Embedding model used for the knowledge base index
+EMBED_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Chunking parameters; part of the persisted index key
+CHUNK_SIZE = 512
+CHUNK_OVERLAP = 50
+
+# Chunks retrieved per query
+SIMILARITY_TOP_K = 5
+
+# Retrieval backend: "numpy" (exact search over one embedding matrix) or "llama_index" (VectorIndexRetriever)
+VECTOR_STORE = os.getenv("RAG_VECTOR_STORE", "numpy").lower()
+
+# Storage of the numpy backend's matrix: float32, float16 or int8
+VECTOR_DTYPE = os.getenv("RAG_VECTOR_DTYPE", "float32").lower()
+
+# Directory holding persisted vector indexes, one subdirectory per knowledge base fingerprint
+INDEX_STORAGE_DIR = os.getenv(
+    "RAG_INDEX_STORAGE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "index_storage")
+)
+
+# Reasoning of the safe assessment returned when retrieval or the LLM fails
+FALLBACK_REASONING = "Unable to complete full AI assessment due to technical issues. Please consult with your healthcare provider for proper evaluation of your symptoms."
+
+# Prompt context: "retrieval" passes the retrieved chunks straight to the assessment
+# prompt (one LLM call); "synthesis" passes the query engine's LLM-synthesized answer
+CONTEXT_MODE = os.getenv("RAG_CONTEXT_MODE", "retrieval").lower()
+
+# Retrieval query embedding: "symptoms" composes cached per-symptom embeddings;
+# "query" embeds the whole formatted query (also cached)
+QUERY_EMBEDDING = os.getenv("RAG_QUERY_EMBEDDING", "symptoms").lower()
+
+# LLM used for assessments: "zephyr" (pooled inference client) or "llama_index" (Settings.llm)
+LLM_BACKEND = os.getenv("RAG_LLM_BACKEND", "zephyr").lower()
+
+# Reload the index when knowledge base files change
+WATCH_KNOWLEDGE_BASE = os.getenv("RAG_WATCH_KNOWLEDGE_BASE", "true").lower() == "true"
+
+# Assessment prompt; retrieved_context is packed into RAG_CONTEXT_TOKEN_BUDGET tokens
+ASSESSMENT_PROMPT = """
+        You are a medical AI assistant specializing in pregnancy health risk assessment. 
+        Based on the retrieved medical knowledge and patient symptoms, provide a comprehensive risk assessment.
+
+        PATIENT INFORMATION:
+        - Symptoms: {symptom_list}
+        - Gestational Week: {gestational_week}
+        - Previous Complications: {previous_complications}
+        - Additional Information: {additional_info}
+
+        RETRIEVED MEDICAL KNOWLEDGE:
+        {retrieved_context}
+
+        ASSESSMENT GUIDELINES:
+        - LOW RISK: Common pregnancy symptoms, routine monitoring sufficient
+        - MODERATE RISK: Symptoms that warrant medical attention within days
+        - HIGH RISK: Symptoms requiring immediate or urgent medical care
+        - Consider gestational week and symptom combinations
+        - Provide specific, actionable recommendations
+        - Be conservative in risk assessment to ensure patient safety
+
+        Please provide a JSON response with the following structure:
+        {{
+            "riskLevel": "low" | "moderate" | "high",
+            "confidence": 0.0-1.0,
+            "recommendations": ["recommendation1", "recommendation2", ...],
+            "reasoning": "detailed explanation of the assessment based on retrieved knowledge",
+            "urgency": "routine" | "within_week" | "within_24_hours" | "immediate"
+        }}
+        """
+
+_assessment_prompt: Optional[PromptTemplate] = None
+
+def _import_llama_index() -> None:
+    """
+    Import llama_index and the HuggingFace embedding backend (torch,
+    transformers) on first use rather than at module import, so the server
+    can bind and answer /health while they load.
+    """
+    global VectorStoreIndex, SimpleDirectoryReader, Settings, StorageContext, load_index_from_storage
+    global SimpleNodeParser, HuggingFaceEmbedding, VectorIndexRetriever, RetrieverQueryEngine
+    global SimilarityPostprocessor, QueryBundle
+    from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, Settings, StorageContext, load_index_from_storage
+    from llama_index.core.node_parser import SimpleNodeParser
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+    from llama_index.core.retrievers import VectorIndexRetriever
+    from llama_index.core.query_engine import RetrieverQueryEngine
+    from llama_index.core.postprocessor import SimilarityPostprocessor
+    from llama_index.core.schema import QueryBundle
+
 class RiskAssessmentResult(BaseModel):
     riskLevel: str  # "low", "moderate", "high"
     confidence: float  # 0.0 to 1.0
     recommendations: List[str]
     reasoning: str
     urgency: str  # "routine", "within_week", "within_24_hours", "immediate"
+    engine: str = "rag"  # "rag", "rules" (standing in for the LLM) or "fallback" (safe default)
 
 class PregnancyRAGService:
     def __init__(self):
+        _import_llama_index()
+        
         # Use Hugging Face embedding model (free)
         Settings.embed_model = HuggingFaceEmbedding(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
+            model_name=EMBED_MODEL_NAME
         )
+        self.embedding_cache = get_embedding_cache(EMBED_MODEL_NAME)
         
         # Hugging Face API endpoint for Zephyr model
-        self.hf_api_url = "https://api-inference.huggingface.co/models/HuggingFaceH4/zephyr-7b-beta"
+        self.hf_api_url = os.getenv("HF_API_URL", "https://api-inference.huggingface.co/models/HuggingFaceH4/zephyr-7b-beta")
         self.hf_token = os.getenv("HUGGINGFACE_API_TOKEN")  # Optional, works without token but with rate limits
         
+        # Pooled client for the inference endpoint; "llama_index" uses Settings.llm instead
+        self.llm_client = None
+        if LLM_BACKEND == "zephyr":
+            self.llm_client = InferenceClient(self.hf_api_url, self.hf_token)
+        
         self.index = None
+        self.retriever = None
         self.query_engine = None
+        self.knowledge_base_path = None
+        self.index_fingerprint = None
+        self._reload_lock = threading.Lock()
         self._initialize_knowledge_base()
+        # Load the prompt tokenizer (if RAG_TOKENIZER names one) before the first request needs it
+        get_token_counter().load()
+        
+        self.watcher = None
+        if WATCH_KNOWLEDGE_BASE:
+            self.watcher = KnowledgeBaseWatcher(self.knowledge_base_path, self._on_knowledge_base_change)
+            self.watcher.start()
     
     def _initialize_knowledge_base(self):
         """Initialize the RAG knowledge base from documents"""
@@ -53,51 +177,193 @@ class PregnancyRAGService:
                 os.makedirs("server/knowledge_base", exist_ok=True)
                 logger.warning("Knowledge base directory created. Please add medical documents.")
             
-            documents = SimpleDirectoryReader(knowledge_base_path).load_data()
-            logger.info(f"Loaded {len(documents)} documents from knowledge base")
-            
-            # Parse documents into nodes
-            parser = SimpleNodeParser.from_defaults(chunk_size=512, chunk_overlap=50)
-            nodes = parser.get_nodes_from_documents(documents)
+            self.knowledge_base_path = knowledge_base_path
+            self._install_index(self._load_or_build_index(knowledge_base_path), self.index_fingerprint)
             
-            # Create vector store index
-            self.index = VectorStoreIndex(nodes)
+            logger.info(f"RAG knowledge base initialized successfully ({CONTEXT_MODE} context mode)")
             
-            # Create query engine with retrieval and post-processing
+        except Exception as e:
+            logger.error(f"Failed to initialize knowledge base: {str(e)}")
+            raise
+    
+    def _install_index(self, index: "VectorStoreIndex", fingerprint: Optional[str] = None):
+        """Build a query engine for the index and swap both in"""
+        if VECTOR_STORE == "numpy":
+            retriever = numpy_retriever(self._load_vector_store(index, fingerprint), index.docstore, SIMILARITY_TOP_K)
+        else:
             retriever = VectorIndexRetriever(
-                index=self.index,
-                similarity_top_k=5  # Retrieve top 5 most relevant chunks
+                index=index,
+                similarity_top_k=SIMILARITY_TOP_K
             )
+        
+        query_engine = RetrieverQueryEngine(
+            retriever=retriever
+        )
+        
+        # Requests read self.query_engine once, so they see either the old
+        # engine or the fully built new one
+        self.index = index
+        self.retriever = retriever
+        self.query_engine = query_engine
+    
+    def _load_vector_store(self, index: "VectorStoreIndex", fingerprint: Optional[str]) -> NumpyVectorStore:
+        """The persisted embedding matrix for an index, memory-mapped, or one built from the index"""
+        if fingerprint:
+            try:
+                store = NumpyVectorStore.load(os.path.join(INDEX_STORAGE_DIR, fingerprint))
+                if store is not None and store.dtype == VECTOR_DTYPE and len(store) == len(index.index_struct.nodes_dict):
+                    logger.info(f"Memory-mapped {len(store)} {store.dtype} chunk embeddings")
+                    return store
+            except (OSError, ValueError) as e:
+                logger.warning(f"Persisted embedding matrix unreadable, rebuilding from the index: {e}")
+        return NumpyVectorStore.from_index(index, VECTOR_DTYPE)
+    
+    def _parse_nodes(self, knowledge_base_path: str) -> list:
+        """
+        Chunk the knowledge base into nodes with content-derived ids, so an
+        unchanged chunk keeps its id (and stored embedding) across rebuilds
+        """
+        # The risk pattern file feeds the rule engines, not retrieval
+        documents = SimpleDirectoryReader(
+            knowledge_base_path, filename_as_id=True, exclude=[RISK_RULES_FILE]
+        ).load_data()
+        logger.info(f"Loaded {len(documents)} documents from knowledge base")
+        
+        # Parse documents into nodes
+        parser = SimpleNodeParser.from_defaults(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        nodes = parser.get_nodes_from_documents(documents)
+        
+        seen: Dict[str, int] = {}
+        for node in nodes:
+            source = node.metadata.get("file_name", node.ref_doc_id or "")
+            content_hash = hashlib.sha256(f"{source}\0{node.get_content()}".encode("utf-8")).hexdigest()
+            # Identical chunks within a file are told apart by occurrence
+            occurrence = seen.get(content_hash, 0)
+            seen[content_hash] = occurrence + 1
+            node.id_ = f"{content_hash[:32]}-{occurrence}"
+        
+        return nodes
+    
+    def reload_knowledge_base(self) -> bool:
+        """
+        Re-index the knowledge base if its files changed. Chunks whose content
+        is unchanged reuse their stored embeddings, so only edited chunks are
+        re-embedded. The new index is swapped in once complete.
+        Returns True if a new index was installed.
+        """
+        with self._reload_lock:
+            fingerprint = self._knowledge_base_fingerprint(self.knowledge_base_path)
+            if fingerprint == self.index_fingerprint:
+                return False
             
-            self.query_engine = RetrieverQueryEngine(
-                retriever=retriever
-            )
+            nodes = self._parse_nodes(self.knowledge_base_path)
+            vector_store = self.index.vector_store if self.index is not None else None
+            previous_ids = set(self.index.index_struct.nodes_dict.values()) if self.index is not None else set()
             
-            logger.info("RAG knowledge base initialized successfully")
+            reused = 0
+            for node in nodes:
+                if node.node_id in previous_ids:
+                    try:
+                        node.embedding = vector_store.get(node.node_id)
+                        reused += 1
+                    except Exception:
+                        node.embedding = None
             
-        except Exception as e:
-            logger.error(f"Failed to initialize knowledge base: {str(e)}")
-            raise
+            index = VectorStoreIndex(nodes)
+            self._persist_index(index, fingerprint)
+            self._install_index(index, fingerprint)
+            self.index_fingerprint = fingerprint
+            get_result_cache("rag").clear()
+            
+            removed = len(previous_ids - {node.node_id for node in nodes})
+            logger.info(
+                f"Knowledge base reloaded as {fingerprint}: {len(nodes) - reused} chunks embedded, "
+                f"{reused} reused, {removed} removed"
+            )
+            return True
     
-    def assess_pregnancy_risk(
-        self,
-        symptoms: List[str],
-        gestational_week: Optional[int] = None,
-        previous_complications: Optional[bool] = None,
-        additional_info: Optional[str] = None
-    ) -> RiskAssessmentResult:
+    def _on_knowledge_base_change(self):
         """
-        Assess pregnancy risk using RAG-enhanced LLM analysis
+        Watcher callback. Under pre-forking the watcher runs in the parent,
+        which reloads and then replaces the workers so they fork the new index.
+        """
+        if self.reload_knowledge_base():
+            recycle_workers()
+    
+    def _knowledge_base_fingerprint(self, knowledge_base_path: str) -> str:
+        """Hash the indexed knowledge base files together with the embedding and chunking settings"""
+        digest = hashlib.sha256()
+        digest.update(f"{EMBED_MODEL_NAME}|{CHUNK_SIZE}|{CHUNK_OVERLAP}".encode("utf-8"))
+        for name in sorted(os.listdir(knowledge_base_path)):
+            file_path = os.path.join(knowledge_base_path, name)
+            # Same files _parse_nodes reads; the rules file is not indexed
+            if name.startswith(".") or name == RISK_RULES_FILE or not os.path.isfile(file_path):
+                continue
+            digest.update(name.encode("utf-8") + b"\0")
+            with open(file_path, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        return digest.hexdigest()[:16]
+    
+    def _load_or_build_index(self, knowledge_base_path: str) -> "VectorStoreIndex":
+        """
+        Load the persisted index for the current knowledge base, or build and persist it.
+        Indexes are keyed by fingerprint, so editing a document or changing the
+        embedding model triggers a rebuild and stale indexes are removed.
         """
+        fingerprint = self._knowledge_base_fingerprint(knowledge_base_path)
+        persist_dir = os.path.join(INDEX_STORAGE_DIR, fingerprint)
+        
+        if os.path.isdir(persist_dir):
+            try:
+                storage_context = StorageContext.from_defaults(persist_dir=persist_dir)
+                index = load_index_from_storage(storage_context)
+                self.index_fingerprint = fingerprint
+                logger.info(f"Loaded persisted vector index {fingerprint}")
+                return index
+            except Exception as e:
+                logger.warning(f"Persisted index {fingerprint} unreadable, rebuilding: {e}")
+                shutil.rmtree(persist_dir, ignore_errors=True)
+        
+        nodes = self._parse_nodes(knowledge_base_path)
+        
+        # Create vector store index
+        index = VectorStoreIndex(nodes)
+        self._persist_index(index, fingerprint)
+        self.index_fingerprint = fingerprint
+        return index
+    
+    def _persist_index(self, index: "VectorStoreIndex", fingerprint: str):
+        """Persist an index under its fingerprint and prune stale ones"""
+        persist_dir = os.path.join(INDEX_STORAGE_DIR, fingerprint)
+        # Persist to a temporary directory and rename, so a crash never leaves a partial index
+        staging_dir = f"{persist_dir}.tmp-{os.getpid()}"
         try:
-            # Construct comprehensive query for RAG retrieval
-            symptom_list = ", ".join(symptoms)
-            gestational_info = f"at {gestational_week} weeks gestation" if gestational_week else "at unknown gestational age"
-            complications_info = "with previous pregnancy complications" if previous_complications else "without known previous complications"
-            additional_context = f"Additional context: {additional_info}" if additional_info else ""
-            
-            # Create RAG query
-            rag_query = f"""
+            index.storage_context.persist(persist_dir=staging_dir)
+            if VECTOR_STORE == "numpy":
+                NumpyVectorStore.from_index(index, VECTOR_DTYPE).save(staging_dir)
+            os.replace(staging_dir, persist_dir)
+            for name in os.listdir(INDEX_STORAGE_DIR):
+                if name != fingerprint and ".tmp-" not in name:
+                    shutil.rmtree(os.path.join(INDEX_STORAGE_DIR, name), ignore_errors=True)
+            logger.info(f"Persisted vector index {fingerprint} ({len(index.index_struct.nodes_dict)} nodes)")
+        except OSError as e:
+            logger.warning(f"Could not persist vector index: {e}")
+            shutil.rmtree(staging_dir, ignore_errors=True)
+    
+    def _build_rag_query(
+        self,
+        symptoms: List[str],
+        gestational_week: Optional[int],
+        previous_complications: Optional[bool],
+        additional_info: Optional[str]
+    ) -> str:
+        """Construct the retrieval query for a patient"""
+        symptom_list = ", ".join(symptoms)
+        gestational_info = f"at {gestational_week} weeks gestation" if gestational_week else "at unknown gestational age"
+        complications_info = "with previous pregnancy complications" if previous_complications else "without known previous complications"
+        additional_context = f"Additional context: {additional_info}" if additional_info else ""
+        
+        return f"""
             Patient presenting with symptoms: {symptom_list} {gestational_info} {complications_info}.
             {additional_context}
             
@@ -107,77 +373,319 @@ class PregnancyRAGService:
             3. Recommended actions and urgency level
             4. Warning signs to monitor
             """
-            
-            # Retrieve relevant medical information
-            if self.query_engine:
-                rag_response = self.query_engine.query(rag_query)
-                retrieved_context = str(rag_response)
+    
+    def _retrieval_phrases(self, symptoms: List[str], additional_info: Optional[str], rag_query: str) -> List[str]:
+        """
+        Texts whose embeddings make up the retrieval query. The formatted
+        query is mostly fixed boilerplate, so by default only the symptoms
+        (and any free-text context) are embedded, each on its own.
+        """
+        if QUERY_EMBEDDING == "query":
+            return [rag_query]
+        phrases = [symptom for symptom in symptoms if symptom.strip()]
+        if additional_info and additional_info.strip():
+            phrases.append(additional_info)
+        return phrases or [rag_query]
+    
+    def _query_embeddings(self, queries: List[Tuple[List[str], Optional[str], str]]) -> List[Optional[List[float]]]:
+        """
+        Retrieval embeddings for (symptoms, additional_info, rag_query)
+        queries. Phrases already in the embedding cache skip the model; the
+        rest of the batch is embedded in one call.
+        """
+        if not queries or not self.query_engine:
+            return [None] * len(queries)
+        phrase_lists = [self._retrieval_phrases(*query) for query in queries]
+        try:
+            with stage("rag", "embedding"):
+                vectors = self.embedding_cache.get_or_embed_many(
+                    [phrase for phrases in phrase_lists for phrase in phrases],
+                    Settings.embed_model.get_text_embedding_batch
+                )
+        except Exception as e:
+            logger.warning(f"Query embedding failed, retrieving without a cached embedding: {e}")
+            return [None] * len(queries)
+        
+        embeddings = []
+        offset = 0
+        for phrases in phrase_lists:
+            embeddings.append(compose_embedding(vectors[offset:offset + len(phrases)]).tolist())
+            offset += len(phrases)
+        return embeddings
+    
+    def _retrieve_for_request(self, symptoms: List[str], additional_info: Optional[str], rag_query: str) -> List[str]:
+        """Retrieve context for one request using its cached query embedding"""
+        query_embedding = self._query_embeddings([(symptoms, additional_info, rag_query)])[0]
+        return self._retrieve_context(rag_query, query_embedding)
+    
+    def _retrieve_context(
+        self,
+        rag_query: str,
+        query_embedding: Optional[List[float]] = None,
+        nodes: Optional[list] = None
+    ) -> List[str]:
+        """
+        Retrieve relevant medical information as passages for the prompt,
+        reusing a precomputed query embedding or already retrieved nodes if given.
+        The passages are the top-k chunks, best first; synthesis mode puts
+        the query engine's answer over those chunks ahead of them, and only
+        retrieval mode makes no LLM call here.
+        """
+        query_engine = self.query_engine
+        if not query_engine:
+            return ["Knowledge base not available"]
+        query_bundle = QueryBundle(query_str=rag_query, embedding=query_embedding)
+        with stage("rag", "retrieval"):
+            if CONTEXT_MODE == "retrieval":
+                if nodes is None:
+                    nodes = self.retriever.retrieve(query_bundle)
+                return [node.get_content() for node in nodes]
+            if nodes is not None:
+                rag_response = query_engine.synthesize(query_bundle, nodes)
             else:
-                retrieved_context = "Knowledge base not available"
-            
-            # Create detailed assessment prompt
-            assessment_prompt = f"""
-            You are a medical AI assistant specializing in pregnancy health risk assessment. 
-            Based on the retrieved medical knowledge and patient symptoms, provide a comprehensive risk assessment.
-
-            PATIENT INFORMATION:
-            - Symptoms: {symptom_list}
-            - Gestational Week: {gestational_week if gestational_week else "Not specified"}
-            - Previous Complications: {"Yes" if previous_complications else "No"}
-            - Additional Information: {additional_info if additional_info else "None provided"}
-
-            RETRIEVED MEDICAL KNOWLEDGE:
-            {retrieved_context}
-
-            ASSESSMENT GUIDELINES:
-            - LOW RISK: Common pregnancy symptoms, routine monitoring sufficient
-            - MODERATE RISK: Symptoms that warrant medical attention within days
-            - HIGH RISK: Symptoms requiring immediate or urgent medical care
-            - Consider gestational week and symptom combinations
-            - Provide specific, actionable recommendations
-            - Be conservative in risk assessment to ensure patient safety
-
-            Please provide a JSON response with the following structure:
-            {{
-                "riskLevel": "low" | "moderate" | "high",
-                "confidence": 0.0-1.0,
-                "recommendations": ["recommendation1", "recommendation2", ...],
-                "reasoning": "detailed explanation of the assessment based on retrieved knowledge",
-                "urgency": "routine" | "within_week" | "within_24_hours" | "immediate"
-            }}
-            """
-            
-            # Get LLM assessment
-            llm_response = Settings.llm.complete(assessment_prompt)
-            response_text = str(llm_response)
-            
-            # Parse JSON response
-            try:
-                # Extract JSON from response if it contains other text
-                start_idx = response_text.find('{')
-                end_idx = response_text.rfind('}') + 1
-                if start_idx != -1 and end_idx != 0:
-                    json_text = response_text[start_idx:end_idx]
-                    result_dict = json.loads(json_text)
-                else:
-                    raise ValueError("No JSON found in response")
-                
-            except (json.JSONDecodeError, ValueError) as e:
-                logger.warning(f"Failed to parse JSON response: {e}")
-                # Fallback parsing
-                result_dict = self._parse_fallback_response(response_text)
-            
-            # Validate and create result
-            result = self._validate_assessment_result(result_dict)
-            
-            logger.info(f"Risk assessment completed: {result.riskLevel} risk level")
-            return result
+                rag_response = query_engine.query(query_bundle)
+        return [str(rag_response), *(node.get_content() for node in rag_response.source_nodes)]
+    
+    def assess_pregnancy_risk(
+        self,
+        symptoms: List[str],
+        gestational_week: Optional[int] = None,
+        previous_complications: Optional[bool] = None,
+        additional_info: Optional[str] = None
+    ) -> RiskAssessmentResult:
+        """
+        Assess pregnancy risk using RAG-enhanced LLM analysis
+        """
+        try:
+            rag_query = self._build_rag_query(symptoms, gestational_week, previous_complications, additional_info)
+            retrieved_context = self._retrieve_for_request(symptoms, additional_info, rag_query)
+            return self._assess_with_context(
+                symptoms, gestational_week, previous_complications, additional_info, retrieved_context
+            )
             
         except Exception as e:
             logger.error(f"Risk assessment failed: {str(e)}")
             # Return safe fallback assessment
             return self._create_fallback_assessment(symptoms)
     
+    def assess_pregnancy_risk_batch(self, requests: List[Dict[str, Any]]) -> List[RiskAssessmentResult]:
+        """
+        Assess a batch of requests. Identical requests are assessed once and
+        uncached retrieval phrases are embedded together in a single model call.
+        """
+        unique: Dict[tuple, Dict[str, Any]] = {}
+        keys = []
+        for request in requests:
+            key = (
+                tuple(request.get("symptoms", [])),
+                request.get("gestational_week"),
+                request.get("previous_complications"),
+                request.get("additional_info")
+            )
+            unique.setdefault(key, request)
+            keys.append(key)
+        
+        queries = {
+            key: self._build_rag_query(
+                request.get("symptoms", []),
+                request.get("gestational_week"),
+                request.get("previous_complications"),
+                request.get("additional_info")
+            )
+            for key, request in unique.items()
+        }
+        
+        embeddings = dict(zip(queries, self._query_embeddings([
+            (request.get("symptoms", []), request.get("additional_info"), queries[key])
+            for key, request in unique.items()
+        ])))
+        
+        # The numpy store scores every query of the batch in one matrix product
+        retrieved_nodes: Dict[tuple, list] = {}
+        batch_keys = [key for key, embedding in embeddings.items() if embedding is not None]
+        retriever = self.retriever
+        if batch_keys and hasattr(retriever, "retrieve_batch"):
+            try:
+                with stage("rag", "batch_search"):
+                    retrieved_nodes = dict(zip(batch_keys, retriever.retrieve_batch([embeddings[key] for key in batch_keys])))
+            except Exception as e:
+                logger.warning(f"Batch retrieval failed, retrieving queries individually: {e}")
+        
+        assessed: Dict[tuple, RiskAssessmentResult] = {}
+        for key, request in unique.items():
+            symptoms = request.get("symptoms", [])
+            try:
+                retrieved_context = self._retrieve_context(queries[key], embeddings[key], retrieved_nodes.get(key))
+                assessed[key] = self._assess_with_context(
+                    symptoms,
+                    request.get("gestational_week"),
+                    request.get("previous_complications"),
+                    request.get("additional_info"),
+                    retrieved_context
+                )
+            except Exception as e:
+                logger.error(f"Risk assessment failed: {str(e)}")
+                assessed[key] = self._create_fallback_assessment(symptoms)
+        
+        return [assessed[key] for key in keys]
+    
+    def _assess_with_context(
+        self,
+        symptoms: List[str],
+        gestational_week: Optional[int],
+        previous_complications: Optional[bool],
+        additional_info: Optional[str],
+        retrieved_context: List[str]
+    ) -> RiskAssessmentResult:
+        """Ask the LLM for an assessment grounded in the retrieved context"""
+        with stage("rag", "prompt"):
+            assessment_prompt = self._build_assessment_prompt(
+                symptoms, gestational_week, previous_complications, additional_info, retrieved_context
+            )
+        
+        # Get LLM assessment, falling back to the rule engine if it fails or times out
+        try:
+            with stage("rag", "llm"):
+                response_text = self._complete(assessment_prompt)
+        except LLMError as e:
+            logger.warning(f"LLM assessment unavailable, using rule engine: {e}")
+            count_fallback("rag", "rule_engine")
+            return self._rule_based_assessment(symptoms, gestational_week, previous_complications, additional_info)
+        
+        with stage("rag", "parse"):
+            result = self._parse_llm_response(response_text)
+        logger.info(f"Risk assessment completed: {result.riskLevel} risk level")
+        return result
+    
+    def _build_assessment_prompt(
+        self,
+        symptoms: List[str],
+        gestational_week: Optional[int],
+        previous_complications: Optional[bool],
+        additional_info: Optional[str],
+        retrieved_context: List[str]
+    ) -> str:
+        """
+        Create the detailed assessment prompt, keeping the retrieved
+        sentences most relevant to the symptoms within the context budget
+        """
+        global _assessment_prompt
+        if _assessment_prompt is None:
+            _assessment_prompt = PromptTemplate(ASSESSMENT_PROMPT)
+        
+        context, context_tokens = pack_context(retrieved_context, " ".join([*symptoms, additional_info or ""]))
+        prompt, prompt_tokens = _assessment_prompt.render(
+            symptom_list=", ".join(symptoms),
+            gestational_week=str(gestational_week) if gestational_week else "Not specified",
+            previous_complications="Yes" if previous_complications else "No",
+            additional_info=additional_info if additional_info else "None provided",
+            retrieved_context=context
+        )
+        if logger.isEnabledFor(logging.INFO):
+            counter = get_token_counter()
+            unpacked_tokens = prompt_tokens - context_tokens + sum(counter.count(passage) for passage in retrieved_context)
+            logger.info(f"Assessment prompt: {unpacked_tokens} tokens before context packing, {prompt_tokens} after")
+        return prompt
+    
+    def _parse_llm_response(self, response_text: str) -> RiskAssessmentResult:
+        """Extract and validate the JSON assessment from an LLM response"""
+        # The first assessment object in the response, repaired if it is malformed or cut off
+        result_dict = parse_json_object(response_text)
+        if result_dict is None or not _is_assessment(result_dict):
+            logger.warning("No JSON assessment found in LLM response")
+            count_fallback("rag", "unparsed_response")
+            # Fallback parsing
+            result_dict = self._parse_fallback_response(response_text)
+        
+        # Validate and create result
+        return self._validate_assessment_result(result_dict)
+    
+    def _complete(self, prompt: str) -> str:
+        """
+        Run a completion on the configured LLM backend. The inference
+        endpoint is streamed and generation stops once the assessment
+        object closes.
+        """
+        if self.llm_client is not None:
+            return self.llm_client.complete_until(prompt, JsonObjectScanner(accept=_is_assessment).feed)
+        return str(Settings.llm.complete(prompt))
+    
+    async def _astream_completion(self, prompt: str) -> AsyncIterator[str]:
+        """Yield completion text as it is generated"""
+        if self.llm_client is not None:
+            # Closed explicitly so a caller that stops reading ends generation straight away
+            async with aclosing(self.llm_client.astream(prompt)) as tokens:
+                async for token in tokens:
+                    yield token
+            return
+        # Settings.llm path: no shared async client, so generate in a thread and emit once
+        try:
+            yield await asyncio.get_running_loop().run_in_executor(None, self._complete, prompt)
+        except Exception as e:
+            raise LLMError(str(e)) from e
+    
+    async def assess_pregnancy_risk_stream(
+        self,
+        symptoms: List[str],
+        gestational_week: Optional[int] = None,
+        previous_complications: Optional[bool] = None,
+        additional_info: Optional[str] = None,
+        run_blocking: Optional[Callable[..., Awaitable[Any]]] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Stream an assessment as (event, data) pairs: a rule-based
+        "preliminary" result straight away, "token" events while the LLM
+        generates, then the validated "result". run_blocking runs retrieval
+        off the event loop; it defaults to the loop's thread pool.
+        """
+        if run_blocking is None:
+            loop = asyncio.get_running_loop()
+            run_blocking = lambda fn, *args: loop.run_in_executor(None, fn, *args)
+        
+        # The rule engine answers in well under a millisecond, so triage goes out first
+        preliminary = self._rule_based_assessment(symptoms, gestational_week, previous_complications, additional_info)
+        yield "preliminary", {
+            "riskLevel": preliminary.riskLevel,
+            "urgency": preliminary.urgency,
+            "confidence": preliminary.confidence
+        }
+        
+        try:
+            rag_query = self._build_rag_query(symptoms, gestational_week, previous_complications, additional_info)
+            retrieved_context = await run_blocking(self._retrieve_for_request, symptoms, additional_info, rag_query)
+            prompt = self._build_assessment_prompt(
+                symptoms, gestational_week, previous_complications, additional_info, retrieved_context
+            )
+            
+            scanner = JsonObjectScanner(accept=_is_assessment)
+            try:
+                async with aclosing(self._astream_completion(prompt)) as tokens:
+                    async for token in tokens:
+                        yield "token", {"text": token}
+                        if scanner.feed(token):
+                            # The assessment object is complete; don't wait for trailing text
+                            break
+                result = self._parse_llm_response(scanner.text)
+            except LLMError as e:
+                logger.warning(f"LLM assessment unavailable, using rule engine: {e}")
+                count_fallback("rag", "rule_engine")
+                result = preliminary
+        except Exception as e:
+            logger.error(f"Streaming risk assessment failed: {str(e)}")
+            result = self._create_fallback_assessment(symptoms)
+        
+        yield "result", result.model_dump()
+    
+    def _rule_based_assessment(
+        self,
+        symptoms: List[str],
+        gestational_week: Optional[int],
+        previous_complications: Optional[bool],
+        additional_info: Optional[str]
+    ) -> RiskAssessmentResult:
+        """Assessment from the local rule engine, used when the LLM is unavailable"""
+        return _rule_based_assessment(symptoms, gestational_week, previous_complications, additional_info)
+    
     def _parse_fallback_response(self, response_text: str) -> Dict[str, Any]:
         """Parse response when JSON parsing fails"""
         # Simple heuristic parsing
@@ -248,6 +756,7 @@ class PregnancyRAGService:
     
     def _create_fallback_assessment(self, symptoms: List[str]) -> RiskAssessmentResult:
         """Create safe fallback assessment when all else fails"""
+        count_fallback("rag", "safe_default")
         return RiskAssessmentResult(
             riskLevel="moderate",
             confidence=0.5,
@@ -257,20 +766,117 @@ class PregnancyRAGService:
                 "Seek immediate medical attention if symptoms worsen or new symptoms develop",
                 "Do not ignore concerning symptoms during pregnancy"
             ],
-            reasoning="Unable to complete full AI assessment due to technical issues. Please consult with your healthcare provider for proper evaluation of your symptoms.",
-            urgency="within_24_hours"
+            reasoning=FALLBACK_REASONING,
+            urgency="within_24_hours",
+            engine="fallback"
         )
 
+def _is_assessment(result_dict: Dict[str, Any]) -> bool:
+    return "riskLevel" in result_dict
+
+def _rule_based_assessment(
+    symptoms: List[str],
+    gestational_week: Optional[int] = None,
+    previous_complications: Optional[bool] = None,
+    additional_info: Optional[str] = None
+) -> RiskAssessmentResult:
+    """Assessment from the local rule engine, marked so it is never cached as a RAG result"""
+    from huggingface_service import get_assessment_service
+    
+    result = get_assessment_service().assess_pregnancy_risk(
+        symptoms=symptoms,
+        gestational_week=gestational_week,
+        previous_complications=previous_complications,
+        additional_info=additional_info
+    )
+    return RiskAssessmentResult(
+        riskLevel=result.riskLevel,
+        confidence=result.confidence,
+        recommendations=result.recommendations,
+        reasoning=result.reasoning,
+        urgency=result.urgency,
+        engine="rules"
+    )
+
+def _cache_week_bucket(gestational_week: Optional[int]) -> Optional[int]:
+    """The exact week goes into the LLM prompt, so weeks are never bucketed"""
+    return gestational_week or None
+
+def _is_cacheable(result: Dict[str, Any]) -> bool:
+    """Don't cache fallbacks caused by transient retrieval or LLM failures"""
+    return result.get("engine") == "rag"
+
 # Global instance
 _rag_service_instance = None
+_rag_service_lock = threading.Lock()
+
+# Seconds after a failed warm-up before a request may start another
+WARMUP_RETRY_SECONDS = float(os.getenv("RAG_WARMUP_RETRY_SECONDS", 30))
+
+# Background warm-up: "cold" -> "warming" -> "ready" or "failed"
+_warmup: Dict[str, Any] = {"state": "cold", "error": None, "failedAt": None, "timings": {}}
+_warmup_lock = threading.Lock()
 
 def get_rag_service() -> PregnancyRAGService:
-    """Get singleton RAG service instance"""
+    """Get singleton RAG service instance, building it on first use"""
     global _rag_service_instance
     if _rag_service_instance is None:
-        _rag_service_instance = PregnancyRAGService()
+        with _rag_service_lock:
+            if _rag_service_instance is None:
+                _rag_service_instance = PregnancyRAGService()
+                _warmup["state"] = "ready"
     return _rag_service_instance
 
+def rag_service_ready() -> bool:
+    return _rag_service_instance is not None
+
+def _warm_up() -> None:
+    timings = _warmup["timings"]
+    try:
+        started = time.perf_counter()
+        _import_llama_index()
+        timings["importSeconds"] = round(time.perf_counter() - started, 3)
+        
+        started = time.perf_counter()
+        get_rag_service()
+        timings["initSeconds"] = round(time.perf_counter() - started, 3)
+        timings["timeToReadySeconds"] = round(time.perf_counter() - _IMPORTED_AT, 3)
+        logger.info(
+            f"RAG service ready {timings['timeToReadySeconds']}s after import "
+            f"(imports {timings['importSeconds']}s, model and index {timings['initSeconds']}s)"
+        )
+    except Exception as e:
+        _warmup["state"] = "failed"
+        _warmup["error"] = str(e)
+        _warmup["failedAt"] = time.monotonic()
+        logger.error(f"RAG service warm-up failed, rule engine stays in use: {e}")
+
+def start_warmup() -> None:
+    """
+    Build the RAG service on a background thread. Until it is ready the API
+    functions answer from the rule engine. Safe to call repeatedly.
+    """
+    with _warmup_lock:
+        if rag_service_ready() or _warmup["state"] == "warming":
+            return
+        if _warmup["state"] == "failed" and time.monotonic() - _warmup["failedAt"] < WARMUP_RETRY_SECONDS:
+            return
+        _warmup["state"] = "warming"
+        _warmup["timings"]["startedAfterImportSeconds"] = round(time.perf_counter() - _IMPORTED_AT, 3)
+    threading.Thread(target=_warm_up, name="rag-warmup", daemon=True).start()
+
+def warmup_status() -> Dict[str, Any]:
+    """Warm-up state and timings for /health"""
+    return {"state": "ready" if rag_service_ready() else _warmup["state"], "error": _warmup["error"], **_warmup["timings"]}
+
+def _rule_based_result(
+    symptoms: List[str],
+    gestational_week: Optional[int] = None,
+    previous_complications: Optional[bool] = None,
+    additional_info: Optional[str] = None
+) -> Dict[str, Any]:
+    return _rule_based_assessment(symptoms, gestational_week, previous_complications, additional_info).model_dump()
+
 # FastAPI integration functions
 def assess_pregnancy_risk_api(
     symptoms: List[str],
@@ -282,25 +888,42 @@ def assess_pregnancy_risk_api(
     API function for pregnancy risk assessment
     Returns dict compatible with existing frontend
     """
+    if not rag_service_ready():
+        # Still warming up: answer from the rule engine rather than block
+        start_warmup()
+        count_fallback("rag", "warming")
+        return _rule_based_result(symptoms, gestational_week, previous_complications, additional_info)
+    
     try:
         rag_service = get_rag_service()
-        result = rag_service.assess_pregnancy_risk(
-            symptoms=symptoms,
-            gestational_week=gestational_week,
-            previous_complications=previous_complications,
-            additional_info=additional_info
-        )
         
-        return {
-            "riskLevel": result.riskLevel,
-            "confidence": result.confidence,
-            "recommendations": result.recommendations,
-            "reasoning": result.reasoning,
-            "urgency": result.urgency
-        }
+        def assess() -> Dict[str, Any]:
+            count_assessment("rag")
+            with stage("rag", "total"):
+                result = rag_service.assess_pregnancy_risk(
+                    symptoms=symptoms,
+                    gestational_week=gestational_week,
+                    previous_complications=previous_complications,
+                    additional_info=additional_info
+                )
+            
+            return {
+                "riskLevel": result.riskLevel,
+                "confidence": result.confidence,
+                "recommendations": result.recommendations,
+                "reasoning": result.reasoning,
+                "urgency": result.urgency,
+                "engine": result.engine
+            }
+        
+        cache_key = assessment_cache_key(
+            symptoms, gestational_week, previous_complications, additional_info, _cache_week_bucket
+        )
+        return get_result_cache("rag").get_or_compute(cache_key, assess, cacheable=_is_cacheable)
         
     except Exception as e:
         logger.error(f"API assessment failed: {str(e)}")
+        count_fallback("rag", "api_error")
         # Return safe fallback
         return {
             "riskLevel": "moderate",
@@ -311,9 +934,83 @@ def assess_pregnancy_risk_api(
                 "Seek immediate medical attention if symptoms worsen"
             ],
             "reasoning": "Unable to complete AI assessment. Please consult with your healthcare provider for proper evaluation.",
-            "urgency": "within_24_hours"
+            "urgency": "within_24_hours",
+            "engine": "fallback"
         }
 
+def assess_pregnancy_risk_batch_api(requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    API function for batch pregnancy risk assessment
+    Each request holds assess_pregnancy_risk_api keyword arguments; results keep request order
+    """
+    if not rag_service_ready():
+        start_warmup()
+        count_fallback("rag", "warming")
+        return [_rule_based_result(**request) for request in requests]
+    
+    rag_service = get_rag_service()
+    
+    def assess_missing(positions: List[int]) -> List[Dict[str, Any]]:
+        count_assessment("rag", len(positions))
+        results = rag_service.assess_pregnancy_risk_batch([requests[p] for p in positions])
+        return [
+            {
+                "riskLevel": result.riskLevel,
+                "confidence": result.confidence,
+                "recommendations": result.recommendations,
+                "reasoning": result.reasoning,
+                "urgency": result.urgency,
+                "engine": result.engine
+            }
+            for result in results
+        ]
+    
+    cache_keys = [
+        assessment_cache_key(
+            request.get("symptoms", []),
+            request.get("gestational_week"),
+            request.get("previous_complications"),
+            request.get("additional_info"),
+            _cache_week_bucket
+        )
+        for request in requests
+    ]
+    return get_result_cache("rag").get_or_compute_many(cache_keys, assess_missing, cacheable=_is_cacheable)
+
+async def assess_pregnancy_risk_stream_api(
+    symptoms: List[str],
+    gestational_week: Optional[int] = None,
+    previous_complications: Optional[bool] = None,
+    additional_info: Optional[str] = None,
+    run_blocking: Optional[Callable[..., Awaitable[Any]]] = None
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    API function for streamed pregnancy risk assessment
+    Yields (event, data) pairs; a cached result is sent as the final result straight away
+    """
+    cache = get_result_cache("rag")
+    cache_key = assessment_cache_key(
+        symptoms, gestational_week, previous_complications, additional_info, _cache_week_bucket
+    )
+    cached = cache.get(cache_key)
+    if cached is not None:
+        yield "result", cached
+        return
+    
+    if not rag_service_ready():
+        start_warmup()
+        count_fallback("rag", "warming")
+        yield "result", _rule_based_result(symptoms, gestational_week, previous_complications, additional_info)
+        return
+    
+    rag_service = get_rag_service()
+    async for event, data in rag_service.assess_pregnancy_risk_stream(
+        symptoms, gestational_week, previous_complications, additional_info, run_blocking
+    ):
+        if event == "result" and _is_cacheable(data):
+            cache.put(cache_key, data)
+        yield event, data
+
 if __name__ == "__main__":
     # Test the RAG service
     try:
@@ -0,0 +1,175 @@
+"""
+LRU + TTL cache for assessment results keyed on normalized request input
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("ASSESS_CACHE_ENABLED", "true").lower() == "true"
+
+# Entries kept per engine before least recently used ones are evicted
+CACHE_MAX_ENTRIES = int(os.getenv("ASSESS_CACHE_MAX_ENTRIES", 10000))
+
+# Seconds an entry stays valid
+CACHE_TTL_SECONDS = float(os.getenv("ASSESS_CACHE_TTL", 3600))
+
+WeekBucket = Callable[[Optional[int]], Hashable]
+
+
+def assessment_cache_key(
+    symptoms: List[str],
+    gestational_week: Optional[int] = None,
+    previous_complications: Optional[bool] = None,
+    additional_info: Optional[str] = None,
+    week_bucket: Optional[WeekBucket] = None,
+    ordered: bool = False
+) -> Tuple:
+    """
+    Canonical key for an assessment request. Symptoms are compared as a
+    sorted lowercase list, or in request order for engines whose result
+    depends on it (ordered); week_bucket lets an engine collapse
+    gestational weeks its rules treat identically.
+    """
+    normalized = (s.strip().lower() for s in symptoms)
+    symptoms_key = tuple(normalized if ordered else sorted(normalized))
+    week_key = week_bucket(gestational_week) if week_bucket else gestational_week
+    additional_key = (
+        hashlib.sha256(additional_info.strip().encode("utf-8")).hexdigest()[:16]
+        if additional_info and additional_info.strip() else None
+    )
+    return (symptoms_key, week_key, bool(previous_complications), additional_key)
+
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Shallow copy with its own recommendations list, so callers can't mutate cached entries"""
+    copied = dict(result)
+    if isinstance(copied.get("recommendations"), list):
+        copied["recommendations"] = list(copied["recommendations"])
+    return copied
+
+
+class AssessmentCache:
+    """Thread-safe LRU cache with per-entry expiry and hit/miss counters"""
+
+    def __init__(self, name: str, max_entries: int = CACHE_MAX_ENTRIES, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return _copy_result(value)
+
+    def put(self, key: Hashable, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, _copy_result(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. after the knowledge base behind them changed"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+        logger.info(f"Assessment cache '{self.name}' invalidated")
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Dict[str, Any]],
+        cacheable: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Dict[str, Any]:
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        result = compute()
+        if cacheable is None or cacheable(result):
+            self.put(key, result)
+        return result
+
+    def get_or_compute_many(
+        self,
+        keys: List[Hashable],
+        compute_many: Callable[[List[int]], List[Dict[str, Any]]],
+        cacheable: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Resolve a batch: cached positions are filled from the cache and
+        compute_many is called once with the positions that missed.
+        """
+        results: List[Optional[Dict[str, Any]]] = [self.get(key) for key in keys]
+        missing = [position for position, result in enumerate(results) if result is None]
+        if missing:
+            for position, result in zip(missing, compute_many(missing)):
+                results[position] = result
+                if cacheable is None or cacheable(result):
+                    self.put(keys[position], result)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttlSeconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class _DisabledCache(AssessmentCache):
+    """Stand-in used when ASSESS_CACHE_ENABLED=false; never stores anything"""
+
+    def put(self, key: Hashable, value: Dict[str, Any]) -> None:
+        pass
+
+
+# One cache per assessment engine
+_caches: Dict[str, AssessmentCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_result_cache(engine: str) -> AssessmentCache:
+    """Get the singleton result cache for an assessment engine"""
+    with _caches_lock:
+        if engine not in _caches:
+            _caches[engine] = AssessmentCache(engine) if CACHE_ENABLED else _DisabledCache(engine)
+        return _caches[engine]
+
+
+def all_cache_stats() -> Dict[str, Dict[str, Any]]:
+    with _caches_lock:
+        caches = dict(_caches)
+    return {engine: cache.stats() for engine, cache in caches.items()}
@@ -6,6 +6,8 @@ import { spawn } from "child_process";
 import { promisify } from "util";
 import fetch from "node-fetch";
 import { nanoid } from "nanoid";
+import fs from "fs";
+import path from "path";
 
 // HF RAG assessment function
 async function assessWithHFRAG(
@@ -59,6 +61,50 @@ async function assessWithHFRAG(
   return assessWithRules(symptoms, gestationalWeek, previousComplications, additionalSymptoms);
 }
 
+interface RiskRule {
+  name: string;
+  terms: string[];
+  minTerms: number;
+}
+
+interface RiskRules {
+  groups: Record<string, { weight: number; once: boolean; rules: RiskRule[] }>;
+  bands: { level: string; minScore: number; urgency: string }[];
+}
+
+// Rules exported from server/knowledge_base/risk_rules.txt by `npm run rules:export`
+function loadRiskRules(): RiskRules {
+  const rulesPath = process.env.RISK_RULES_PATH || path.resolve(process.cwd(), "server", "risk_rules.json");
+  let rules: RiskRules;
+  try {
+    rules = JSON.parse(fs.readFileSync(rulesPath, "utf-8")) as RiskRules;
+  } catch (error) {
+    throw new Error(`Risk rules could not be loaded from ${rulesPath} (run \`npm run rules:export\`): ${error}`);
+  }
+  for (const group of ["fallback_high_risk_patterns", "fallback_medium_risk_patterns"]) {
+    if (!rules.groups?.[group]) {
+      throw new Error(`Risk rules in ${rulesPath} have no ${group} group`);
+    }
+  }
+  for (const level of ["high", "moderate"]) {
+    if (!rules.bands?.some(band => band.level === level)) {
+      throw new Error(`Risk rules in ${rulesPath} have no ${level} band`);
+    }
+  }
+  return rules;
+}
+
+const riskRules = loadRiskRules();
+
+function scoreRuleGroup(group: string, symptomsText: string): number {
+  const ruleGroup = riskRules.groups[group];
+  const matched = ruleGroup.rules.filter(
+    rule => rule.terms.filter(term => symptomsText.includes(term)).length >= rule.minTerms
+  ).length;
+  if (matched === 0) return 0;
+  return ruleGroup.once ? ruleGroup.weight : ruleGroup.weight * matched;
+}
+
 // Rule-based fallback assessment
 function assessWithRules(
   symptoms: string[],
@@ -69,33 +115,11 @@ function assessWithRules(
   let riskScore = 0;
   const recommendations: string[] = [];
   
-  // High risk patterns
-  const highRiskPatterns = [
-    ['heavy', 'bleeding'], ['severe', 'pain'], ['no', 'movement'],
-    ['vision', 'changes'], ['severe', 'headache'], ['high', 'fever']
-  ];
-  
-  // Medium risk patterns  
-  const mediumRiskPatterns = [
-    ['persistent', 'vomiting'], ['light', 'bleeding'], ['headache'],
-    ['decreased', 'movement'], ['spotting']
-  ];
-
   const symptomsText = symptoms.join(' ').toLowerCase();
   
-  // Check for high risk patterns
-  for (const pattern of highRiskPatterns) {
-    if (pattern.every(word => symptomsText.includes(word))) {
-      riskScore += 3;
-    }
-  }
-  
-  // Check for medium risk patterns
-  for (const pattern of mediumRiskPatterns) {
-    if (pattern.every(word => symptomsText.includes(word))) {
-      riskScore += 2;
-    }
-  }
+  // Score high and medium risk patterns with the exported knowledge-base rules
+  riskScore += scoreRuleGroup('fallback_high_risk_patterns', symptomsText);
+  riskScore += scoreRuleGroup('fallback_medium_risk_patterns', symptomsText);
 
   // Adjust for gestational week and complications
   if (gestationalWeek && gestationalWeek < 12 && symptomsText.includes('bleeding')) {
@@ -110,13 +134,16 @@ function assessWithRules(
   let urgency: string;
   let confidence: number;
 
-  if (riskScore >= 6) {
+  const highMinScore = riskRules.bands.find(band => band.level === "high")!.minScore;
+  const moderateMinScore = riskRules.bands.find(band => band.level === "moderate")!.minScore;
+
+  if (riskScore >= highMinScore) {
     riskLevel = "high";
     urgency = "immediate";
     confidence = 0.85;
     recommendations.push("Seek immediate medical attention - go to emergency room");
     recommendations.push("Do not delay medical care");
-  } else if (riskScore >= 3) {
+  } else if (riskScore >= moderateMinScore) {
     riskLevel = "moderate";
     urgency = "within_24_hours";
     confidence = 0.75;
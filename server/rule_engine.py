@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Declarative risk rules compiled from the knowledge base
+
+knowledge_base/risk_rules.txt holds rule groups (term patterns with a score
+weight) and risk bands. They are compiled once into a RuleSet: every term
+gets a bit, every rule a bitmask, so evaluating a request is one automaton
+pass to collect the present terms followed by a few integer operations per
+rule. The file is the only hand-edited copy of the rules. The Node
+fallback in routes.ts reads them as the committed risk_rules.json, which
+tests/test_rule_engine.py checks is current; regenerate it after editing
+the rules with:
+
+    npm run rules:export
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from pattern_matcher import AhoCorasick
+
+logger = logging.getLogger(__name__)
+
+RISK_RULES_FILE = "risk_rules.txt"
+
+# The shipped rule file, next to this module
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base", RISK_RULES_FILE)
+
+_SECTION = re.compile(r"^([A-Z][A-Z /]*?)\s*(?:\(\+(\d+)(\s+once)?\))?:\s*$")
+_ANY = re.compile(r"\(any\s+(\d+)\)\s*$", re.IGNORECASE)
+_BAND = re.compile(r"^(\w+):\s*(\d+)\+\s+(\w+)$")
+
+
+class RuleError(ValueError):
+    """The rule file could not be compiled"""
+
+
+class Rule(NamedTuple):
+    name: str
+    terms: Tuple[str, ...]
+    min_terms: int  # how many of the terms must appear
+
+
+class RuleGroup(NamedTuple):
+    name: str  # e.g. "high_risk_patterns"
+    weight: int
+    once: bool  # weight counts once for the group rather than once per matching rule
+    rules: Tuple[Rule, ...]
+
+
+class RiskBand(NamedTuple):
+    level: str
+    min_score: int
+    urgency: str
+
+
+class RuleEvaluation(NamedTuple):
+    score: int
+    hits: Dict[str, List[str]]  # group name -> names of the rules that matched
+
+
+def _section_key(title: str) -> str:
+    return title.strip().lower().replace(' ', '_')
+
+
+def parse_rules(content: str) -> Tuple[List[RuleGroup], List[RiskBand]]:
+    """Parse rule groups and risk bands from risk_rules.txt syntax"""
+    groups: List[RuleGroup] = []
+    bands: List[RiskBand] = []
+    section: Optional[str] = None
+    header: Tuple[int, bool] = (0, False)
+    rules: List[Rule] = []
+
+    def close_section():
+        if section and section != "risk_bands":
+            groups.append(RuleGroup(section, header[0], header[1], tuple(rules)))
+
+    for line_number, raw_line in enumerate(content.split('\n'), 1):
+        line = raw_line.strip()
+        match = _SECTION.match(line)
+        if match:
+            close_section()
+            section = _section_key(match.group(1))
+            header = (int(match.group(2) or 0), bool(match.group(3)))
+            rules = []
+            continue
+        if section is None or not line.startswith('-'):
+            continue
+
+        body = line[1:].strip()
+        if section == "risk_bands":
+            band = _BAND.match(body)
+            if not band:
+                raise RuleError(f"line {line_number}: expected '- level: N+ urgency', got {body!r}")
+            bands.append(RiskBand(band.group(1), int(band.group(2)), band.group(3)))
+            continue
+
+        name = None
+        if '=' in body:
+            name, body = (part.strip() for part in body.split('=', 1))
+        min_terms = None
+        any_clause = _ANY.search(body)
+        if any_clause:
+            min_terms = int(any_clause.group(1))
+            body = body[:any_clause.start()].strip()
+        terms = tuple(term.strip().lower() for term in body.split('+') if term.strip())
+        if not terms:
+            raise RuleError(f"line {line_number}: rule has no terms")
+        rules.append(Rule(name or ' + '.join(terms), terms, min(min_terms or len(terms), len(terms))))
+
+    close_section()
+    return groups, sorted(bands, key=lambda band: -band.min_score)
+
+
+class RuleSet:
+    """
+    Immutable compiled rules. Terms are numbered across all groups and a
+    text is reduced to the bitset of terms it contains; a rule matches when
+    enough of its mask bits are set. Only rules using a term the text
+    contains are checked.
+    """
+
+    def __init__(self, groups: Iterable[RuleGroup], bands: Iterable[RiskBand]):
+        self.groups: Tuple[RuleGroup, ...] = tuple(groups)
+        self.bands: Tuple[RiskBand, ...] = tuple(sorted(bands, key=lambda band: -band.min_score))
+        self._groups_by_name = {group.name: group for group in self.groups}
+
+        self._automaton = AhoCorasick(term for group in self.groups for rule in group.rules for term in rule.terms)
+        term_bits = {term: 1 << term_id for term_id, term in enumerate(self._automaton.terms)}
+        self._masks: Dict[str, Tuple[Tuple[int, int, bool, str], ...]] = {}
+        for group in self.groups:
+            compiled = []
+            for rule in group.rules:
+                mask = 0
+                for term in rule.terms:
+                    mask |= term_bits[term]
+                compiled.append((mask, rule.min_terms, rule.min_terms == len(rule.terms), rule.name))
+            self._masks[group.name] = tuple(compiled)
+
+        # All rules in definition order, and term id -> indexes of the rules that use it
+        self._rules: Tuple[Tuple[str, int, int, bool, str], ...] = tuple(
+            (group_name, *compiled) for group_name, masks in self._masks.items() for compiled in masks
+        )
+        self._term_rules: List[List[int]] = [[] for _ in self._automaton.terms]
+        for rule_index, (_, mask, _, _, _) in enumerate(self._rules):
+            for term_id in range(mask.bit_length()):
+                if mask >> term_id & 1:
+                    self._term_rules[term_id].append(rule_index)
+
+    def __contains__(self, group: str) -> bool:
+        return group in self._groups_by_name
+
+    def features(self, text: str) -> int:
+        """Bitset of the rule terms that occur in text"""
+        present = 0
+        for _, term_id in self._automaton.finditer(text):
+            present |= 1 << term_id
+        return present
+
+    def evaluate(self, text: str, groups: Optional[Sequence[str]] = None) -> RuleEvaluation:
+        """Score text against the named rule groups (all groups by default)"""
+        present = 0
+        candidates = set()
+        for _, term_id in self._automaton.finditer(text):
+            bit = 1 << term_id
+            if not present & bit:
+                present |= bit
+                candidates.update(self._term_rules[term_id])
+
+        hits: Dict[str, List[str]] = {
+            group_name: [] for group_name in (groups if groups is not None else self._groups_by_name)
+        }
+        for rule_index in sorted(candidates):
+            group_name, mask, min_terms, require_all, name = self._rules[rule_index]
+            if group_name not in hits:
+                continue
+            common = present & mask
+            if (common == mask) if require_all else common.bit_count() >= min_terms:
+                hits[group_name].append(name)
+
+        score = 0
+        for group_name, matched in hits.items():
+            group = self._groups_by_name[group_name]
+            if matched:
+                score += group.weight if group.once else group.weight * len(matched)
+        return RuleEvaluation(score, hits)
+
+    def group_masks(self, group: str) -> List[Tuple[str, int, int]]:
+        """(rule name, term bitmask, min_terms) for each rule in a group, for callers scoring features() in bulk"""
+        return [(name, mask, min_terms) for mask, min_terms, _, name in self._masks[group]]
+
+    def band(self, score: int) -> RiskBand:
+        """Highest risk band whose threshold the score reaches"""
+        for band in self.bands:
+            if score >= band.min_score:
+                return band
+        return self.bands[-1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form consumed by the Node fallback"""
+        return {
+            "terms": list(self._automaton.terms),
+            "groups": {
+                group.name: {
+                    "weight": group.weight,
+                    "once": group.once,
+                    "rules": [
+                        {"name": rule.name, "terms": list(rule.terms), "minTerms": rule.min_terms}
+                        for rule in group.rules
+                    ]
+                }
+                for group in self.groups
+            },
+            "bands": [
+                {"level": band.level, "minScore": band.min_score, "urgency": band.urgency}
+                for band in self.bands
+            ]
+        }
+
+
+def compile_rules(content: str) -> RuleSet:
+    groups, bands = parse_rules(content)
+    if not bands:
+        raise RuleError("rule file defines no RISK BANDS")
+    return RuleSet(groups, bands)
+
+
+def load_rule_set(path: str = DEFAULT_RULES_PATH) -> RuleSet:
+    """Compile the knowledge-base rule file; raises RuleError if it is missing or invalid"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError as e:
+        raise RuleError(f"cannot read risk rules from {path}: {e}") from e
+    try:
+        rule_set = compile_rules(content)
+    except RuleError as e:
+        raise RuleError(f"invalid risk rules in {path}: {e}") from e
+    logger.info(f"Compiled {sum(len(g.rules) for g in rule_set.groups)} risk rules from {path}")
+    return rule_set
+
+
+_rule_set: Optional[RuleSet] = None
+_rule_set_lock = threading.Lock()
+
+
+def get_rule_set() -> RuleSet:
+    """Get the rule set shared by every assessment service in the process"""
+    global _rule_set
+    with _rule_set_lock:
+        if _rule_set is None:
+            _rule_set = load_rule_set()
+        return _rule_set
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile and export the knowledge-base risk rules")
+    parser.add_argument("--rules", default=DEFAULT_RULES_PATH, help=f"Rule file (default: knowledge_base/{RISK_RULES_FILE})")
+    parser.add_argument("--export", help="Write the compiled rules as JSON to this path ('-' for stdout)")
+    args = parser.parse_args()
+
+    rule_set = load_rule_set(args.rules)
+
+    document = json.dumps(rule_set.to_dict(), indent=2) + "\n"
+    if args.export and args.export != "-":
+        with open(args.export, 'w', encoding='utf-8') as f:
+            f.write(document)
+        print(f"Exported {sum(len(g.rules) for g in rule_set.groups)} rules to {args.export}")
+    else:
+        print(document, end="")
+
+
+if __name__ == "__main__":
+    main()
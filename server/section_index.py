@@ -0,0 +1,74 @@
+import heapq
+import math
+import re
+from typing import Dict, Iterable, List, Tuple
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _stem(token: str) -> str:
+    """Crude plural folding so "headaches" and "headache" share a term"""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric terms with plural folding"""
+    return [_stem(token) for token in _TOKEN_PATTERN.findall(text.lower())]
+
+
+class BM25SectionIndex:
+    """
+    Knowledge-base sections tokenized once into an inverted index and
+    ranked with Okapi BM25. A search touches only the postings of the
+    query terms, so its cost does not grow with the number of sections
+    that share no term with the query.
+    """
+
+    def __init__(self, sections: Iterable[str], k1: float = 1.5, b: float = 0.75):
+        self.sections: List[str] = list(sections)
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._lengths: List[int] = []
+
+        for idx, section in enumerate(self.sections):
+            terms = tokenize(section)
+            self._lengths.append(len(terms))
+            counts: Dict[str, int] = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                self._postings.setdefault(term, []).append((idx, tf))
+
+        count = len(self.sections)
+        average_length = sum(self._lengths) / count if count else 0.0
+        self._idf = {
+            term: math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in self._postings.items()
+        }
+        # Per-section length normalisation, folded into the denominator at search time
+        self._norms = [
+            self.k1 * (1 - self.b + self.b * length / average_length) if average_length else self.k1
+            for length in self._lengths
+        ]
+
+    def __len__(self) -> int:
+        return len(self.sections)
+
+    def search(self, query: str, top_k: int = 5) -> List[int]:
+        """Indices of the top_k highest scoring sections, best first"""
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for idx, tf in self._postings[term]:
+                scores[idx] = scores.get(idx, 0.0) + idf * tf * (self.k1 + 1) / (tf + self._norms[idx])
+
+        # Ties keep document order
+        return [idx for idx, _ in heapq.nsmallest(top_k, scores.items(), key=lambda item: (-item[1], item[0]))]
+
+    def top_sections(self, query: str, top_k: int = 5) -> List[str]:
+        return [self.sections[idx] for idx in self.search(query, top_k)]
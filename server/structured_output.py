@@ -0,0 +1,228 @@
+"""
+Structured output for LLM JSON responses
+
+JsonObjectScanner follows a generation chunk by chunk and reports the
+moment the first acceptable top-level JSON object closes, so the caller
+can stop generating instead of waiting for the model's closing remarks.
+parse_json_object reads that object and, when json.loads rejects it,
+repairs the usual malformations (code fences, single quotes, bare keys
+and values, Python literals, comments, missing or trailing commas,
+truncated output) rather than asking the model again.
+"""
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+_STRUCTURAL = re.compile(r"[\"'\\{}]")
+_NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_\-]*")
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false", "None": "null"}
+_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+_decoder = json.JSONDecoder()
+
+
+class JsonObjectScanner:
+    """
+    Incremental brace matcher over streamed text. feed() returns True once
+    a top-level object has closed and accept() (default: any dict) took its
+    parsed value, which is then available as .result; objects accept()
+    rejects are skipped and scanning continues.
+    """
+
+    def __init__(self, accept: Optional[Callable[[Dict[str, Any]], bool]] = None):
+        self.accept = accept
+        self.text = ""
+        self.result: Optional[Dict[str, Any]] = None
+        self._start: Optional[int] = None
+        self._depth = 0
+        self._quote: Optional[str] = None
+        # Position of the character a backslash escapes, which may be in the next chunk
+        self._escaped_at = -1
+
+    def feed(self, chunk: str) -> bool:
+        if self.result is not None:
+            return True
+        offset = len(self.text)
+        self.text += chunk
+        for match in _STRUCTURAL.finditer(chunk):
+            char = match.group()
+            position = offset + match.start()
+            if position == self._escaped_at:
+                continue
+            if self._start is None:
+                if char == "{":
+                    self._start, self._depth = position, 1
+                continue
+            if self._quote is not None:
+                if char == "\\":
+                    self._escaped_at = position + 1
+                elif char == self._quote:
+                    self._quote = None
+            elif char in "\"'":
+                self._quote = char
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0 and self._close(offset + match.end()):
+                    return True
+        return False
+
+    def _close(self, end: int) -> bool:
+        value = parse_json_object(self.text[self._start:end])
+        self._start = None
+        if value is not None and (self.accept is None or self.accept(value)):
+            self.result = value
+            return True
+        return False
+
+
+def _read_string(text: str, start: int, out: List[str]) -> int:
+    """Copy the string opening at text[start] as a JSON string; returns the index after it"""
+    quote = text[start]
+    i = start + 1
+    out.append('"')
+    while i < len(text) and text[i] != quote:
+        char = text[i]
+        if char == "\\" and i + 1 < len(text):
+            # \' is not a JSON escape
+            out.append("'" if text[i + 1] == "'" else text[i:i + 2])
+            i += 2
+            continue
+        out.append('\\"' if char == '"' else _ESCAPES.get(char, char))
+        i += 1
+    out.append('"')
+    return i + 1
+
+
+def repair_json(text: str) -> Optional[str]:
+    """
+    Best-effort rewrite of the first JSON-like object in text into valid
+    JSON, or None if there is no object. Missing values become null and
+    unclosed strings, arrays and objects are closed.
+    """
+    i = text.find("{")
+    if i == -1:
+        return None
+    out: List[str] = []
+    # One [container, state, needs_comma] per open container; states are
+    # "key", "colon", "value" and "next" (a value just ended)
+    stack: List[list] = []
+
+    def begin_value() -> None:
+        level = stack[-1]
+        if level[0] == "{" and level[1] in ("key", "next"):
+            # A string where a key belongs is the next key
+            return
+        if level[1] == "colon":
+            out.append(":")
+        elif level[1] == "next" or level[2]:
+            out.append(",")
+        level[1], level[2] = "next", False
+
+    def begin_key() -> None:
+        level = stack[-1]
+        if level[1] == "next" or level[2]:
+            out.append(",")
+        level[1], level[2] = "colon", False
+
+    while i < len(text):
+        char = text[i]
+        level = stack[-1] if stack else None
+        if level is None and char != "{":
+            break
+        if char in "\"'":
+            if level[0] == "{" and level[1] in ("key", "next"):
+                begin_key()
+            else:
+                begin_value()
+            i = _read_string(text, i, out)
+            continue
+        if char in "{[":
+            if level is not None:
+                begin_value()
+            out.append(char)
+            stack.append([char, "key" if char == "{" else "value", False])
+        elif char in "}]":
+            if level[0] == "{" and level[1] == "colon":
+                out.append(":null")
+            elif level[0] == "{" and level[1] == "value":
+                out.append("null")
+            out.append("}" if level[0] == "{" else "]")
+            stack.pop()
+            if not stack:
+                break
+        elif char == ":":
+            if level[0] == "{" and level[1] == "colon":
+                out.append(":")
+                level[1] = "value"
+        elif char == ",":
+            if level[0] == "{" and level[1] == "value":
+                out.append("null")
+                level[1] = "next"
+            if level[1] == "next":
+                level[1] = "key" if level[0] == "{" else "value"
+                level[2] = True
+        elif (char == "/" and text.startswith("//", i)) or char == "#":
+            newline = text.find("\n", i)
+            i = len(text) if newline == -1 else newline
+            continue
+        elif char == "/" and text.startswith("/*", i):
+            close = text.find("*/", i + 2)
+            i = len(text) if close == -1 else close + 2
+            continue
+        elif char == "-" or char == "." or char.isdigit():
+            match = _NUMBER.match(text, i)
+            if match:
+                begin_value()
+                number = match.group().rstrip(".eE+-") or "0"
+                out.append(re.sub(r"^(-?)\.", r"\g<1>0.", number))
+                i = match.end()
+                continue
+        elif char.isalpha() or char == "_":
+            word = _WORD.match(text, i).group()
+            if level[0] == "{" and level[1] in ("key", "next"):
+                begin_key()
+                out.append(json.dumps(word))
+                i += len(word)
+                continue
+            begin_value()
+            if word in _LITERALS:
+                out.append(_LITERALS[word])
+                i += len(word)
+                continue
+            # A bare value runs to the end of the line or the next delimiter
+            end = i
+            while end < len(text) and text[end] not in ",}]\n":
+                end += 1
+            out.append(json.dumps(text[i:end].strip()))
+            i = end
+            continue
+        i += 1
+
+    # Truncated output: finish the open members and close what is still open
+    while stack:
+        container, state, _ = stack.pop()
+        if container == "{" and state == "colon":
+            out.append(":null")
+        elif container == "{" and state == "value":
+            out.append("null")
+        out.append("}" if container == "{" else "]")
+    return "".join(out)
+
+
+def parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """The first JSON object in text, repaired if needed; None if there is none"""
+    start = text.find("{")
+    if start == -1:
+        return None
+    try:
+        value, _ = _decoder.raw_decode(text, start)
+    except ValueError:
+        repaired = repair_json(text[start:])
+        try:
+            value = json.loads(repaired) if repaired else None
+        except ValueError:
+            return None
+    return value if isinstance(value, dict) else None
@@ -0,0 +1,135 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Severity qualifiers stripped from both sides before comparing symptom terms
+SEVERITY_WORDS = ("severe", "mild", "heavy")
+
+# Words that never count as a meaningful overlap on their own
+STOP_WORDS = frozenset(["and", "or", "the", "a", "an", "in", "on", "at", "with"])
+
+# Longest character n-gram kept in the substring index
+_MAX_GRAM = 3
+
+
+def strip_severity(text: str) -> str:
+    """Remove severity qualifiers from an already lowercased symptom"""
+    for word in SEVERITY_WORDS:
+        text = text.replace(word, "")
+    return text.strip()
+
+
+def _grams(text: str, size: int) -> Set[str]:
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class SymptomIndex:
+    """
+    Knowledge-base symptom entries compiled into an inverted index.
+
+    A symptom matches an entry that shares a non-stop-word term with it or
+    whose cleaned phrase contains, or is contained in, the symptom's,
+    unless severity rules it out: a "severe" entry needs a severe or heavy
+    symptom and a "mild" entry excludes one. Everything that depends only
+    on the knowledge base is computed once here, so a lookup costs time
+    proportional to the user symptom rather than to the number of entries.
+    """
+
+    def __init__(self, entries: Iterable[str]):
+        self.entries: List[str] = list(entries)
+        self._clean: List[str] = []
+        self._requires_severe: List[bool] = []
+        self._is_mild: List[bool] = []
+        self._token_postings: Dict[str, List[int]] = {}
+        self._gram_postings: Dict[str, Set[int]] = {}
+        # Entries whose cleaned text is a single gram, and the distinct longest grams of the rest
+        self._short_entries: Dict[str, List[int]] = {}
+        self._gram_counts: List[int] = []
+
+        for idx, entry in enumerate(self.entries):
+            entry_lower = entry.lower().strip()
+            clean = strip_severity(entry_lower)
+            self._clean.append(clean)
+            self._requires_severe.append("severe" in entry_lower)
+            self._is_mild.append("mild" in entry_lower)
+
+            for token in set(clean.split()):
+                if token not in STOP_WORDS:
+                    self._token_postings.setdefault(token, []).append(idx)
+
+            for size in range(1, _MAX_GRAM + 1):
+                for gram in _grams(clean, size):
+                    self._gram_postings.setdefault(gram, set()).add(idx)
+            if len(clean) <= _MAX_GRAM:
+                self._short_entries.setdefault(clean, []).append(idx)
+            self._gram_counts.append(len(_grams(clean, _MAX_GRAM)))
+        self._short_sizes = sorted({len(clean) for clean in self._short_entries})
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _substring_candidates(self, user_clean: str, user_grams: Set[str]) -> Set[int]:
+        """Entries whose cleaned text contains user_clean"""
+        if not user_clean:
+            return set(range(len(self.entries)))
+        if len(user_clean) <= _MAX_GRAM:
+            return set(self._gram_postings.get(user_clean, ()))
+
+        postings = []
+        for gram in user_grams:
+            posting = self._gram_postings.get(gram)
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return candidates
+        return {idx for idx in candidates if user_clean in self._clean[idx]}
+
+    def _contained_candidates(self, user_clean: str, user_grams: Set[str]) -> Set[int]:
+        """Entries whose cleaned text is contained in user_clean"""
+        candidates: Set[int] = set()
+        for size in self._short_sizes:
+            # Size 0 yields the empty gram, contained in every symptom
+            for gram in _grams(user_clean, size):
+                candidates.update(self._short_entries.get(gram, ()))
+
+        # A longer entry can only be contained if every one of its grams occurs in user_clean
+        shared: Dict[int, int] = {}
+        for gram in user_grams:
+            for idx in self._gram_postings.get(gram, ()):
+                shared[idx] = shared.get(idx, 0) + 1
+        candidates.update(
+            idx for idx, count in shared.items()
+            if count == self._gram_counts[idx] and self._clean[idx] in user_clean
+        )
+        return candidates
+
+    def matches(self, symptom: str) -> List[int]:
+        """Indices of every entry matching the symptom, in knowledge-base order"""
+        user_lower = symptom.lower().strip()
+        user_severe = "severe" in user_lower or "heavy" in user_lower
+        user_clean = strip_severity(user_lower)
+
+        candidates: Set[int] = set()
+        for token in set(user_clean.split()):
+            if token not in STOP_WORDS:
+                candidates.update(self._token_postings.get(token, ()))
+        user_grams = _grams(user_clean, _MAX_GRAM)
+        candidates |= self._substring_candidates(user_clean, user_grams)
+        candidates |= self._contained_candidates(user_clean, user_grams)
+
+        return [
+            idx for idx in sorted(candidates)
+            if not (self._requires_severe[idx] and not user_severe)
+            and not (self._is_mild[idx] and user_severe)
+        ]
+
+    def first_match(self, symptom: str) -> Optional[str]:
+        """First knowledge-base entry matching the symptom, if any"""
+        found = self.matches(symptom)
+        return self.entries[found[0]] if found else None
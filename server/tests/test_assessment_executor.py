@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+import assessment_executor
+from assessment_executor import AssessmentExecutor, ExecutorSaturatedError
+
+REQUEST = {"symptoms": ["severe headache", "blurred vision"], "gestationalWeek": 30}
+
+
+async def _until(predicate, timeout=5.0):
+    async def poll():
+        while not predicate():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+def test_full_pool_rejects_then_admits_again():
+    async def scenario():
+        executor = AssessmentExecutor(max_workers=1, max_queue=1)
+        release = threading.Event()
+        held = [asyncio.create_task(executor.run(release.wait)) for _ in range(2)]
+        await _until(lambda: executor.in_flight == 2)
+
+        assert executor.saturated
+        with pytest.raises(ExecutorSaturatedError, match="2/2 in flight"):
+            await executor.run(lambda: None)
+
+        release.set()
+        assert await asyncio.gather(*held) == [True, True]
+        assert executor.in_flight == 0
+        assert await executor.run(lambda: "ok") == "ok"
+        executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_waiter_wakes_when_a_job_finishes():
+    async def scenario():
+        executor = AssessmentExecutor(max_workers=1, max_queue=0)
+        release = threading.Event()
+        held = asyncio.create_task(executor.run(release.wait))
+        await _until(lambda: executor.in_flight == 1)
+
+        waiter = asyncio.create_task(executor.run_when_available(lambda: "ran"))
+        await asyncio.sleep(0.1)
+        assert not waiter.done()
+        assert executor.in_flight == 1
+
+        release.set()
+        assert await asyncio.wait_for(waiter, 5) == "ran"
+        assert await held is True
+        assert executor.in_flight == 0
+        executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_server_answers_503_while_saturated(monkeypatch):
+    import hf_server
+
+    executor = AssessmentExecutor(max_workers=1, max_queue=0)
+    monkeypatch.setattr(assessment_executor, "_executor_instance", executor)
+    release = threading.Event()
+    real_assess = hf_server.assess_pregnancy_risk_api
+
+    def blocking_assess(**kwargs):
+        release.wait()
+        return real_assess(**kwargs)
+
+    monkeypatch.setattr(hf_server, "assess_pregnancy_risk_api", blocking_assess)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=hf_server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.post("/assess", json=REQUEST))
+            await _until(lambda: executor.in_flight == 1)
+
+            rejected = await client.post("/assess", json=REQUEST)
+            assert rejected.status_code == 503
+            assert rejected.headers["Retry-After"] == "1"
+
+            release.set()
+            assert (await first).status_code == 200
+            assert (await client.post("/assess", json=REQUEST)).status_code == 200
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        executor.shutdown()
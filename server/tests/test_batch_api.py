@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import batch_api
+import hf_server
+from result_cache import get_result_cache
+
+REQUESTS = [
+    {"symptoms": ["severe headache", "blurred vision"], "gestationalWeek": 30},
+    {"symptoms": ["mild nausea"], "gestationalWeek": 10},
+    {"symptoms": ["bleeding", "severe abdominal pain"], "gestationalWeek": 20, "previousComplications": True},
+    {"symptoms": ["severe headache", "blurred vision"], "gestationalWeek": 30},
+    {"symptoms": ["swelling"], "gestationalWeek": 34, "additionalSymptoms": "feet and ankles"},
+    {"symptoms": ["mild nausea"], "gestationalWeek": 10},
+    {"symptoms": ["fever"], "gestationalWeek": 22},
+]
+
+
+@pytest.fixture
+def client():
+    get_result_cache("rules").clear()
+    yield TestClient(hf_server.app)
+    get_result_cache("rules").clear()
+
+
+def _single_results(client):
+    results = []
+    for request in REQUESTS:
+        get_result_cache("rules").clear()
+        response = client.post("/assess", json=request)
+        assert response.status_code == 200
+        results.append(response.json())
+    get_result_cache("rules").clear()
+    return results
+
+
+def test_batch_matches_single_calls_in_order(client):
+    expected = _single_results(client)
+    response = client.post("/assess/batch", json=REQUESTS)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [item["index"] for item in results] == list(range(len(REQUESTS)))
+    assert [item["error"] for item in results] == [None] * len(REQUESTS)
+    assert [item["result"] for item in results] == expected
+    # Duplicates get the same answer as their first occurrence
+    assert results[3]["result"] == results[0]["result"]
+    assert results[5]["result"] == results[1]["result"]
+
+
+def test_batch_reports_invalid_items_in_place(client):
+    expected = _single_results(client)
+    items = [REQUESTS[0], {"gestationalWeek": 30}, "not an object", REQUESTS[1]]
+    results = client.post("/assess/batch", json=items).json()["results"]
+    assert [item["index"] for item in results] == [0, 1, 2, 3]
+    assert results[0]["result"] == expected[0]
+    assert results[1]["error"].startswith("Invalid request")
+    assert results[2]["error"].startswith("Invalid request")
+    assert results[3]["result"] == expected[1]
+
+
+def test_batch_size_limit(client, monkeypatch):
+    monkeypatch.setattr(batch_api, "MAX_BATCH_SIZE", 2)
+    assert client.post("/assess/batch", json=REQUESTS[:3]).status_code == 413
+
+
+def test_stream_matches_single_calls_in_order(client, monkeypatch):
+    # Small chunks so results span several flushes
+    monkeypatch.setattr(batch_api, "NDJSON_CHUNK_SIZE", 3)
+    expected = _single_results(client)
+    lines = [json.dumps(request) for request in REQUESTS]
+    lines.insert(4, "{not json")
+    body = "\n".join(lines[:2]) + "\n\n" + "\n".join(lines[2:]) + "\n"
+
+    response = client.post(
+        "/assess/batch/stream", content=body, headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [item["index"] for item in results] == list(range(len(lines)))
+    assert results[4]["error"].startswith("Invalid JSON")
+    del results[4]
+    assert [item["result"] for item in results] == expected
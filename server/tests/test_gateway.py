@@ -0,0 +1,82 @@
+import importlib
+import sys
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+REQUEST = {"symptoms": ["severe headache", "blurred vision"], "gestationalWeek": 30}
+
+
+def _load_gateway(monkeypatch, **env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delitem(sys.modules, "gateway", raising=False)
+    return importlib.import_module("gateway")
+
+
+def test_default_engine_must_be_enabled(monkeypatch):
+    with pytest.raises(ValueError, match="GATEWAY_DEFAULT_ENGINE 'kb'"):
+        _load_gateway(monkeypatch, GATEWAY_ENGINES="rules,rag", GATEWAY_DEFAULT_ENGINE="kb")
+
+
+def test_hedged_default_needs_rules_and_rag(monkeypatch):
+    with pytest.raises(ValueError):
+        _load_gateway(monkeypatch, GATEWAY_ENGINES="rules,kb", GATEWAY_DEFAULT_ENGINE="hedged")
+    gateway = _load_gateway(monkeypatch, GATEWAY_ENGINES="rules,rag", GATEWAY_DEFAULT_ENGINE="hedged")
+    assert gateway.DEFAULT_ENGINE == "hedged"
+
+
+def test_rag_answered_by_rules_while_warming(monkeypatch):
+    gateway = _load_gateway(monkeypatch, GATEWAY_ENGINES="rules,rag", GATEWAY_DEFAULT_ENGINE="rules")
+    # Keep the RAG service cold so the rule engine stands in
+    monkeypatch.setattr(gateway.rag_service, "start_warmup", lambda: None)
+    client = TestClient(gateway.app)
+
+    response = client.post("/assess", params={"engine": "rag"}, json=REQUEST)
+    assert response.status_code == 200
+    assert response.headers["X-Assessment-Engine"] == "rules"
+
+    response = client.post("/assess", json=REQUEST)
+    assert response.status_code == 200
+    assert response.headers["X-Assessment-Engine"] == "rules"
+
+
+def test_rag_results_name_their_engine():
+    import rag_service
+
+    stand_in = rag_service._rule_based_result(["severe headache"], 30)
+    assert stand_in["engine"] == "rules"
+    assert not rag_service._is_cacheable(stand_in)
+    assert not rag_service._is_cacheable({**stand_in, "engine": "fallback"})
+    assert rag_service._is_cacheable({**stand_in, "engine": "rag"})
+
+
+def test_slow_hedged_rag_calls_stay_off_the_shared_pool(monkeypatch):
+    gateway = _load_gateway(monkeypatch, GATEWAY_ENGINES="rules,rag", GATEWAY_DEFAULT_ENGINE="rules", GATEWAY_HEDGE_WORKERS="2")
+    release = threading.Event()
+
+    def slow_rag(**kwargs):
+        release.wait(10)
+        return {**gateway.ASSESS_FUNCTIONS["rules"](**kwargs), "engine": "rag"}
+
+    monkeypatch.setattr(gateway.rag_service, "rag_service_ready", lambda: True)
+    monkeypatch.setattr(gateway.rag_service, "start_warmup", lambda: None)
+    monkeypatch.setitem(gateway.ASSESS_FUNCTIONS, "rag", slow_rag)
+    # One event loop for every request, so the abandoned RAG calls outlive their requests
+    with TestClient(gateway.app) as client:
+        try:
+            # Two calls occupy both hedge workers; the third finds them busy
+            for _ in range(3):
+                response = client.post("/assess", params={"engine": "hedged", "budgetMs": 50}, json=REQUEST)
+                assert response.status_code == 200
+                assert response.headers["X-Assessment-Engine"] == "rules"
+            assert gateway._get_hedge_executor().in_flight == 2
+            assert gateway.get_assessment_executor().in_flight == 0
+        finally:
+            release.set()
+        deadline = time.monotonic() + 5
+        while gateway._get_hedge_executor().in_flight and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert gateway._get_hedge_executor().in_flight == 0
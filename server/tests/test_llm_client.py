@@ -0,0 +1,187 @@
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+import uvicorn
+
+import llm_stub_server
+from llm_client import InferenceClient, LLMDeadlineExceeded, LLMError
+from structured_output import JsonObjectScanner
+
+CANNED_TEXT = json.dumps(llm_stub_server.CANNED_ASSESSMENT)
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(llm_stub_server.app, host="127.0.0.1", port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}/models/zephyr"
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Fast, reliable stub by default; tests override what they exercise"""
+    monkeypatch.setattr(llm_stub_server, "STUB_LATENCY", 0.01)
+    monkeypatch.setattr(llm_stub_server, "STUB_LATENCY_JITTER", 0.0)
+    monkeypatch.setattr(llm_stub_server, "STUB_FAILURE_RATE", 0.0)
+    monkeypatch.setattr(llm_stub_server, "STUB_FAIL_FIRST", 0)
+    monkeypatch.setattr(llm_stub_server, "STUB_TOKEN_DELAY", 0.0)
+    llm_stub_server.reset_stats()
+    return monkeypatch
+
+
+def _client(url, **options):
+    return InferenceClient(url, **{"backoff_base": 0.01, "backoff_max": 0.05, **options})
+
+
+def test_completes_against_stub(stub, stub_url):
+    client = _client(stub_url)
+    try:
+        assert client.complete("prompt") == CANNED_TEXT
+        assert llm_stub_server.stats["requests"] == 1
+    finally:
+        client.close()
+
+
+def test_deadline_expires_on_slow_inference(stub, stub_url):
+    stub.setattr(llm_stub_server, "STUB_LATENCY", 2.0)
+    client = _client(stub_url, deadline=0.2)
+    try:
+        started = time.monotonic()
+        with pytest.raises(LLMDeadlineExceeded):
+            client.complete("prompt")
+        assert time.monotonic() - started < 1.0
+    finally:
+        client.close()
+
+
+def test_retries_transient_failures(stub, stub_url):
+    stub.setattr(llm_stub_server, "STUB_FAIL_FIRST", 2)
+    client = _client(stub_url, max_retries=2)
+    try:
+        assert client.complete("prompt") == CANNED_TEXT
+        assert llm_stub_server.stats["requests"] == 3
+    finally:
+        client.close()
+
+
+def test_gives_up_after_max_retries(stub, stub_url):
+    stub.setattr(llm_stub_server, "STUB_FAILURE_RATE", 1.0)
+    client = _client(stub_url, max_retries=2)
+    try:
+        with pytest.raises(LLMError, match="after 3 attempts"):
+            client.complete("prompt")
+        assert llm_stub_server.stats["requests"] == 3
+    finally:
+        client.close()
+
+
+def test_does_not_retry_client_errors(stub, stub_url):
+    stub.setattr(llm_stub_server, "STUB_FAILURE_RATE", 1.0)
+    stub.setattr(llm_stub_server, "STUB_FAILURE_STATUS", 400)
+    client = _client(stub_url, max_retries=2)
+    try:
+        with pytest.raises(LLMError, match="HTTP 400"):
+            client.complete("prompt")
+        assert llm_stub_server.stats["requests"] == 1
+    finally:
+        client.close()
+
+
+def test_backoff_is_jittered_and_capped():
+    client = InferenceClient("http://unused", backoff_base=0.1, backoff_max=0.3)
+    for attempt in range(4):
+        delays = [client._backoff(attempt, None) for _ in range(200)]
+        cap = min(0.3, 0.1 * 2 ** attempt)
+        assert all(0 <= delay <= cap for delay in delays)
+        assert len(set(delays)) > 100
+    throttled = httpx.Response(429, headers={"Retry-After": "0.2"})
+    assert client._backoff(0, throttled) == 0.2
+    assert client._backoff(0, httpx.Response(429, headers={"Retry-After": "60"})) == 0.3
+
+
+def test_concurrency_is_bounded(stub, stub_url):
+    stub.setattr(llm_stub_server, "STUB_LATENCY", 0.1)
+    client = _client(stub_url, max_concurrency=2)
+    try:
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(lambda _: client.complete("prompt"), range(6)))
+        assert results == [CANNED_TEXT] * 6
+        assert llm_stub_server.stats["peakInFlight"] == 2
+    finally:
+        client.close()
+
+
+def test_waiting_for_a_slot_counts_against_the_deadline(stub, stub_url):
+    stub.setattr(llm_stub_server, "STUB_LATENCY", 0.5)
+    client = _client(stub_url, max_concurrency=1, deadline=0.3)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            outcomes = list(pool.map(lambda _: _outcome(client), range(2)))
+        assert outcomes == [LLMDeadlineExceeded, LLMDeadlineExceeded]
+        assert llm_stub_server.stats["requests"] == 1
+    finally:
+        client.close()
+
+
+def _outcome(client):
+    try:
+        client.complete("prompt")
+    except LLMError as e:
+        return type(e)
+    return None
+
+
+def test_complete_until_stops_the_stream(stub, stub_url):
+    stub.setattr(llm_stub_server, "STUB_TOKEN_DELAY", 0.01)
+    client = _client(stub_url)
+    try:
+        scanner = JsonObjectScanner()
+        text = client.complete_until("prompt", scanner.feed)
+        assert scanner.result == llm_stub_server.CANNED_ASSESSMENT
+        assert text == CANNED_TEXT
+    finally:
+        client.close()
+
+
+def test_forked_worker_gets_its_own_runner(stub, stub_url):
+    client = _client(stub_url)
+    try:
+        assert client.complete("prompt") == CANNED_TEXT
+        parent_runner = client._runner
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                os.close(read_end)
+                ok = client.complete("prompt", deadline=5) == CANNED_TEXT and client._runner is not parent_runner
+                os.write(write_end, b"ok" if ok else b"mismatch")
+                status = 0
+            finally:
+                os._exit(status)
+        os.close(write_end)
+        with os.fdopen(read_end, "rb") as pipe:
+            reported = pipe.read()
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+        assert reported == b"ok"
+        # The parent's runner and pool are untouched by the child
+        assert client._runner is parent_runner
+        assert client.complete("prompt") == CANNED_TEXT
+    finally:
+        client.close()
@@ -0,0 +1,28 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import profiler
+
+
+def _client(monkeypatch, token):
+    monkeypatch.setattr(profiler, "ADMIN_TOKEN", token)
+    app = FastAPI()
+    profiler.register_profiling_routes(app)
+    return TestClient(app)
+
+
+def test_admin_routes_absent_without_token(monkeypatch):
+    client = _client(monkeypatch, None)
+    assert client.get("/admin/profile").status_code == 404
+    assert client.post("/admin/profile", params={"enabled": "true"}).status_code == 404
+    assert client.get("/admin/profile/collapsed").status_code == 404
+
+
+def test_admin_routes_require_token(monkeypatch):
+    client = _client(monkeypatch, "s3cret")
+    assert client.get("/admin/profile").status_code == 403
+    assert client.get("/admin/profile", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/admin/profile", headers={"X-Admin-Token": "é".encode("latin-1")}).status_code == 403
+    response = client.get("/admin/profile", headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200
+    assert "enabled" in response.json()
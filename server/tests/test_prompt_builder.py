@@ -0,0 +1,39 @@
+import sys
+
+from prompt_builder import PromptTemplate, TokenCounter, pack_context
+
+
+def test_counter_without_tokenizer_estimates(monkeypatch):
+    # A None entry makes any transformers import fail
+    monkeypatch.setitem(sys.modules, "transformers", None)
+    counter = TokenCounter("")
+    assert counter.load() is None
+    assert counter.count("") == 0
+    assert counter.count("abcd") == 1
+    assert counter.count("abcde") == 2
+
+
+def test_counter_falls_back_when_tokenizer_unavailable(monkeypatch):
+    monkeypatch.setitem(sys.modules, "transformers", None)
+    counter = TokenCounter("some/tokenizer")
+    assert counter.load() is None
+    assert counter.count("abcdefgh") == 2
+
+
+def test_pack_context_keeps_relevant_sentences_within_budget():
+    counter = TokenCounter("")
+    passages = [
+        "Severe headache with blurred vision can signal preeclampsia. Drink water daily.",
+        "Severe headache with blurred vision can signal preeclampsia. Walking is good exercise.",
+    ]
+    context, tokens = pack_context(passages, "severe headache vision", budget=20, counter=counter)
+    assert context == "Severe headache with blurred vision can signal preeclampsia."
+    assert tokens <= 20
+
+
+def test_template_counts_static_text_once():
+    counter = TokenCounter("")
+    template = PromptTemplate("Symptoms: {symptoms}\n", counter)
+    prompt, tokens = template.render(symptoms="headache")
+    assert prompt == "Symptoms: headache\n"
+    assert tokens == counter.count("Symptoms: ") + counter.count("headache") + counter.count("\n")
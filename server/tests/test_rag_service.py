@@ -0,0 +1,17 @@
+import rag_service
+
+fingerprint = rag_service.PregnancyRAGService._knowledge_base_fingerprint
+
+
+def test_fingerprint_covers_only_indexed_files(tmp_path):
+    (tmp_path / "preeclampsia.txt").write_text("Severe headache and blurred vision")
+    (tmp_path / rag_service.RISK_RULES_FILE).write_text("high: headache")
+    before = fingerprint(None, str(tmp_path))
+
+    # Rule edits and hidden files do not invalidate the persisted index
+    (tmp_path / rag_service.RISK_RULES_FILE).write_text("high: headache, vision")
+    (tmp_path / ".notes.txt").write_text("draft")
+    assert fingerprint(None, str(tmp_path)) == before
+
+    (tmp_path / "preeclampsia.txt").write_text("Severe headache, blurred vision and swelling")
+    assert fingerprint(None, str(tmp_path)) != before
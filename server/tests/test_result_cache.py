@@ -0,0 +1,33 @@
+import itertools
+
+import hf_rag_service
+from result_cache import assessment_cache_key, get_result_cache
+
+SYMPTOMS = ["changes", "headache", "vision"]
+
+
+def _uncached(symptoms, week):
+    result = hf_rag_service.get_hf_rag_service().assess_pregnancy_risk(symptoms, week, None, None)
+    return result.model_dump()
+
+
+def test_kb_permutations_match_uncached_results():
+    get_result_cache("kb").clear()
+    permutations = [list(p) for p in itertools.permutations(SYMPTOMS)]
+    # The engine's patterns span symptom boundaries, so some orders score higher than others
+    assert len({_uncached(p, 30)["riskLevel"] for p in permutations}) > 1
+    for _ in range(2):
+        for symptoms in permutations:
+            assert hf_rag_service.assess_pregnancy_risk_api(symptoms, 30) == _uncached(symptoms, 30)
+    batch = hf_rag_service.assess_pregnancy_risk_batch_api(
+        [{"symptoms": p, "gestational_week": 30} for p in permutations]
+    )
+    assert batch == [_uncached(p, 30) for p in permutations]
+
+
+def test_cache_key_normalizes_symptoms():
+    assert assessment_cache_key([" Headache", "nausea"]) == assessment_cache_key(["nausea", "headache "])
+    assert assessment_cache_key(["Headache", "nausea"], ordered=True) != assessment_cache_key(
+        ["nausea", "headache"], ordered=True
+    )
+    assert assessment_cache_key([" Headache"], ordered=True) == assessment_cache_key(["headache"], ordered=True)
@@ -0,0 +1,84 @@
+import json
+import os
+
+import pytest
+
+from pattern_matcher import AhoCorasick
+from rule_engine import RuleError, load_rule_set
+
+TEXTS = [
+    "",
+    "mild nausea",
+    "severe headache\nblurry vision\nswelling",
+    "heavy bleeding with cramping and severe abdominal pain",
+    "fever and chills, unusual discharge",
+    "no fetal movement since yesterday, reduced movement before",
+    "persistent vomiting\nlight spotting\ncontractions",
+    "headache headache headache",
+]
+
+
+@pytest.fixture(scope="module")
+def rules():
+    return load_rule_set()
+
+
+def _reference(rules, text, groups):
+    score, hits = 0, {}
+    for group in rules.groups:
+        if group.name not in groups:
+            continue
+        matched = [
+            rule.name for rule in group.rules
+            if sum(term in text for term in rule.terms) >= rule.min_terms
+        ]
+        hits[group.name] = matched
+        if matched:
+            score += group.weight if group.once else group.weight * len(matched)
+    return score, hits
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_evaluate_matches_checking_every_rule(rules, text):
+    all_groups = [group.name for group in rules.groups]
+    for groups in (None, ("dangerous_combinations",), ("high_risk_patterns", "medium_risk_patterns")):
+        evaluation = rules.evaluate(text, groups)
+        score, hits = _reference(rules, text, groups or all_groups)
+        assert evaluation.score == score
+        assert evaluation.hits == hits
+        assert list(evaluation.hits) == list(groups or all_groups)
+
+
+def test_evaluate_rejects_unknown_group(rules):
+    with pytest.raises(KeyError):
+        rules.evaluate("headache", ("no_such_group",))
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_automaton_reports_every_occurrence(rules, text):
+    terms = sorted({term for group in rules.groups for rule in group.rules for term in rule.terms})
+    automaton = AhoCorasick(terms)
+    found = sorted((start, automaton.terms[term_id]) for start, term_id in automaton.finditer(text))
+    expected = sorted(
+        (start, term) for term in terms for start in range(len(text)) if text.startswith(term, start)
+    )
+    assert found == expected
+
+
+def test_missing_rule_file_raises(tmp_path):
+    with pytest.raises(RuleError, match="cannot read"):
+        load_rule_set(str(tmp_path / "risk_rules.txt"))
+
+
+def test_invalid_rule_file_raises(tmp_path):
+    path = tmp_path / "risk_rules.txt"
+    path.write_text("HIGH RISK PATTERNS (+3):\n- headache\n", encoding="utf-8")
+    with pytest.raises(RuleError, match="no RISK BANDS"):
+        load_rule_set(str(path))
+
+
+def test_exported_json_is_current(rules):
+    # routes.ts reads the committed export; regenerate it with `npm run rules:export`
+    exported = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "risk_rules.json")
+    with open(exported, encoding="utf-8") as f:
+        assert json.load(f) == rules.to_dict(), "risk_rules.json is stale; run `npm run rules:export`"
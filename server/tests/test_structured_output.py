@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from structured_output import JsonObjectScanner, parse_json_object, repair_json
+
+ASSESSMENT = {
+    "riskLevel": "high",
+    "reasoning": "Line one.\nLine two with a \"quote\", a tab\tand a backslash \\ plus {braces}",
+    "recommendations": ["call} now", "rest {later}", "unicode é"],
+    "urgency": "immediate",
+    "confidence": 0.9,
+}
+
+
+def _is_assessment(value):
+    return "riskLevel" in value
+
+
+def _scan(text, chunk_size):
+    scanner = JsonObjectScanner(accept=_is_assessment)
+    for start in range(0, len(text), chunk_size):
+        if scanner.feed(text[start:start + chunk_size]):
+            return scanner, start + chunk_size
+    return scanner, None
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_scanner_round_trips_escaped_strings(chunk_size, ensure_ascii):
+    body = json.dumps(ASSESSMENT, ensure_ascii=ensure_ascii)
+    text = "Here is the assessment: " + body + " Let me know if {anything} else."
+    scanner, stopped_at = _scan(text, chunk_size)
+    assert scanner.result == ASSESSMENT
+    # Generation stops within the chunk holding the closing brace
+    assert stopped_at is not None and stopped_at - chunk_size < len(text) - len(" Let me know if {anything} else.")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4])
+def test_scanner_ignores_braces_inside_strings(chunk_size):
+    text = '{"riskLevel":"high","reasoning":"a\\nb","recommendations":["call} now","rest"],"urgency":"immediate","confidence":0.9}'
+    scanner, _ = _scan(text, chunk_size)
+    assert scanner.result == json.loads(text)
+
+
+def test_scanner_handles_escaped_backslash_before_quote():
+    text = '{"riskLevel":"low","reasoning":"ends with a backslash \\\\","urgency":"routine"} trailing }'
+    scanner, _ = _scan(text, 1)
+    assert scanner.result == json.loads(text[:text.index(" trailing")])
+
+
+def test_scanner_skips_objects_that_are_not_assessments():
+    text = 'Example {"foo": "}"} then {"riskLevel": "moderate"}'
+    scanner, _ = _scan(text, 5)
+    assert scanner.result == {"riskLevel": "moderate"}
+
+
+def test_scanner_waits_for_an_unfinished_object():
+    scanner = JsonObjectScanner(accept=_is_assessment)
+    assert not scanner.feed('{"riskLevel": "high", "reasoning": "a \\" } b')
+    assert scanner.result is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("```json\n{'riskLevel': 'low', 'confidence': .8,}\n```", {"riskLevel": "low", "confidence": 0.8}),
+    ('{riskLevel: high, ok: True, none: None}', {"riskLevel": "high", "ok": True, "none": None}),
+    ('{"riskLevel": "high", "recommendations": ["Go", "Call', {"riskLevel": "high", "recommendations": ["Go", "Call"]}),
+    ('{"riskLevel": "high" "urgency": "immediate"}', {"riskLevel": "high", "urgency": "immediate"}),
+    ('{"reasoning": "line\nbreak"}', {"reasoning": "line\nbreak"}),
+])
+def test_parse_repairs_malformed_objects(text, expected):
+    assert parse_json_object(text) == expected
+
+
+def test_repair_keeps_escapes_in_strings():
+    value = {"reasoning": "a \"b\" \\ c\nd"}
+    assert json.loads(repair_json(json.dumps(value) + " trailing")) == value
+
+
+def test_parse_without_object():
+    assert parse_json_object("no json here") is None
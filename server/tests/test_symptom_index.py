@@ -0,0 +1,39 @@
+import pytest
+
+from huggingface_service import get_assessment_service
+from symptom_index import STOP_WORDS, SymptomIndex, strip_severity
+
+SYMPTOMS = [
+    "", "a", "headache", "Severe Headache", "mild headache", "heavy bleeding", "bleeding",
+    "spotting", "blurred vision and severe headache", "back pain", "pain", "nausea",
+    "the", "in", "swelling of hands and face", "fever", "ache", "xyz",
+    "persistent vomiting every morning", "decreased fetal movement",
+]
+
+
+def _matches(symptom, entry):
+    """Pairwise reference for SymptomIndex matching"""
+    user_lower, entry_lower = symptom.lower().strip(), entry.lower().strip()
+    user_severe = "severe" in user_lower or "heavy" in user_lower
+    if "severe" in entry_lower and not user_severe:
+        return False
+    if "mild" in entry_lower and user_severe:
+        return False
+    user_clean, entry_clean = strip_severity(user_lower), strip_severity(entry_lower)
+    overlap = set(user_clean.split()) & set(entry_clean.split())
+    return bool(overlap - STOP_WORDS) or user_clean in entry_clean or entry_clean in user_clean
+
+
+@pytest.fixture(scope="module")
+def indexes():
+    indexes = list(get_assessment_service().symptom_index.values())
+    # Entries that exercise short and empty cleaned phrases
+    indexes.append(SymptomIndex(["ache", "in", "severe", "mild pain", "Heavy", "a b", "vision"]))
+    return indexes
+
+
+@pytest.mark.parametrize("symptom", SYMPTOMS)
+def test_matches_every_entry_pairwise(indexes, symptom):
+    for index in indexes:
+        expected = [idx for idx, entry in enumerate(index.entries) if _matches(symptom, entry)]
+        assert index.matches(symptom) == expected
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+import vector_store
+from vector_store import NumpyVectorStore
+
+ROWS, DIMS, TOP_K = 2500, 48, 10  # more rows than SCORE_BLOCK_ROWS, so blocks are exercised
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(7)
+    embeddings = rng.standard_normal((ROWS, DIMS)).astype(np.float32)
+    queries = rng.standard_normal((25, DIMS)).astype(np.float32)
+    ids = [f"node-{i}" for i in range(ROWS)]
+    return ids, embeddings, queries
+
+
+def _brute_force(embeddings, query, top_k):
+    matrix = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    scores = matrix @ (query / np.linalg.norm(query))
+    order = np.argsort(-scores, kind="stable")[:top_k]
+    return [(int(row), float(scores[row])) for row in order], scores
+
+
+def test_float32_matches_brute_force(data):
+    ids, embeddings, queries = data
+    assert ROWS > vector_store.SCORE_BLOCK_ROWS
+    store = NumpyVectorStore.from_embeddings(ids, embeddings)
+    for query, hits in zip(queries, store.query_batch(queries, TOP_K)):
+        expected, _ = _brute_force(embeddings, query, TOP_K)
+        assert [node_id for node_id, _ in hits] == [ids[row] for row, _ in expected]
+        np.testing.assert_allclose([s for _, s in hits], [s for _, s in expected], atol=1e-5)
+
+
+@pytest.mark.parametrize("dtype,atol,min_recall", [("float16", 2e-3, 0.95), ("int8", 2e-2, 0.8)])
+def test_quantized_stays_close_to_float32(data, dtype, atol, min_recall):
+    ids, embeddings, queries = data
+    store = NumpyVectorStore.from_embeddings(ids, embeddings, dtype=dtype)
+    assert store.dtype == dtype
+    assert store.nbytes < NumpyVectorStore.from_embeddings(ids, embeddings).nbytes
+    recalled = 0
+    for query, hits in zip(queries, store.query_batch(queries, TOP_K)):
+        expected, true_scores = _brute_force(embeddings, query, TOP_K)
+        rows = [ids.index(node_id) for node_id, _ in hits]
+        # Approximate scores are close to the true cosine of the returned rows
+        np.testing.assert_allclose([s for _, s in hits], true_scores[rows], atol=atol)
+        recalled += len(set(rows) & {row for row, _ in expected})
+    assert recalled / (len(queries) * TOP_K) >= min_recall
+
+
+@pytest.mark.parametrize("dtype", vector_store.DTYPES)
+def test_results_are_sorted_best_first(data, dtype):
+    ids, embeddings, queries = data
+    store = NumpyVectorStore.from_embeddings(ids, embeddings, dtype=dtype)
+    for top_k in (1, TOP_K, ROWS, ROWS + 5):
+        for hits in store.query_batch(queries[:3], top_k):
+            scores = [score for _, score in hits]
+            assert len(hits) == min(top_k, ROWS)
+            assert scores == sorted(scores, reverse=True)
+            assert len({node_id for node_id, _ in hits}) == len(hits)
+
+
+def test_query_matches_query_batch(data):
+    ids, embeddings, queries = data
+    store = NumpyVectorStore.from_embeddings(ids, embeddings, dtype="int8")
+    for query, batch_hits in zip(queries, store.query_batch(queries, TOP_K)):
+        hits = store.query(query, TOP_K)
+        assert [node_id for node_id, _ in hits] == [node_id for node_id, _ in batch_hits]
+        np.testing.assert_allclose([s for _, s in hits], [s for _, s in batch_hits], atol=1e-6)
+
+
+@pytest.mark.parametrize("dtype", vector_store.DTYPES)
+def test_save_and_load_memory_mapped(tmp_path, data, dtype):
+    ids, embeddings, queries = data
+    store = NumpyVectorStore.from_embeddings(ids, embeddings, dtype=dtype)
+    store.save(str(tmp_path))
+
+    loaded = NumpyVectorStore.load(str(tmp_path))
+    assert isinstance(loaded.matrix, np.memmap)
+    assert not loaded.matrix.flags.writeable
+    assert loaded.dtype == dtype
+    assert loaded.ids == ids
+    assert loaded.query_batch(queries, TOP_K) == store.query_batch(queries, TOP_K)
+
+    in_memory = NumpyVectorStore.load(str(tmp_path), mmap=False)
+    assert not isinstance(in_memory.matrix, np.memmap)
+    assert in_memory.query_batch(queries, TOP_K) == store.query_batch(queries, TOP_K)
+
+
+def test_load_without_saved_store(tmp_path):
+    assert NumpyVectorStore.load(str(tmp_path)) is None
+
+
+def test_empty_store_and_bad_dtype():
+    store = NumpyVectorStore.from_embeddings([], np.zeros((0, 4)))
+    assert store.query_batch(np.ones((2, 4)), TOP_K) == [[], []]
+    with pytest.raises(ValueError, match="Unknown vector dtype"):
+        NumpyVectorStore.from_embeddings(["a"], np.ones((1, 4)), dtype="int4")
+
+
+def test_retrieve_batch_returns_nodes_in_rank_order(data):
+    pytest.importorskip("llama_index.core")
+    from llama_index.core.schema import TextNode
+    from llama_index.core.storage.docstore import SimpleDocumentStore
+
+    ids, embeddings, queries = data
+    docstore = SimpleDocumentStore()
+    docstore.add_documents([TextNode(id_=node_id, text=node_id) for node_id in ids])
+    store = NumpyVectorStore.from_embeddings(ids, embeddings)
+    retriever = vector_store.numpy_retriever(store, docstore, similarity_top_k=TOP_K)
+
+    batches = retriever.retrieve_batch(queries)
+    for nodes, hits in zip(batches, store.query_batch(queries, TOP_K)):
+        assert [(n.node.node_id, n.score) for n in nodes] == hits
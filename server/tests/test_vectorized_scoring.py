@@ -0,0 +1,35 @@
+import pytest
+
+from huggingface_service import assess_pregnancy_risk_api, get_vectorized_scorer
+
+REQUESTS = [
+    {"symptoms": ["severe headache", "blurred vision", "swelling"], "gestational_week": 32},
+    {"symptoms": ["nausea", "fatigue"], "gestational_week": 10},
+    {"symptoms": ["vaginal bleeding", "Severe Headache"], "previous_complications": True},
+    {"symptoms": []},
+]
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    scorer = get_vectorized_scorer()
+    if scorer is None:
+        pytest.skip("numpy unavailable")
+    return scorer
+
+
+def test_batch_survives_vocabulary_reset(scorer, monkeypatch):
+    batch = scorer.encode(REQUESTS)
+    expected = scorer.score(batch)
+    # A later batch that overflows the vocabulary replaces it
+    monkeypatch.setattr("vectorized_scoring.MAX_VOCABULARY", 0)
+    scorer.encode([{"symptoms": ["an unseen symptom"]}])
+    assert scorer._vocabulary is not batch.vocabulary
+    scored = scorer.score(batch)
+    assert scored.risk_level.tolist() == expected.risk_level.tolist()
+    assert scored.risk_score.tolist() == expected.risk_score.tolist()
+
+
+def test_assess_matches_scalar_service(scorer):
+    for request, result in zip(REQUESTS, scorer.assess(REQUESTS)):
+        assert result == assess_pregnancy_risk_api(**request)
@@ -0,0 +1,169 @@
+"""
+Exact top-k vector search over one contiguous embedding matrix
+
+Chunk embeddings are L2-normalized into a single row-major matrix, so a
+query is one matrix-vector product followed by argpartition, with no
+per-node Python work. float16 and int8 (per-row scale) storage halve or
+quarter the matrix; those rows are widened to float32 block by block
+while scoring. Saved matrices are plain .npy files that load memory-mapped,
+so pre-forked workers share one copy through the page cache.
+"""
+import json
+import os
+from typing import TYPE_CHECKING, Any, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from llama_index.core import VectorStoreIndex
+
+DTYPES = ("float32", "float16", "int8")
+
+# Rows widened to float32 at a time when scoring a quantized matrix
+SCORE_BLOCK_ROWS = 1024
+
+_MATRIX_FILE = "vectors.npy"
+_SCALES_FILE = "vector_scales.npy"
+_IDS_FILE = "vector_ids.json"
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+class NumpyVectorStore:
+    """Immutable exact cosine-similarity index over normalized embeddings"""
+
+    def __init__(self, ids: Sequence[str], matrix: np.ndarray, scales: Optional[np.ndarray] = None):
+        """Wrap an already normalized (and possibly quantized) matrix; use from_embeddings to build one"""
+        if len(ids) != matrix.shape[0]:
+            raise ValueError(f"{len(ids)} ids for {matrix.shape[0]} vectors")
+        self.ids: List[str] = list(ids)
+        self.matrix = matrix
+        self.scales = scales  # per-row dequantization factors for int8
+        self.dtype = str(matrix.dtype)
+
+    @classmethod
+    def from_embeddings(cls, ids: Sequence[str], embeddings: Any, dtype: str = "float32") -> "NumpyVectorStore":
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown vector dtype {dtype!r} (expected one of: {', '.join(DTYPES)})")
+        matrix = _normalize(embeddings) if len(ids) else np.zeros((0, 0), dtype=np.float32)
+        scales = None
+        if dtype == "float16":
+            matrix = matrix.astype(np.float16)
+        elif dtype == "int8":
+            scales = np.abs(matrix).max(axis=1) / 127 if len(ids) else np.zeros(0, dtype=np.float32)
+            scales = np.where(scales == 0, 1, scales).astype(np.float32)
+            matrix = np.round(matrix / scales[:, None]).astype(np.int8)
+        return cls(ids, np.ascontiguousarray(matrix), scales)
+
+    @classmethod
+    def from_index(cls, index: "VectorStoreIndex", dtype: str = "float32") -> "NumpyVectorStore":
+        """Copy the embeddings out of a llama_index VectorStoreIndex"""
+        ids = list(index.index_struct.nodes_dict.values())
+        embeddings = [index.vector_store.get(node_id) for node_id in ids]
+        return cls.from_embeddings(ids, np.array(embeddings, dtype=np.float32), dtype)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """(rows, queries) cosine similarities for normalized float32 queries"""
+        if self.matrix.dtype == np.float32:
+            return self.matrix @ queries.T
+        scores = np.empty((len(self.ids), queries.shape[0]), dtype=np.float32)
+        for start in range(0, len(self.ids), SCORE_BLOCK_ROWS):
+            block = self.matrix[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            np.matmul(block, queries.T, out=scores[start:start + SCORE_BLOCK_ROWS])
+        if self.scales is not None:
+            scores *= self.scales[:, None]
+        return scores
+
+    def query_batch(self, queries: Any, top_k: int = 5) -> List[List[Tuple[str, float]]]:
+        """(id, similarity) of the top_k nearest vectors for each query, best first"""
+        queries = _normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if not self.ids:
+            return [[] for _ in range(queries.shape[0])]
+        top_k = min(top_k, len(self.ids))
+        scores = self._scores(queries)
+        if top_k < len(self.ids):
+            candidates = np.argpartition(-scores, top_k - 1, axis=0)[:top_k]
+        else:
+            candidates = np.broadcast_to(np.arange(len(self.ids))[:, None], scores.shape)
+        results = []
+        for column in range(queries.shape[0]):
+            rows = candidates[:, column]
+            column_scores = scores[rows, column]
+            order = np.argsort(-column_scores)
+            results.append([(self.ids[rows[i]], float(column_scores[i])) for i in order])
+        return results
+
+    def query(self, query: Any, top_k: int = 5) -> List[Tuple[str, float]]:
+        return self.query_batch(query, top_k)[0]
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, _MATRIX_FILE), self.matrix)
+        if self.scales is not None:
+            np.save(os.path.join(directory, _SCALES_FILE), self.scales)
+        with open(os.path.join(directory, _IDS_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.ids, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> Optional["NumpyVectorStore"]:
+        """Load a saved store, memory-mapped read-only by default; None if none was saved"""
+        matrix_path = os.path.join(directory, _MATRIX_FILE)
+        if not os.path.exists(matrix_path):
+            return None
+        mode = "r" if mmap else None
+        matrix = np.load(matrix_path, mmap_mode=mode)
+        scales_path = os.path.join(directory, _SCALES_FILE)
+        scales = np.load(scales_path) if os.path.exists(scales_path) else None
+        with open(os.path.join(directory, _IDS_FILE), encoding="utf-8") as f:
+            ids = json.load(f)
+        return cls(ids, matrix, scales)
+
+
+_retriever_class = None
+
+
+def numpy_retriever(store: NumpyVectorStore, docstore, similarity_top_k: int = 5):
+    """
+    A llama_index retriever over a NumpyVectorStore, for RetrieverQueryEngine.
+    Queries without an embedding are embedded with Settings.embed_model.
+    """
+    global _retriever_class
+    if _retriever_class is None:
+        from llama_index.core import Settings
+        from llama_index.core.retrievers import BaseRetriever
+        from llama_index.core.schema import NodeWithScore, QueryBundle
+
+        class NumpyRetriever(BaseRetriever):
+            def __init__(self, store: NumpyVectorStore, docstore, similarity_top_k: int):
+                super().__init__()
+                self.store = store
+                self.docstore = docstore
+                self.similarity_top_k = similarity_top_k
+
+            def nodes_for(self, hits: Iterable[Tuple[str, float]]) -> List[NodeWithScore]:
+                return [NodeWithScore(node=self.docstore.get_node(node_id), score=score) for node_id, score in hits]
+
+            def retrieve_batch(self, embeddings: Sequence[Sequence[float]]) -> List[List[NodeWithScore]]:
+                """Top-k nodes for many query embeddings with one matrix product"""
+                return [self.nodes_for(hits) for hits in self.store.query_batch(embeddings, self.similarity_top_k)]
+
+            def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+                embedding = query_bundle.embedding
+                if embedding is None:
+                    embedding = Settings.embed_model.get_query_embedding(query_bundle.query_str)
+                return self.nodes_for(self.store.query(embedding, self.similarity_top_k))
+
+        _retriever_class = NumpyRetriever
+    return _retriever_class(store, docstore, similarity_top_k)
+
@@ -0,0 +1,273 @@
+"""
+Vectorized batch scoring for the rule-based assessment engine
+"""
+import logging
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Distinct symptoms remembered between batches before the encoding starts over
+MAX_VOCABULARY = 100_000
+
+RISK_LEVELS = ("low", "moderate", "high")
+URGENCIES = ("routine", "within_week", "within_24_hours", "immediate")
+
+_LOW, _MODERATE, _HIGH = 0, 1, 2
+
+class _Vocabulary:
+    """
+    Symptom ids and their features. It only ever grows; when it gets too
+    large the scorer starts a new one, so a batch encoded against this one
+    can keep using it.
+    """
+
+    def __init__(self, term_count: int):
+        self.ids: Dict[str, int] = {}
+        self.high: List[Optional[str]] = []
+        self.moderate: List[Optional[str]] = []
+        self.weight: List[int] = []
+        self.low: List[bool] = []
+        self.terms: List[List[bool]] = []
+        self.term_count = term_count
+        self._arrays = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, symptom: str, high: Optional[str], moderate: Optional[str], low: bool, terms: List[bool]) -> int:
+        symptom_id = len(self.high)
+        self.ids[symptom] = symptom_id
+        self.high.append(high)
+        self.moderate.append(moderate)
+        self.weight.append((3 if high is not None else 0) + (2 if moderate is not None else 0))
+        self.low.append(low)
+        self.terms.append(terms)
+        self._arrays = None
+        return symptom_id
+
+    def feature_arrays(self) -> Tuple[np.ndarray, ...]:
+        if self._arrays is None:
+            self._arrays = (
+                np.array(self.weight, dtype=np.int64),
+                np.array([h is not None for h in self.high], dtype=bool),
+                np.array([m is not None for m in self.moderate], dtype=bool),
+                np.array(self.low, dtype=bool),
+                np.array(self.terms, dtype=np.int32).reshape(len(self.terms), self.term_count)
+            )
+        return self._arrays
+
+
+class EncodedBatch(NamedTuple):
+    """N requests as a CSR symptom matrix over the scorer's symptom vocabulary"""
+    indptr: np.ndarray  # (N + 1,) row offsets into indices
+    indices: np.ndarray  # symptom ids, in request order, duplicates kept
+    weeks: np.ndarray  # gestational week, 0 when not given
+    previous_complications: np.ndarray  # bool
+    vocabulary: _Vocabulary  # the vocabulary the symptom ids refer to
+
+
+class ScoredBatch(NamedTuple):
+    risk_score: np.ndarray
+    has_high: np.ndarray
+    has_moderate: np.ndarray
+    has_low: np.ndarray
+    combinations: np.ndarray  # (N, rules) bool, one column per dangerous combination rule
+    risk_level: np.ndarray  # index into RISK_LEVELS, after week and history adjustments
+    urgency: np.ndarray  # index into URGENCIES
+    confidence: np.ndarray
+
+
+class VectorizedAssessmentScorer:
+    """
+    Scores many assessments at once with the same rules as
+    PregnancyAssessmentService.assess_pregnancy_risk.
+
+    Each distinct symptom is matched against the knowledge base once and
+    reduced to a row of features (risk weight, category flags, combination
+    terms). A batch then becomes a sparse request x symptom matrix, and
+    scores, combination flags and the gestational-week and history
+    adjustments are computed as array operations over all requests.
+    """
+
+    def __init__(self, service):
+        self.service = service
+        rules = service.rules
+        group = next(g for g in rules.groups if g.name == "dangerous_combinations")
+        self._combination_weight = group.weight
+        self._combination_once = group.once
+        combination_masks = rules.group_masks("dangerous_combinations")
+        self._combination_names = [name for name, _, _ in combination_masks]
+
+        # Compact the combination terms into columns of a boolean feature matrix
+        union = 0
+        for _, mask, _ in combination_masks:
+            union |= mask
+        self._term_bits = [bit for bit in range(union.bit_length()) if union >> bit & 1]
+        column = {bit: col for col, bit in enumerate(self._term_bits)}
+        self._combination_columns = [
+            (np.array([column[bit] for bit in range(mask.bit_length()) if mask >> bit & 1]), min_terms)
+            for _, mask, min_terms in combination_masks
+        ]
+
+        self._lock = threading.Lock()
+        self._vocabulary = _Vocabulary(len(self._term_bits))
+
+    def _symptom_id(self, vocabulary: _Vocabulary, symptom: str) -> int:
+        symptom_id = vocabulary.ids.get(symptom)
+        if symptom_id is None:
+            index = self.service.symptom_index
+            features = self.service.rules.features(symptom)
+            symptom_id = vocabulary.add(
+                symptom,
+                high=index["high_risk_symptoms"].first_match(symptom),
+                moderate=index["moderate_risk_symptoms"].first_match(symptom),
+                low=index["low_risk_symptoms"].first_match(symptom) is not None,
+                terms=[bool(features >> bit & 1) for bit in self._term_bits]
+            )
+        return symptom_id
+
+    def encode(self, requests: List[Dict[str, Any]]) -> EncodedBatch:
+        """Encode requests holding assess_pregnancy_risk keyword arguments"""
+        with self._lock:
+            if len(self._vocabulary) > MAX_VOCABULARY:
+                # Batches still holding the old vocabulary keep scoring against it
+                self._vocabulary = _Vocabulary(len(self._term_bits))
+            vocabulary = self._vocabulary
+            indptr = np.zeros(len(requests) + 1, dtype=np.int64)
+            indices: List[int] = []
+            for row, request in enumerate(requests):
+                for symptom in request.get("symptoms", []):
+                    indices.append(self._symptom_id(vocabulary, symptom.lower().strip()))
+                indptr[row + 1] = len(indices)
+            return EncodedBatch(
+                indptr=indptr,
+                indices=np.array(indices, dtype=np.int64),
+                weeks=np.array([request.get("gestational_week") or 0 for request in requests], dtype=np.int64),
+                previous_complications=np.array(
+                    [bool(request.get("previous_complications")) for request in requests], dtype=bool
+                ),
+                vocabulary=vocabulary
+            )
+
+    def score(self, batch: EncodedBatch) -> ScoredBatch:
+        """Risk scores, levels and urgencies for every encoded request"""
+        with self._lock:
+            weight, is_high, is_moderate, is_low, terms = batch.vocabulary.feature_arrays()
+
+        count = len(batch.weeks)
+        row_lengths = np.diff(batch.indptr)
+        rows = np.repeat(np.arange(count), row_lengths)
+        symptoms = batch.indices
+
+        risk_score = np.bincount(rows, weights=weight[symptoms], minlength=count).astype(np.int64)
+        has_high = np.bincount(rows, weights=is_high[symptoms], minlength=count) > 0
+        has_moderate = np.bincount(rows, weights=is_moderate[symptoms], minlength=count) > 0
+        has_low = np.bincount(rows, weights=is_low[symptoms], minlength=count) > 0
+
+        # Term presence per request: sum each request's symptom rows
+        present = np.zeros((count, terms.shape[1]), dtype=bool)
+        nonempty = row_lengths > 0
+        if symptoms.size and terms.shape[1]:
+            present[nonempty] = np.add.reduceat(terms[symptoms], batch.indptr[:-1][nonempty], axis=0) > 0
+
+        combinations = np.zeros((count, len(self._combination_columns)), dtype=bool)
+        for rule, (columns, min_terms) in enumerate(self._combination_columns):
+            combinations[:, rule] = present[:, columns].sum(axis=1) >= min_terms
+        matched_combinations = combinations.sum(axis=1)
+        if self._combination_once:
+            risk_score += self._combination_weight * (matched_combinations > 0)
+        else:
+            risk_score += self._combination_weight * matched_combinations
+
+        # Same ladder as assess_pregnancy_risk, first matching branch wins
+        branches = [
+            (matched_combinations > 0) | (has_high & (risk_score >= 6)),
+            has_high & (risk_score >= 3),
+            has_moderate | ((risk_score >= 2) & ~has_low),
+            has_low & (risk_score == 0)
+        ]
+        risk_level = np.select(branches, [_HIGH, _HIGH, _MODERATE, _LOW], _LOW)
+        urgency = np.select(branches, [3, 2, 1, 0], 0)
+        confidence = np.select(branches, [0.85, 0.80, 0.75, 0.70], 0.65)
+
+        # _adjust_risk_for_gestational_week, then previous complications
+        weeks = batch.weeks
+        cautious_week = (weeks != 0) & ((weeks <= 12) | (weeks >= 28))
+        risk_level = np.where(cautious_week & (risk_level == _MODERATE), _HIGH, risk_level)
+        raised = batch.previous_complications & (risk_level == _LOW)
+        risk_level = np.where(raised, _MODERATE, risk_level)
+        urgency = np.where(raised, 1, urgency)
+
+        return ScoredBatch(
+            risk_score=risk_score,
+            has_high=has_high,
+            has_moderate=has_moderate,
+            has_low=has_low,
+            combinations=combinations,
+            risk_level=risk_level,
+            urgency=urgency,
+            confidence=confidence
+        )
+
+    def assess(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """API-shaped results identical to assess_pregnancy_risk_api for each request"""
+        batch = self.encode(requests)
+        scored = self.score(batch)
+
+        # Append-only, so every id in the batch stays valid without a copy
+        high_names, moderate_names = batch.vocabulary.high, batch.vocabulary.moderate
+        indptr = batch.indptr.tolist()
+        indices = batch.indices.tolist()
+        weeks = batch.weeks.tolist()
+        levels = scored.risk_level.tolist()
+        urgencies = scored.urgency.tolist()
+        confidences = scored.confidence.tolist()
+        combination_rows = scored.combinations.tolist()
+
+        previous = batch.previous_complications.tolist()
+
+        # The service's own text generators, called once per distinct input
+        recommendations_memo: Dict[tuple, List[str]] = {}
+        reasoning_memo: Dict[tuple, str] = {}
+        results = []
+        for row in range(len(requests)):
+            symptom_ids = indices[indptr[row]:indptr[row + 1]]
+            risk_level = RISK_LEVELS[levels[row]]
+            week = weeks[row] or None
+            combinations = tuple(
+                name for name, hit in zip(self._combination_names, combination_rows[row]) if hit
+            )
+
+            memo_key = (risk_level, combinations, week, previous[row])
+            recommendations = recommendations_memo.get(memo_key)
+            if recommendations is None:
+                recommendations = recommendations_memo[memo_key] = self.service._generate_recommendations(
+                    risk_level, {"dangerous_combinations": list(combinations)}, week, previous[row]
+                )
+
+            # Reasoning names at most three symptoms of each tier
+            high = tuple(high_names[i] for i in symptom_ids if high_names[i] is not None)[:3]
+            moderate = tuple(moderate_names[i] for i in symptom_ids if moderate_names[i] is not None)[:3]
+            memo_key = (risk_level, combinations, week, high, moderate)
+            reasoning = reasoning_memo.get(memo_key)
+            if reasoning is None:
+                reasoning = reasoning_memo[memo_key] = self.service._generate_reasoning(
+                    {
+                        "matched_high_risk": list(high),
+                        "matched_moderate_risk": list(moderate),
+                        "dangerous_combinations": list(combinations)
+                    },
+                    risk_level, week, []
+                )
+
+            results.append({
+                "riskLevel": risk_level,
+                "confidence": confidences[row],
+                "recommendations": list(recommendations),
+                "reasoning": reasoning,
+                "urgency": URGENCIES[urgencies[row]]
+            })
+        return results
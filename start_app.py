@@ -3,28 +3,18 @@
 Complete application startup script for GraviLog RAG system
 Starts both HF RAG service and Node.js server
 """
-import subprocess
 import sys
-import os
-import time
-from threading import Thread
 
-def start_hf_rag():
-    """Start HF RAG service"""
-    print("Starting HF RAG service...")
-    os.chdir("server")
-    subprocess.run([sys.executable, "hf_rag_server.py"])
-
-def start_nodejs():
-    """Start Node.js development server"""
-    print("Starting Node.js server...")
-    time.sleep(2)  # Give HF service time to start
-    subprocess.run(["npm", "run", "dev"])
+from supervisor import ServiceSpec, run_services
 
 if __name__ == "__main__":
-    # Start HF RAG service in background
-    rag_thread = Thread(target=start_hf_rag, daemon=True)
-    rag_thread.start()
-    
-    # Start Node.js server
-    start_nodejs()
\ No newline at end of file
+    print("Starting HF RAG service and Node.js server...")
+    run_services([
+        ServiceSpec(
+            name="HF-RAG",
+            command=[sys.executable, "hf_rag_server.py"],
+            cwd="server",
+            health_url="http://localhost:8001/health"
+        ),
+        ServiceSpec(name="NODE", command=["npm", "run", "dev"], depends_on=("HF-RAG",)),
+    ])
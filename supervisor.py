@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Process supervisor for the GraviLog services
+
+Starts services in dependency order, waiting for each dependency's /health
+endpoint to report ready before launching the services that need it, so
+the Node server no longer answers its first requests with the
+assessWithRules fallback while the Python service is still importing.
+Children that crash are restarted with exponential backoff. Output is
+relayed through a bounded buffer per service: a chatty child can never
+block on a full pipe, and when the console falls behind the oldest
+buffered lines are dropped and counted instead.
+"""
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+# Seconds a service gets to report ready before its dependents start anyway
+READY_TIMEOUT = float(os.getenv("SUPERVISOR_READY_TIMEOUT", 120))
+
+# Seconds between /health polls while waiting for readiness
+POLL_INTERVAL = float(os.getenv("SUPERVISOR_POLL_INTERVAL", 0.5))
+
+# Restart backoff: doubles from the initial delay up to the maximum
+RESTART_BACKOFF = float(os.getenv("SUPERVISOR_RESTART_BACKOFF", 1.0))
+MAX_RESTART_BACKOFF = float(os.getenv("SUPERVISOR_MAX_RESTART_BACKOFF", 30.0))
+
+# A child that stayed up this long counts as healthy again and resets its backoff
+STABLE_SECONDS = 60.0
+
+# Lines buffered per service before the oldest are dropped
+LOG_BUFFER_LINES = int(os.getenv("SUPERVISOR_LOG_BUFFER_LINES", 1000))
+
+# Seconds children get to exit after SIGTERM before they are killed
+STOP_TIMEOUT = 5.0
+
+
+@dataclass
+class ServiceSpec:
+    name: str  # log prefix, e.g. "HF-RAG"
+    command: Sequence[str]
+    cwd: Optional[str] = None
+    env: Dict[str, str] = field(default_factory=dict)
+    health_url: Optional[str] = None  # ready as soon as it starts when unset
+    # /health "status" values that count as ready; "warming" and "degraded"
+    # servers answer from the rule engine, so only "healthy" waits for the model
+    ready_statuses: Tuple[str, ...] = ("healthy",)
+    depends_on: Tuple[str, ...] = ()
+    ready_timeout: float = READY_TIMEOUT
+
+
+class LogRelay:
+    """Bounded per-service line buffers drained by a single console writer"""
+
+    def __init__(self, max_lines: int = LOG_BUFFER_LINES):
+        self.max_lines = max_lines
+        self._buffers: Dict[str, Deque[str]] = {}
+        self._dropped: Dict[str, int] = {}
+        self._wakeup = asyncio.Event()
+
+    def write(self, name: str, line: str) -> None:
+        buffer = self._buffers.setdefault(name, deque())
+        if len(buffer) >= self.max_lines:
+            buffer.popleft()
+            self._dropped[name] = self._dropped.get(name, 0) + 1
+        buffer.append(line)
+        self._wakeup.set()
+
+    def _flush(self) -> None:
+        for name, buffer in list(self._buffers.items()):
+            dropped = self._dropped.pop(name, 0)
+            if dropped:
+                print(f"[{name}] ... {dropped} log lines dropped")
+            while buffer:
+                print(f"[{name}] {buffer.popleft()}")
+        sys.stdout.flush()
+
+    async def run(self) -> None:
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                # Printing can block on a slow terminal; keep it off the event loop
+                await asyncio.to_thread(self._flush)
+        finally:
+            self._flush()
+
+    async def pump(self, name: str, stream: asyncio.StreamReader) -> None:
+        """Read a child's output into its buffer until the pipe closes"""
+        while True:
+            try:
+                raw = await stream.readline()
+            except ValueError:
+                # Line longer than the stream limit; relay what was buffered
+                raw = await stream.read(65536)
+            if not raw:
+                return
+            self.write(name, raw.decode(errors="replace").rstrip())
+
+
+def _health_status(url: str) -> Optional[str]:
+    """The "status" field of a /health response, or None if it is unreachable"""
+    try:
+        with urllib.request.urlopen(url, timeout=2) as response:
+            body = response.read()
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+    try:
+        return str(json.loads(body).get("status", "healthy"))
+    except (ValueError, AttributeError):
+        return "healthy"
+
+
+class Supervisor:
+    """Run services in dependency order and keep them running"""
+
+    def __init__(self, services: Sequence[ServiceSpec], log_relay: Optional[LogRelay] = None):
+        self.services = {spec.name: spec for spec in services}
+        for spec in services:
+            missing = [name for name in spec.depends_on if name not in self.services]
+            if missing:
+                raise ValueError(f"{spec.name} depends on unknown services: {', '.join(missing)}")
+        self.logs = log_relay or LogRelay()
+        self._processes: Dict[str, asyncio.subprocess.Process] = {}
+        self._ready: Dict[str, asyncio.Event] = {spec.name: asyncio.Event() for spec in services}
+        self._stopping = asyncio.Event()
+
+    def _log(self, message: str) -> None:
+        self.logs.write("SUPERVISOR", message)
+
+    async def _spawn(self, spec: ServiceSpec) -> asyncio.subprocess.Process:
+        env = os.environ.copy()
+        env.update(spec.env)
+        # Python children buffer their output when it is a pipe
+        env.setdefault("PYTHONUNBUFFERED", "1")
+        process = await asyncio.create_subprocess_exec(
+            *spec.command,
+            cwd=spec.cwd,
+            env=env,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            limit=1 << 20,
+            start_new_session=True  # a terminal Ctrl-C reaches us, not the children
+        )
+        self._processes[spec.name] = process
+        self._log(f"Started {spec.name} (pid {process.pid}): {' '.join(spec.command)}")
+        return process
+
+    async def _wait_ready(self, spec: ServiceSpec, process: asyncio.subprocess.Process) -> bool:
+        if spec.health_url is None:
+            return True
+        deadline = time.monotonic() + spec.ready_timeout
+        last_status = None
+        while time.monotonic() < deadline and process.returncode is None and not self._stopping.is_set():
+            status = await asyncio.to_thread(_health_status, spec.health_url)
+            if status in spec.ready_statuses:
+                return True
+            if status != last_status and status is not None:
+                self._log(f"{spec.name} reports {status!r}; waiting for {'/'.join(spec.ready_statuses)}")
+                last_status = status
+            await asyncio.sleep(POLL_INTERVAL)
+        return False
+
+    async def _mark_ready(self, spec: ServiceSpec, process: asyncio.subprocess.Process, started: float) -> None:
+        if await self._wait_ready(spec, process):
+            if spec.health_url is not None:
+                self._log(f"{spec.name} ready after {time.monotonic() - started:.1f}s")
+        elif process.returncode is None and not self._stopping.is_set():
+            self._log(f"{spec.name} not ready after {spec.ready_timeout:.0f}s; starting dependents anyway")
+        else:
+            return  # exited before becoming ready; the restart gets another chance
+        self._ready[spec.name].set()
+
+    async def _supervise(self, spec: ServiceSpec) -> None:
+        for dependency in spec.depends_on:
+            waiting = asyncio.create_task(self._ready[dependency].wait())
+            stopping = asyncio.create_task(self._stopping.wait())
+            await asyncio.wait({waiting, stopping}, return_when=asyncio.FIRST_COMPLETED)
+            waiting.cancel()
+            stopping.cancel()
+            if self._stopping.is_set():
+                return
+        backoff = RESTART_BACKOFF
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            try:
+                process = await self._spawn(spec)
+            except OSError as e:
+                self._log(f"Failed to start {spec.name}: {e}")
+                self._ready[spec.name].set()
+                return
+
+            pump = asyncio.create_task(self.logs.pump(spec.name, process.stdout))
+            # Only the first start gates dependents; restarts rely on their own fallbacks
+            readiness = None
+            if not self._ready[spec.name].is_set():
+                readiness = asyncio.create_task(self._mark_ready(spec, process, started))
+            code = await process.wait()
+            await pump
+            if readiness is not None:
+                await readiness
+            if self._stopping.is_set():
+                return
+
+            if time.monotonic() - started >= STABLE_SECONDS:
+                backoff = RESTART_BACKOFF
+            self._log(f"{spec.name} exited with status {code}; restarting in {backoff:.0f}s")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=backoff)
+                return
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, MAX_RESTART_BACKOFF)
+
+    async def _terminate(self) -> None:
+        # Dependents first, so they don't log errors about services already gone
+        for name in reversed(list(self.services)):
+            process = self._processes.get(name)
+            if process is None or process.returncode is not None:
+                continue
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+                await asyncio.wait_for(process.wait(), timeout=STOP_TIMEOUT)
+            except ProcessLookupError:
+                pass
+            except asyncio.TimeoutError:
+                self._log(f"{name} did not stop within {STOP_TIMEOUT:.0f}s; killing")
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                await process.wait()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.stop)
+
+        writer = asyncio.create_task(self.logs.run())
+        supervisors = [asyncio.create_task(self._supervise(spec)) for spec in self.services.values()]
+        await self._stopping.wait()
+        self._log("Shutting down services...")
+        await self._terminate()
+        await asyncio.gather(*supervisors, return_exceptions=True)
+        writer.cancel()
+        await asyncio.gather(writer, return_exceptions=True)
+
+
+def run_services(services: List[ServiceSpec]) -> None:
+    """Supervise services until SIGINT/SIGTERM"""
+    async def main():
+        await Supervisor(services).run()
+
+    asyncio.run(main())